@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from backend import checks  # noqa: F401  (registers the deployment checks)
+        from backend import lookups
+        from . import directory
+        from .models import Role, User
+
+        post_save.connect(lookups.invalidate, sender=Role, dispatch_uid='lookups-role-save')
+        post_delete.connect(lookups.invalidate, sender=Role, dispatch_uid='lookups-role-delete')
+        post_save.connect(directory.invalidate, sender=User, dispatch_uid='directory-user-save')
+        post_delete.connect(directory.invalidate, sender=User, dispatch_uid='directory-user-delete')
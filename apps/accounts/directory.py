@@ -0,0 +1,61 @@
+# apps/accounts/directory.py
+"""Prefix search over users for typeahead pickers.
+
+`search_users(q)` matches the start of `username`, `full_name` or `email`
+(`LIKE 'q%'` on MySQL's case-insensitive collation, so each branch can use
+its index) and returns only `id`, `username` and `name`. Results are
+cached per normalized prefix. Keys embed a generation number that any
+user save/delete bumps, so edits are visible on the next keystroke instead
+of after the TTL.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import User
+
+MAX_QUERY_LENGTH = 100
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+_GENERATION_KEY = 'user_search:generation'
+
+
+def _generation():
+    generation = cache.get(_GENERATION_KEY)
+    if generation is None:
+        cache.add(_GENERATION_KEY, 1, None)
+        generation = cache.get(_GENERATION_KEY, 1)
+    return generation
+
+
+def normalize(q):
+    return ' '.join(str(q or '').split()).lower()[:MAX_QUERY_LENGTH]
+
+
+def search_users(q, limit=DEFAULT_LIMIT):
+    q = normalize(q)
+    if not q:
+        return []
+    digest = hashlib.sha1(q.encode()).hexdigest()
+    key = f'user_search:{_generation()}:{limit}:{digest}'
+    results = cache.get(key)
+    if results is None:
+        rows = (
+            User.objects.filter(deleted_at__isnull=True)
+            .filter(Q(username__istartswith=q) | Q(full_name__istartswith=q) | Q(email__istartswith=q))
+            .order_by('username')
+            .values_list('id', 'username', 'full_name')[:limit]
+        )
+        results = [{'id': pk, 'username': username, 'name': name} for pk, username, name in rows]
+        cache.set(key, results, getattr(settings, 'USER_SEARCH_CACHE_TTL', 300))
+    return results
+
+
+def invalidate(sender, **kwargs):
+    """Signal receiver: start a new cache generation after any user change."""
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.add(_GENERATION_KEY, 1, None)
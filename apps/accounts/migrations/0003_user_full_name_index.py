@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_seed_default_admin'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['full_name'], name='tbl_users_full_name_idx'),
+        ),
+    ]
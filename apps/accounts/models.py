@@ -67,6 +67,11 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_table = 'tbl_users'
         managed = True
         app_label = 'accounts'
+        indexes = [
+            # User typeahead prefix-matches full_name (username and email
+            # already have unique indexes).
+            models.Index(fields=['full_name'], name='tbl_users_full_name_idx'),
+        ]
 
     def __str__(self):
         return self.username
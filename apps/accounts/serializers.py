@@ -5,11 +5,18 @@ from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 from apps.accounts.models import Role
+from backend.log import lazy
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+def load_role_name(role_id):
+    if role_id is None:
+        return None
+    return Role.objects.filter(pk=role_id).values_list('name', flat=True).first()
+
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Allow login with either username or email.
 
@@ -152,9 +159,11 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
         # Apply role if provided (may be None to unset)
         try:
-            old_role = getattr(instance, 'role', None)
-            old_role_id = getattr(old_role, 'id', None)
-            old_role_name = getattr(old_role, 'name', None)
+            # Use the FK id rather than `instance.role`, which would load the
+            # old role just for this log line; its name is only looked up if
+            # the record is actually emitted.
+            old_role_id = instance.role_id
+            old_role_name = lazy(load_role_name, old_role_id)
 
             if role_val is not None:
                 new_role_id = getattr(role_val, 'id', None)
@@ -1,3 +1,367 @@
-from django.test import TestCase
+import functools
+import json
+import logging
+import os
+import runpy
+import shutil
+import tempfile
+import warnings
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework.test import APIClient
+
+from backend import checks, routers, throttling
+from backend.middleware import (
+    NPlusOneError, NPlusOneMiddleware, NPlusOneWarning, ProfilerMiddleware, ReplicaRoutingMiddleware,
+)
+from backend.querylog import fingerprint
+from . import directory, views
+from .models import User
+from .serializers import MyTokenObtainPairSerializer
+from .views import UserList
+
+
+class PrimaryOnlyView(UserList):
+    use_read_replica = False
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], DATABASE_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Route reads through the middleware + router and record the alias
+    the router picked while the view ran."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = routers.PrimaryReplicaRouter()
+
+    def _dispatch(self, request, view_class=UserList):
+        seen = {}
+
+        def get_response(req):
+            middleware.process_view(req, view_class.as_view(), (), {})
+            seen['read'] = self.router.db_for_read(User)
+            seen['write'] = self.router.db_for_write(User)
+            return HttpResponse(status=201 if req.method == 'POST' else 200)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        return seen, response
+
+    def test_safe_read_goes_to_replica(self):
+        seen, _ = self._dispatch(self.factory.get('/api/auth/users/'))
+        self.assertEqual(seen['read'], 'replica_1')
+        self.assertEqual(seen['write'], 'default')
+
+    def test_write_goes_to_primary_and_pins(self):
+        seen, response = self._dispatch(self.factory.post('/api/auth/users/'))
+        self.assertEqual(seen['read'], 'default')
+        self.assertIn('db_pin', response.cookies)
+        self.assertEqual(response.cookies['db_pin']['max-age'], 5)
+
+    def test_pinned_client_reads_primary(self):
+        request = self.factory.get('/api/auth/users/')
+        request.COOKIES['db_pin'] = '1'
+        seen, _ = self._dispatch(request)
+        self.assertEqual(seen['read'], 'default')
+
+    def test_view_opt_out_reads_primary(self):
+        seen, _ = self._dispatch(self.factory.get('/api/auth/users/'), view_class=PrimaryOnlyView)
+        self.assertEqual(seen['read'], 'default')
+
+    def test_outside_request_reads_primary(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        seen, _ = self._dispatch(self.factory.get('/api/auth/users/'))
+        self.assertEqual(seen['read'], 'default')
+
+
+@skipUnless('replica_test' in settings.DATABASES, 'needs DJANGO_SETTINGS_MODULE=backend.test_settings')
+@override_settings(DATABASE_REPLICAS=['replica_test'], DATABASE_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingQueryTests(TestCase):
+    """Send real requests and check which connection ran their queries.
+
+    `replica_test` mirrors the primary's test database (see
+    `backend.test_settings`), so
+    both aliases see the seeded admin while each keeps its own queries.
+    """
+    databases = {'default', 'replica_test'}
+
+    def setUp(self):
+        self.admin = User.objects.select_related('role').get(username='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _request(self, method, path, **kwargs):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica_test']) as replica:
+            response = getattr(self.client, method)(path, **kwargs)
+        return response, primary.captured_queries, replica.captured_queries
+
+    def test_get_reads_from_replica(self):
+        response, primary, replica = self._request('get', '/api/auth/users/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('tbl_users' in q['sql'] for q in replica))
+        self.assertEqual(primary, [])
+        self.assertNotIn('db_pin', response.cookies)
+
+    def test_post_writes_to_primary_and_pins(self):
+        response, primary, replica = self._request('post', '/api/projects/', data={
+            'name': 'Routing', 'description': 'x',
+            'project_start_date': '2026-01-01T00:00:00Z', 'project_end_date': '2026-02-01T00:00:00Z',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(any(q['sql'].startswith('INSERT INTO') and 'tbl_projects' in q['sql'] for q in primary))
+        self.assertEqual(replica, [])
+        self.assertEqual(response.cookies['db_pin']['max-age'], 5)
+
+        # The pinned client's next read stays on the primary.
+        self.client.cookies['db_pin'] = '1'
+        response, primary, replica = self._request('get', '/api/auth/users/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('tbl_users' in q['sql'] for q in primary))
+        self.assertEqual(replica, [])
+
+
+class LazyLogArgumentTests(TestCase):
+    """Costly log arguments are only computed for records that are emitted."""
+
+    def register(self, username):
+        response = APIClient().post('/api/auth/register/', {
+            'username': username, 'email': f'{username}@example.com', 'full_name': username, 'password': 'pw-12345',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_role_name_is_only_loaded_when_logged(self):
+        logger = logging.getLogger('apps.accounts.views')
+        level = logger.level
+        self.addCleanup(logger.setLevel, level)
+        with mock.patch.object(views, 'load_role_name', return_value='user') as load:
+            logger.setLevel(logging.WARNING)
+            self.register('quiet')
+            load.assert_not_called()
+            logger.setLevel(logging.INFO)
+            self.register('loud')
+            load.assert_called_once_with(3)
+
+
+class ProfilerMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        admin = User.objects.select_related('role').get(username='admin')
+        self.auth = f'Bearer {MyTokenObtainPairSerializer.get_token(admin).access_token}'
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def middleware(self):
+        def get_response(request):
+            list(User.objects.filter(username='admin'))
+            return HttpResponse('ok')
+
+        with self.settings(PROFILER_ENABLED=True, PROFILER_OUTPUT_DIR=self.output_dir):
+            return ProfilerMiddleware(get_response)
+
+    def test_disabled_by_default(self):
+        with self.settings(PROFILER_ENABLED=False), self.assertRaises(MiddlewareNotUsed):
+            ProfilerMiddleware(lambda request: HttpResponse())
+
+    def test_only_admins_are_profiled(self):
+        response = self.middleware()(self.factory.get('/api/tasks/', HTTP_X_PROFILE='1'))
+        self.assertEqual(response.content, b'ok')
+        self.assertNotIn('X-Profile-Report', response)
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_report_is_saved(self):
+        response = self.middleware()(self.factory.get('/api/tasks/', HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=self.auth))
+        self.assertEqual(response.content, b'ok')
+        stem = response['X-Profile-Report']
+        self.assertEqual(sorted(os.listdir(self.output_dir)), [f'{stem}.json', f'{stem}.prof'])
+
+    def test_inline_report_with_memory(self):
+        request = self.factory.get('/api/tasks/?_profile=mem&_profile_inline=1', HTTP_AUTHORIZATION=self.auth)
+        report = json.loads(self.middleware()(request).content)
+        self.assertEqual(report['status'], 200)
+        self.assertTrue(any('tbl_users' in query['sql'] for query in report['sql']))
+        self.assertEqual(report['sql_count'], len(report['sql']))
+        self.assertTrue(report['allocations'])
+        self.assertIn('function calls', report['pstats'])
+
+
+class NPlusOneMiddlewareTests(TestCase):
+
+    def middleware(self, action, repeats=6, **options):
+        def get_response(request):
+            for pk in range(repeats):
+                User.objects.filter(pk=pk).first()
+            return HttpResponse()
+
+        with self.settings(NPLUSONE_ENABLED=True, NPLUSONE_THRESHOLD=5, NPLUSONE_ACTION=action, **options):
+            middleware = NPlusOneMiddleware(get_response)
+        return lambda: middleware(RequestFactory().get('/api/tasks/'))
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 1 AND b = 'x' AND c IN (1, 2, 3)"),
+            fingerprint("SELECT * FROM t WHERE a = 22 AND b = 'y''s' AND c IN (4)"),
+        )
+
+    def test_raise_points_at_the_call_site(self):
+        with self.assertRaisesMessage(NPlusOneError, 'apps/accounts/tests.py'):
+            self.middleware('raise')()
+
+    def test_warn_and_log(self):
+        with self.assertWarns(NPlusOneWarning):
+            self.middleware('warn')()
+        with self.assertLogs('backend.middleware', 'WARNING') as logs:
+            self.middleware('log')()
+        self.assertIn('N+1 suspected on GET /api/tasks/', logs.output[0])
+
+    def test_below_threshold_or_ignored_is_quiet(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', NPlusOneWarning)
+            self.middleware('warn', repeats=5)()
+            self.middleware('warn', NPLUSONE_IGNORE=[r'FROM "tbl_users"'])()
+
+
+REDIS_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'}}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    def test_deploy_check_flags_a_local_cache(self):
+        self.assertEqual([warning.id for warning in checks.check_shared_cache()], ['backend.W001'])
+        self.assertEqual([warning.id for warning in checks.check_throttle_cache()], ['backend.W002'])
+        self.assertEqual([warning.id for warning in checks.check_idempotency_cache()], ['backend.W003'])
+        with self.settings(CACHES=REDIS_CACHES):
+            self.assertEqual(checks.check_shared_cache(), [])
+            self.assertEqual(checks.check_throttle_cache(), [])
+            self.assertEqual(checks.check_idempotency_cache(), [])
+
+    def test_gunicorn_needs_a_shared_cache_for_several_workers(self):
+        on_starting = runpy.run_path(str(Path(settings.BASE_DIR) / 'gunicorn.conf.py'))['on_starting']
+        with self.assertRaisesMessage(RuntimeError, 'CACHE_REDIS_URL'):
+            on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+        on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+        with self.settings(CACHES=REDIS_CACHES):
+            on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+
+
+class TokenBucketThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills_over_time(self):
+        # 2/min: a burst of two, then one token every 30 seconds.
+        capacity, refill = throttling.parse_rate('2/min')
+        with mock.patch.object(throttling.time, 'time', return_value=1000.0) as clock:
+            take = functools.partial(throttling.take_local, cache, 'bucket', capacity, refill)
+            self.assertEqual([take()[0], take()[0]], [True, True])
+            self.assertEqual(take(), (False, 30.0))
+            clock.return_value = 1015.0
+            allowed, wait = take()
+            self.assertFalse(allowed)
+            self.assertAlmostEqual(wait, 15.0)
+            clock.return_value = 1030.0
+            self.assertTrue(take()[0])
+            self.assertFalse(take()[0])
+
+    def test_throttled_request_gets_429_with_retry_after(self):
+        rates = {**drf_settings.DEFAULT_THROTTLE_RATES, 'read': '2/min'}
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            client = APIClient()
+            client.force_authenticate(User.objects.get(username='admin'))
+            statuses = [client.get('/api/auth/users/').status_code for _ in range(3)]
+            self.assertEqual(statuses, [200, 200, 429])
+            response = client.get('/api/auth/users/')
+            self.assertEqual(response.status_code, 429)
+            self.assertIn(response['Retry-After'], ('29', '30'))
+            # Another principal has its own bucket.
+            other = APIClient()
+            other.force_authenticate(User.objects.create_user(
+                'bob', 'bob@example.com', 'pw', full_name='Bob', created_at=timezone.now(), role_id=1,
+            ))
+            self.assertEqual(other.get('/api/auth/users/').status_code, 200)
+
+
+class UserDirectoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for username, full_name, deleted in (
+            ('alice', 'Alice Smith', False), ('alfred', 'Fred Jones', False),
+            ('bob', 'Alan Brown', False), ('gone', 'Alma Gone', True),
+        ):
+            User.objects.create_user(
+                username, f'{username}@example.com', 'pw', full_name=full_name, created_at=timezone.now(),
+                role_id=3, deleted_at=timezone.now() if deleted else None,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.select_related('role').get(username='admin'))
+
+    def search(self, q, **params):
+        response = self.client.get('/api/auth/users/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [user['username'] for user in response.data]
+
+    def test_list_loads_roles_in_one_query(self):
+        def list_queries():
+            with CaptureQueriesContext(connections['default']) as queries:
+                response = self.client.get('/api/auth/users/')
+            self.assertEqual(response.status_code, 200)
+            return len(queries), response.data
+
+        before, users = list_queries()
+        self.assertNotIn('gone', [user['username'] for user in users])
+        for n in range(5):
+            User.objects.create_user(f'extra{n}', f'extra{n}@example.com', 'pw', full_name='x', created_at=timezone.now(), role_id=3)
+        self.assertEqual(list_queries()[0], before)
+
+        response = self.client.get('/api/auth/users/', {'page': 1, 'page_size': 2})
+        self.assertEqual(response.data['count'], 9)
+        self.assertEqual([user['username'] for user in response.data['results']], ['admin', 'alice'])
+
+    def test_search_matches_prefixes(self):
+        self.assertEqual(self.search('al'), ['alfred', 'alice', 'bob'])
+        self.assertEqual(self.search('  ALI '), ['alice'])
+        self.assertEqual(self.search('fred'), ['alfred'])
+        self.assertEqual(self.search('bob@'), ['bob'])
+        self.assertEqual(self.search('smith'), [])
+        self.assertEqual(self.search(''), [])
+        self.assertEqual(self.search('al', limit=2), ['alfred', 'alice'])
+        response = self.client.get('/api/auth/users/search/', {'q': 'alice'})
+        self.assertEqual(list(response.data[0]), ['id', 'username', 'name'])
+        self.assertEqual(response.data[0]['name'], 'Alice Smith')
+
+    def test_search_is_limited_to_admins_and_managers(self):
+        self.assertEqual(self.client.get('/api/auth/users/search/', {'q': 'a', 'limit': 'x'}).status_code, 400)
+        self.client.force_authenticate(User.objects.get(username='bob'))
+        self.assertEqual(self.client.get('/api/auth/users/search/', {'q': 'a'}).status_code, 403)
+
+    def test_user_changes_start_a_new_cache_generation(self):
+        self.assertEqual([user['username'] for user in directory.search_users('al')], ['alfred', 'alice', 'bob'])
+        with self.assertNumQueries(0):
+            directory.search_users('al')
+
+        bob = User.objects.get(username='bob')
+        bob.full_name = 'Robert Brown'
+        bob.save()
+        self.assertEqual([user['username'] for user in directory.search_users('al')], ['alfred', 'alice'])
+        User.objects.get(username='alice').delete()
+        self.assertEqual([user['username'] for user in directory.search_users('al')], ['alfred'])
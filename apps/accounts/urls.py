@@ -2,7 +2,7 @@
 from django.urls import path
 from .views import MyTokenObtainPairView, logout_view, RegisterView, ChangePasswordView
 from .views import csrf_view
-from .views import UserList, UserDetail
+from .views import UserList, UserDetail, UserSearchView
 from .views import RoleList, RoleDetail
 
 urlpatterns = [
@@ -11,6 +11,7 @@ urlpatterns = [
     path('logout/', logout_view, name='logout'),
         path('csrf/', csrf_view, name='csrf'),
     path('users/', UserList.as_view(), name='user-list'),
+    path('users/search/', UserSearchView.as_view(), name='user-search'),
     path('users/<int:pk>/', UserDetail.as_view(), name='user-detail'),
     # Singular route for compatibility: allow PATCH/PUT at /user/<id>/
     path('user/<int:pk>/', UserDetail.as_view(), name='user-update'),
@@ -5,7 +5,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .models import User
-from .serializers import MyTokenObtainPairSerializer
+from .serializers import MyTokenObtainPairSerializer, load_role_name
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
 from django.utils import timezone
@@ -22,8 +22,11 @@ from .serializers import RoleSerializer
 from apps.accounts.models import Role
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from . import directory
+from backend.log import lazy
 class RegisterView(generics.CreateAPIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'register'
 
     def post(self, request):
         username = request.data.get('username')
@@ -56,16 +59,9 @@ class RegisterView(generics.CreateAPIView):
         )
         user.save()
 
-        # Assign role on the user (single-role model)
-        
-        try:
-            role_obj = Role.objects.get(pk=role_id)
-            user.role = role_obj
-            user.save(update_fields=['role'])
-            logger.info("Assigned role id=%s to new user id=%s", role_obj.id, user.id)
-        except Role.DoesNotExist:
-            # ignore invalid role id and leave role null
-            logger.warning("Role id=%s not found when creating user id=%s", role_id, getattr(user, 'id', None))
+        # `role_id` is already saved with the user; the role's name is only
+        # looked up if the record is emitted.
+        logger.info("Assigned role id=%s (%s) to new user id=%s", role_id, lazy(load_role_name, role_id), user.id)
 
         return Response({
             "message": "User registered successfully",
@@ -79,6 +75,7 @@ class RegisterView(generics.CreateAPIView):
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
+    throttle_scope = 'login'
 
     def post(self, request, *args, **kwargs):
         # Validate credentials with the token serializer so we can access
@@ -175,13 +172,31 @@ class UserList(generics.ListAPIView):
     serializer_class = UserSerializer
 
     def get_queryset(self):
-        # Only non-deleted users
-        return User.objects.filter(deleted_at__isnull=True)
+        # Only non-deleted users; join the role so the serializer does not
+        # query it per row. Ordered so `?page=` pages are stable.
+        return User.objects.filter(deleted_at__isnull=True).select_related('role').order_by('id')
+
+
+class UserSearchView(APIView):
+    """Typeahead: `GET /api/auth/users/search/?q=<prefix>[&limit=n]`.
+
+    Prefix-matches username, full name or email and returns at most
+    `limit` (default 10, max 25) `{id, username, name}` objects.
+    """
+    permission_classes = [IsAuthenticated, IsAdminOrManagerRole]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', directory.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            return Response({'detail': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, directory.MAX_LIMIT))
+        return Response(directory.search_users(request.query_params.get('q', ''), limit))
 
 
 class UserDetail(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated, IsAdminRole]
-    queryset = User.objects.filter(deleted_at__isnull=True)
+    queryset = User.objects.filter(deleted_at__isnull=True).select_related('role')
 
     def get_serializer_class(self):
         # Use a write-capable serializer when updating, otherwise read-only
@@ -196,7 +211,10 @@ class UserDetail(generics.RetrieveUpdateAPIView):
             user_obj.deleted_at = timezone.now()
             try:
                 user_obj.save(update_fields=['deleted_at'])
-                logger.info("Soft-deleted user id=%s", getattr(user_obj, 'id', None))
+                logger.info(
+                    "Soft-deleted user id=%s with %s live tasks still assigned",
+                    getattr(user_obj, 'id', None), lazy(user_obj.assigned_tasks.filter(deleted_at__isnull=True).count),
+                )
             except Exception:
                 logger.exception("Failed to soft-delete user id=%s", getattr(user_obj, 'id', None))
                 return Response({"detail": "Failed to delete user"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -276,7 +294,7 @@ class ChangePasswordView(APIView):
             # Save the user; update_fields may not include modified_at auto field,
             # so do a full save for legacy unmanaged model.
             user.save()
-            logger.info("Password changed for user id=%s", getattr(user, 'id', None))
+            logger.info("Password changed for user id=%s (role %s)", getattr(user, 'id', None), lazy(load_role_name, user.role_id))
             return Response({"message": "Password changed successfully"}, status=status.HTTP_200_OK)
         except Exception:
             logger.exception("Failed to update password for user id=%s", getattr(user, 'id', None))
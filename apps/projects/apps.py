@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.projects'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from backend import lookups
+        from . import membership
+        from .models import ProjectMember, ProjectStatus
+
+        post_save.connect(lookups.invalidate, sender=ProjectStatus, dispatch_uid='lookups-projectstatus-save')
+        post_delete.connect(lookups.invalidate, sender=ProjectStatus, dispatch_uid='lookups-projectstatus-delete')
+        post_save.connect(membership.invalidate, sender=ProjectMember, dispatch_uid='membership-save')
+        post_delete.connect(membership.invalidate, sender=ProjectMember, dispatch_uid='membership-delete')
@@ -0,0 +1,51 @@
+# apps/projects/membership.py
+"""Project membership lookups.
+
+Row-level filtering uses `member_exists()`, a correlated `EXISTS` on the
+(project_id, user_id) unique index, so visibility never loads a user's
+projects into Python. Per-object permission checks use `is_member()`, the
+same index probe, so a removed member loses access immediately in every
+worker. Only SSE filtering uses `member_project_ids()`, a per-user set
+cached until that user's memberships change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from .models import ProjectMember
+
+
+def _key(user_id):
+    return f'project_members:{user_id}'
+
+
+def member_exists(user_id, project_ref=OuterRef('project_id')):
+    """`Exists()` expression: is `user_id` a member of `project_ref`?"""
+    return Exists(ProjectMember.objects.filter(project_id=project_ref, user_id=user_id))
+
+
+def member_project_ids(user_id):
+    """Return the (cached) frozenset of project ids `user_id` belongs to."""
+    if user_id is None:
+        return frozenset()
+    user_id = int(user_id)
+    key = _key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(ProjectMember.objects.filter(user_id=user_id).values_list('project_id', flat=True))
+        cache.set(key, ids, getattr(settings, 'PROJECT_MEMBERSHIP_CACHE_TTL', 300))
+    return ids
+
+
+def is_member(user_id, project_id):
+    """Is `user_id` a member of `project_id`? Always asks the database."""
+    try:
+        user_id, project_id = int(user_id), int(project_id)
+    except (TypeError, ValueError):
+        return False
+    return ProjectMember.objects.filter(project_id=project_id, user_id=user_id).exists()
+
+
+def invalidate(sender, instance, **kwargs):
+    """Signal receiver: drop the cached set for the membership's user."""
+    cache.delete(_key(instance.user_id))
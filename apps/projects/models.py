@@ -43,7 +43,16 @@ class Project(models.Model):
         related_name='projects',
         db_column='created_by'
     )
-    
+
+    # Task counters maintained by `apps.tasks.counters` on every task write
+    # (per-status counts live in `tbl_project_task_status_counts`).
+    # `overdue_task_count` is refreshed by the counter sweep.
+    task_count = models.IntegerField(default=0)
+    open_task_count = models.IntegerField(default=0)
+    overdue_task_count = models.IntegerField(default=0)
+    overdue_as_of = models.DateTimeField(null=True, blank=True)
+
+    COUNTER_FIELDS = ('task_count', 'open_task_count', 'overdue_task_count', 'overdue_as_of')
 
     class Meta:
         db_table = 'tbl_projects'
@@ -53,6 +62,16 @@ class Project(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Never write counters from a possibly stale instance; they are
+        # only changed with F() updates.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     # Soft delete
     def delete(self, *args, **kwargs):
         self.deleted_at = models.functions.Now()
@@ -60,4 +79,29 @@ class Project(models.Model):
 
     def restore(self):
         self.deleted_at = None
-        self.save(update_fields=['deleted_at'])
\ No newline at end of file
+        self.save(update_fields=['deleted_at'])
+
+
+class ProjectMember(models.Model):
+    """A user's membership of a project.
+
+    Members can see (and edit) every task of the project, not just the
+    ones assigned to them. `unique_together` doubles as the
+    (project_id, user_id) index used by the task visibility `EXISTS`; the
+    (user_id, project_id) index serves "which projects is this user in".
+    """
+    id = models.AutoField(primary_key=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='memberships', db_column='project_id')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='project_memberships', db_column='user_id')
+    created_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'tbl_project_members'
+        managed = True
+        unique_together = ('project', 'user')
+        indexes = [
+            models.Index(fields=['user', 'project'], name='tbl_project_members_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}@{self.project_id}'
@@ -1,6 +1,6 @@
 # apps/projects/serializers.py
 from rest_framework import serializers
-from .models import Project, ProjectStatus
+from .models import Project, ProjectMember, ProjectStatus
 from rest_framework import serializers
 
 class ProjectStatusSerializer(serializers.ModelSerializer):
@@ -20,18 +20,64 @@ class ProjectSerializer(serializers.ModelSerializer):
     )
     # include related tasks when returning a single project
     tasks = serializers.SerializerMethodField()
+    # maintained counters; reading them never touches tbl_tasks
+    task_counts = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
         fields = [
             'id', 'name', 'description', 'project_start_date', 'project_end_date',
             'created_at', 'modified_at', 'deleted_at',
-            'project_status', 'project_status_id', 'created_by', 'tasks'
+            'project_status', 'project_status_id', 'created_by', 'tasks', 'task_counts'
         ]
         read_only_fields = ['created_at', 'modified_at', 'deleted_at', 'created_by']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # `?include_tasks=0` leaves tasks out (see ProjectViewSet).
+        if not self.context.get('include_tasks', True):
+            self.fields.pop('tasks', None)
+
+    def get_task_counts(self, obj):
+        from backend import lookups
+        from apps.tasks.models import TaskStatus
+        names = lookups.get_lookup(TaskStatus)
+        return {
+            'total': obj.task_count,
+            'open': obj.open_task_count,
+            'overdue': obj.overdue_task_count,
+            'overdue_as_of': obj.overdue_as_of,
+            'by_status': {
+                names.get(c.status_id, str(c.status_id)): c.count
+                for c in obj.task_status_counts.all() if c.count
+            },
+        }
+
     def get_tasks(self, obj):
         # import here to avoid circular imports at module load
+        from apps.tasks import hierarchy
         from apps.tasks.serializers import TaskSerializer
-        tasks_qs = obj.tasks.filter(deleted_at__isnull=True)
-        return TaskSerializer(tasks_qs, many=True).data
\ No newline at end of file
+        # Join and prefetch what TaskSerializer reads, so the query count
+        # does not grow with the number of tasks.
+        tasks_qs = hierarchy.with_relations(
+            obj.tasks.filter(deleted_at__isnull=True).select_related('status', 'assignee', 'project')
+        )
+        return TaskSerializer(tasks_qs, many=True).data
+
+
+class ProjectMemberSerializer(serializers.ModelSerializer):
+    username = serializers.ReadOnlyField(source='user.username')
+
+    class Meta:
+        model = ProjectMember
+        fields = ['id', 'user_id', 'username', 'created_at']
+
+
+class ProjectCloneSerializer(serializers.Serializer):
+    """Options of `POST /api/projects/<id>/clone/`."""
+    name = serializers.CharField(max_length=100, required=False)
+    # Shifts the end date and every task deadline by the same amount.
+    project_start_date = serializers.DateTimeField(required=False)
+    clear_assignees = serializers.BooleanField(default=False)
+    # Put every copied task in the first task status (e.g. "todo").
+    reset_status = serializers.BooleanField(default=False)
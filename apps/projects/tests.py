@@ -1,3 +1,192 @@
+import datetime
+import logging
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.serializers import MyTokenObtainPairSerializer
+from apps.tasks import counters, hierarchy, tagging
+from apps.tasks.models import Task, TaskClosure, TaskDependency, TaskStatus
+
+from .models import Project
+
+User = get_user_model()
+
+
+class ProjectApiTestCase(TestCase):
+    """Seeded admin and an empty project, with the admin logged in."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.get(username='admin')
+        start = timezone.now().replace(microsecond=0)
+        cls.project = Project.objects.create(
+            name='P', description='x', created_by=cls.admin,
+            project_start_date=start, project_end_date=start + datetime.timedelta(days=30),
+        )
+        statuses = {status.name: status.id for status in TaskStatus.objects.all()}
+        cls.todo, cls.done = statuses['todo'], statuses['completed']
+
+    def setUp(self):
+        self.client = APIClient()
+        token = MyTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def task(self, title, project=None, **fields):
+        fields.setdefault('status_id', self.todo)
+        task = Task(title=title, description='x', project=project or self.project, **fields)
+        task.save()
+        return task
+
+
+class ProjectCounterTests(ProjectApiTestCase):
+
+    def test_list_embeds_tasks_unless_asked_not_to(self):
+        self.task('a')
+        self.task('b', status_id=self.done)
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        project, = response.data
+        self.assertEqual(sorted(task['title'] for task in project['tasks']), ['a', 'b'])
+        self.assertEqual(project['task_counts']['total'], 2)
+        self.assertEqual(project['task_counts']['open'], 1)
+        self.assertEqual(project['task_counts']['by_status'], {'todo': 1, 'completed': 1})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projects/', {'include_tasks': '0'})
+        project, = response.data
+        self.assertNotIn('tasks', project)
+        self.assertEqual(project['task_counts']['total'], 2)
+        self.assertFalse(any('tbl_tasks' in query['sql'] for query in queries))
+
+    def test_counters_follow_task_writes(self):
+        a = self.task('a', deadline=timezone.now() - datetime.timedelta(days=1))
+        self.task('b')
+        counters.refresh_overdue()
+        a.status_id = self.done
+        a.save()
+        self.task('b').delete()
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual((project.task_count, project.open_task_count, project.overdue_task_count), (2, 1, 1))
+        self.assertEqual(counters.project_drift(), {})
+        counters.refresh_overdue()
+        self.assertEqual(Project.objects.get(pk=self.project.pk).overdue_task_count, 0)
+
+    def test_embedded_tasks_cost_a_fixed_number_of_queries(self):
+        # The sampled INFO record of the project lookup adds a lazy COUNT(*).
+        logger = logging.getLogger('apps.projects.viewsets')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.WARNING)
+
+        def add_tasks(prefix):
+            blocker = self.task(f'{prefix}-blocker', assignee=self.admin)
+            for n in range(3):
+                task = self.task(f'{prefix}{n}', assignee=self.admin)
+                tagging.set_tags(task, ['x', f'{prefix}{n}'])
+                hierarchy.add_dependency(task, blocker)
+
+        def retrieve():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(f'/api/projects/{self.project.id}/')
+            self.assertEqual(response.status_code, 200)
+            return len(queries), response.data['tasks']
+
+        add_tasks('a')
+        retrieve()  # fill the cached lookups
+        expected, tasks = retrieve()
+        self.assertEqual(len(tasks), 4)
+        add_tasks('b')
+        count, tasks = retrieve()
+        self.assertEqual(len(tasks), 8)
+        self.assertEqual(count, expected)
+        by_title = {task['title']: task for task in tasks}
+        self.assertEqual(by_title['b1']['tags'], ['b1', 'x'])
+        self.assertTrue(by_title['b1']['is_blocked'])
+
+
+class CloneProjectTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.get(username='admin')
+        start = timezone.now().replace(microsecond=0)
+        cls.source = Project.objects.create(
+            name='Template', description='x', created_by=cls.admin,
+            project_start_date=start, project_end_date=start + datetime.timedelta(days=30),
+        )
+        statuses = {status.name: status.id for status in TaskStatus.objects.all()}
+        cls.todo, cls.done = statuses['todo'], statuses['completed']
+
+        def task(title, **fields):
+            fields.setdefault('status_id', cls.todo)
+            task = Task(title=title, description='x', project=cls.source, **fields)
+            task.save()
+            return task
+
+        cls.a = task('a', assignee=cls.admin, deadline=start + datetime.timedelta(days=3))
+        cls.b = task('b', parent=cls.a, status_id=cls.done)
+        cls.gone = task('gone', parent=cls.b)
+        cls.c = task('c', parent=cls.gone)
+        cls.d = task('d')
+        cls.gone.delete()
+        hierarchy.add_dependency(cls.d, cls.a)
+        tagging.set_tags(cls.b, ['setup'])
+
+    def setUp(self):
+        self.client = APIClient()
+        token = MyTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def clone(self, **options):
+        response = self.client.post(f'/api/projects/{self.source.id}/clone/', options, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return Project.objects.get(pk=response.data['id'])
+
+    def test_copies_tasks_and_maps_relations(self):
+        new_start = self.source.project_start_date + datetime.timedelta(days=7)
+        project = self.clone(name='Client', project_start_date=new_start.isoformat(), clear_assignees=True)
+        self.assertEqual(project.name, 'Client')
+        self.assertEqual(project.project_end_date, self.source.project_end_date + datetime.timedelta(days=7))
+
+        copies = {task.title: task for task in Task.objects.filter(project=project)}
+        self.assertEqual(sorted(copies), ['a', 'b', 'c', 'd'])
+        a, b, c, d = (copies[title] for title in 'abcd')
+        self.assertEqual(b.parent_id, a.id)
+        # The deleted parent is not copied; its child becomes a root.
+        self.assertIsNone(c.parent_id)
+        self.assertEqual(b.status_id, self.done)
+        self.assertIsNone(a.assignee_id)
+        self.assertEqual(a.deadline, self.a.deadline + datetime.timedelta(days=7))
+        self.assertEqual(
+            set(TaskClosure.objects.filter(descendant=b).values_list('ancestor_id', 'depth')), {(b.id, 0), (a.id, 1)},
+        )
+        self.assertEqual(list(TaskDependency.objects.filter(task=d).values_list('blocked_by_id', flat=True)), [a.id])
+        self.assertEqual(tagging.tag_names(b), ['setup'])
+        self.assertEqual((project.task_count, project.open_task_count), (4, 3))
+        self.assertEqual(counters.project_drift(), {})
+        self.assertEqual(counters.workload_drift(), {})
+
+    def test_reset_status_keeps_board_order(self):
+        project = self.clone(reset_status=True)
+        tasks = Task.objects.filter(project=project)
+        self.assertEqual(set(tasks.values_list('status_id', flat=True)), {self.todo})
+        self.assertEqual(list(tasks.order_by('rank', 'id').values_list('title', flat=True)), ['a', 'c', 'd', 'b'])
+        self.assertEqual(counters.project_drift(), {})
 
-# Create your tests here.
+    def test_maps_ids_without_returning_inserts(self):
+        # MySQL does not return ids from multi-row INSERTs.
+        features = type(connection.features)
+        with mock.patch.object(features, 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock, return_value=False):
+            project = self.clone()
+        copies = {task.title: task for task in Task.objects.filter(project=project)}
+        self.assertEqual(copies['b'].parent_id, copies['a'].id)
+        self.assertEqual(
+            list(TaskDependency.objects.filter(task=copies['d']).values_list('blocked_by_id', flat=True)),
+            [copies['a'].id],
+        )
+        self.assertEqual(tagging.tag_names(copies['b']), ['setup'])
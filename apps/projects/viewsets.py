@@ -1,11 +1,23 @@
 # apps/projects/viewsets.py
+import datetime
 import logging
-from rest_framework import viewsets, filters
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
+from backend import lookups
+from backend.log import lazy
+from backend.idempotency import idempotent
 from apps.accounts.permissions import IsAdminRole, IsAdminOrManagerRole
-from .models import Project, ProjectStatus
-from .serializers import ProjectSerializer
+from apps.tasks import board, cloning, hierarchy, snapshots, tagging
+from apps.tasks.models import Task, TaskStatus
+from apps.tasks.serializers import TaskSerializer
+from .membership import is_member
+from .models import Project, ProjectMember, ProjectStatus
+from .serializers import ProjectCloneSerializer, ProjectMemberSerializer, ProjectSerializer
 from .permissions import IsOwnerOrReadOnly
 
 class ProjectViewSet(viewsets.ModelViewSet):
@@ -18,16 +30,183 @@ class ProjectViewSet(viewsets.ModelViewSet):
         # Return all non-deleted projects. Actual access control is handled
         # by the `IsAdminRole` permission class which allows only admins.
         try:
-            qs = Project.objects.filter(deleted_at__isnull=True)
-            self.logger.info("Project list requested by user id=%s: returning %s projects", getattr(self.request.user, 'id', None), qs.count())
+            qs = Project.objects.filter(deleted_at__isnull=True).prefetch_related('task_status_counts')
+            # The COUNT(*) only runs if the record is emitted.
+            self.logger.info(
+                "Project list requested by user id=%s: returning %s projects",
+                getattr(self.request.user, 'id', None), lazy(qs.count),
+            )
             return qs
         except Exception:
             self.logger.exception("Failed to fetch projects for user id=%s", getattr(self.request, 'user', None))
             return Project.objects.none()
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # `?include_tasks=0` leaves the embedded tasks out; `task_counts`
+        # is enough for list pages and never touches tbl_tasks.
+        context['include_tasks'] = self.request.query_params.get('include_tasks') not in ('0', 'false')
+        return context
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(detail=True, methods=['get', 'post'], url_path='members')
+    def members(self, request, pk=None):
+        """List the project's members (GET) or add one (POST `{"user_id": n}`).
+
+        Members can see and edit every task of the project.
+        """
+        project = self.get_object()
+        if request.method == 'GET':
+            qs = ProjectMember.objects.filter(project=project).select_related('user').order_by('id')
+            return Response(ProjectMemberSerializer(qs, many=True).data)
+
+        try:
+            user_id = int(request.data.get('user_id'))
+        except (TypeError, ValueError):
+            return Response({'detail': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not get_user_model().objects.filter(id=user_id, deleted_at__isnull=True).exists():
+            return Response({'detail': 'User not found'}, status=status.HTTP_400_BAD_REQUEST)
+        member, created = ProjectMember.objects.get_or_create(
+            project=project, user_id=user_id, defaults={'created_at': timezone.now()},
+        )
+        return Response(
+            ProjectMemberSerializer(member).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @members.mapping.delete
+    def remove_member(self, request, pk=None):
+        """Remove a member: DELETE `?user_id=n`."""
+        project = self.get_object()
+        try:
+            user_id = int(request.query_params.get('user_id'))
+        except (TypeError, ValueError):
+            return Response({'detail': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        # Delete row by row so post_delete invalidates the membership cache.
+        members = list(ProjectMember.objects.filter(project=project, user_id=user_id))
+        if not members:
+            return Response({'detail': 'Not a member'}, status=status.HTTP_404_NOT_FOUND)
+        for member in members:
+            member.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['get'], url_path='board', permission_classes=[IsAuthenticated])
+    def board(self, request, pk=None):
+        """Kanban board: one column per task status, first `?limit=` tasks each.
+
+        Each column has its `total` and a `next_cursor` when it holds more
+        tasks; `?status_id=<id>&cursor=<next_cursor>` returns the next
+        tasks of that column only. Admins, managers and project members see
+        every task, other users only the tasks assigned to them.
+        """
+        project = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', board.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = board.DEFAULT_LIMIT
+        limit = max(1, min(limit, board.MAX_LIMIT))
+
+        tasks = hierarchy.with_relations(
+            Task.objects.filter(project=project, deleted_at__isnull=True).select_related('status', 'assignee', 'project')
+        )
+        user_id = getattr(request.user, 'id', None)
+        if not (IsAdminOrManagerRole().has_permission(request, self) or is_member(user_id, project.id)):
+            tasks = tasks.filter(assignee_id=user_id)
+        context = self.get_serializer_context()
+
+        status_id = request.query_params.get('status_id')
+        if status_id is not None:
+            try:
+                rows, next_cursor = board.column_page(tasks, int(status_id), request.query_params.get('cursor'), limit)
+            except ValueError:
+                return Response({'detail': 'Invalid status_id or cursor'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({
+                'status_id': int(status_id),
+                'tasks': TaskSerializer(rows, many=True, context=context).data,
+                'next_cursor': next_cursor,
+            })
+
+        columns = board.board_columns(tasks, limit)
+        for column in columns:
+            column['tasks'] = TaskSerializer(column['tasks'], many=True, context=context).data
+        return Response({'project': {'id': project.id, 'name': project.name}, 'columns': columns})
+
+    @action(detail=True, methods=['get'], url_path='tags')
+    def tags(self, request, pk=None):
+        """Tags used by the project's live tasks with their task counts (cached)."""
+        project = self.get_object()
+        return Response(tagging.project_tag_counts(project.id))
+
+    @action(detail=True, methods=['get'], url_path='burndown')
+    def burndown(self, request, pk=None):
+        """Daily task counts for burndown and cumulative-flow charts.
+
+        `?from=YYYY-MM-DD&to=YYYY-MM-DD` (default: the last 30 days, at
+        most 366 days). Each day has `open`, `done`, `total` and
+        `by_status`, read from the snapshots `manage.py snapshot_projects`
+        writes.
+        """
+        project = self.get_object()
+        try:
+            end = datetime.date.fromisoformat(request.query_params.get('to') or timezone.localdate().isoformat())
+            start = request.query_params.get('from')
+            start = datetime.date.fromisoformat(start) if start else end - datetime.timedelta(days=29)
+        except ValueError:
+            return Response({'detail': 'from and to must be dates (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days >= snapshots.MAX_RANGE_DAYS:
+            return Response(
+                {'detail': f'from must not be after to, and the range may span at most {snapshots.MAX_RANGE_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({
+            'project': {'id': project.id, 'name': project.name},
+            'from': start,
+            'to': end,
+            'days': snapshots.burndown(project.id, start, end),
+        })
+
+    @action(detail=True, methods=['post'], url_path='clone')
+    @idempotent
+    def clone(self, request, pk=None):
+        """Copy the project and all its live tasks into a new project.
+
+        Body (all optional): `name`, `project_start_date` (shifts the end
+        date and task deadlines along), `clear_assignees`, `reset_status`
+        (every task in the first status). Subtasks, tags and dependencies
+        between the copied tasks are kept. Returns the new project.
+        """
+        source = self.get_object()
+        options = ProjectCloneSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        data = options.validated_data
+
+        status_id = None
+        if data['reset_status']:
+            status_ids = lookups.get_lookup(TaskStatus)
+            if not status_ids:
+                return Response({'detail': 'No task statuses are defined'}, status=status.HTTP_400_BAD_REQUEST)
+            status_id = min(status_ids)
+
+        project = cloning.clone_project(
+            source,
+            created_by=request.user,
+            name=data.get('name') or f'{source.name} (copy)'[:100],
+            start_date=data.get('project_start_date'),
+            clear_assignees=data['clear_assignees'],
+            status_id=status_id,
+            actor_id=request.user.id,
+        )
+        self.logger.info("Project id=%s cloned to id=%s by user id=%s", source.id, project.id, request.user.id)
+        context = dict(self.get_serializer_context(), include_tasks=False)
+        project = self.get_queryset().get(pk=project.pk)
+        return Response(ProjectSerializer(project, context=context).data, status=status.HTTP_201_CREATED)
+
     # Filtering, search, ordering
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['project_status']
@@ -0,0 +1,170 @@
+# apps/tasks/activity.py
+"""Task activity log: who changed what, written off the request path.
+
+`Task.save()` diffs the tracked fields against the values the instance
+was loaded with and leaves the result on `task.last_changes`. The views
+then call `record(task, action, actor_id)`, which queues a `TaskActivity`
+row once the surrounding transaction commits (a rolled-back write logs
+nothing) and returns without touching the database.
+
+Queued rows are kept in a per-process buffer and written with multi-row
+INSERTs: as soon as `TASK_ACTIVITY_BATCH_SIZE` rows are waiting, every
+`TASK_ACTIVITY_FLUSH_SECONDS` from a background thread, at interpreter
+exit, and before `/history/` is read. A failed flush puts the rows back
+and is retried; if the database stays unavailable and more than
+`TASK_ACTIVITY_MAX_PENDING` rows pile up, the oldest are logged at ERROR
+level with their full content (and counted in `dropped`) instead of
+vanishing.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import TaskActivity
+
+logger = logging.getLogger(__name__)
+
+ACTION_CREATED = 'created'
+ACTION_UPDATED = 'updated'
+ACTION_STATUS = 'status'
+ACTION_MOVED = 'moved'
+ACTION_DELETED = 'deleted'
+
+# Fields whose changes are recorded, by attribute name.
+TRACKED_FIELDS = (
+    'title', 'description', 'status_id', 'assignee_id', 'project_id', 'parent_id', 'deadline', 'rank', 'deleted_at',
+)
+
+
+def snapshot(task):
+    loaded = task.__dict__
+    return {name: loaded[name] for name in TRACKED_FIELDS if name in loaded}
+
+
+def diff(before, task):
+    """`{field: [old, new]}` for tracked fields that differ from `before`.
+
+    Without a snapshot (a new task) every non-empty field is reported
+    with `None` as its old value.
+    """
+    after = snapshot(task)
+    if before is None:
+        return {name: [None, value] for name, value in after.items() if value not in (None, '')}
+    return {
+        name: [before[name], value]
+        for name, value in after.items()
+        if name in before and before[name] != value
+    }
+
+
+class ActivityBuffer:
+    """Per-process queue of unsaved `TaskActivity` rows."""
+
+    def __init__(self, batch_size=None, flush_seconds=None, max_pending=None):
+        self.batch_size = batch_size or getattr(settings, 'TASK_ACTIVITY_BATCH_SIZE', 200)
+        self.flush_seconds = flush_seconds or getattr(settings, 'TASK_ACTIVITY_FLUSH_SECONDS', 2)
+        self.max_pending = max_pending or getattr(settings, 'TASK_ACTIVITY_MAX_PENDING', 10000)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._pid = None
+        self._wakeup = threading.Event()
+
+    def _ensure_flusher(self):
+        # Called with `_lock` held. A forked worker starts its own thread
+        # and does not inherit rows the parent still has to write.
+        if self._pid == os.getpid():
+            return
+        if self._pid is not None:
+            self._pending = []
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='task-activity-flusher', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            # The thread keeps its own connection; drop it if it went stale.
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Task activity flusher failed")
+
+    def add(self, row):
+        with self._lock:
+            self._ensure_flusher()
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write every queued row. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                # All or nothing, so a retry never duplicates rows.
+                with transaction.atomic():
+                    TaskActivity.objects.bulk_create(batch, batch_size=self.batch_size)
+            except Exception:
+                logger.exception("Failed to write %d task activity rows; will retry", len(batch))
+                self._requeue(batch)
+                return 0
+            return len(batch)
+
+    def _requeue(self, batch):
+        with self._lock:
+            self._pending[:0] = batch
+            overflow = len(self._pending) - self.max_pending
+            if overflow <= 0:
+                return
+            lost, self._pending = self._pending[:overflow], self._pending[overflow:]
+            self.dropped += len(lost)
+        for row in lost:
+            logger.error(
+                "Task activity row dropped after failed flushes",
+                extra={'activity': {
+                    'task_id': row.task_id, 'actor_id': row.actor_id, 'action': row.action,
+                    'changes': row.changes, 'created_at': row.created_at.isoformat(),
+                }},
+            )
+
+
+_buffer = ActivityBuffer()
+atexit.register(lambda: _buffer.flush())
+
+
+def record(task, action, actor_id=None, changes=None):
+    """Queue an activity row for `task`, to be written after commit."""
+    if changes is None:
+        changes = getattr(task, 'last_changes', None) or {}
+    if not changes and action in (ACTION_UPDATED, ACTION_MOVED):
+        return
+    row = TaskActivity(
+        task_id=task.id,
+        actor_id=actor_id,
+        action=action,
+        changes=json.loads(json.dumps(changes, cls=DjangoJSONEncoder)),
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: _buffer.add(row))
+
+
+def flush():
+    return _buffer.flush()
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tasks'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from backend import lookups
+        from apps.projects.models import ProjectMember
+        from . import events, sync
+        from .models import TaskStatus
+
+        post_save.connect(lookups.invalidate, sender=TaskStatus, dispatch_uid='lookups-taskstatus-save')
+        post_delete.connect(lookups.invalidate, sender=TaskStatus, dispatch_uid='lookups-taskstatus-delete')
+        post_delete.connect(sync.member_removed, sender=ProjectMember, dispatch_uid='sync-member-removed')
+        post_save.connect(events.membership_changed, sender=ProjectMember, dispatch_uid='events-membership-save')
+        post_delete.connect(events.membership_changed, sender=ProjectMember, dispatch_uid='events-membership-delete')
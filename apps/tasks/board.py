@@ -0,0 +1,79 @@
+# apps/tasks/board.py
+"""Kanban board: a project's tasks grouped into status columns.
+
+`board_columns(tasks, limit)` returns every live status as a column with
+its total and its first `limit` tasks from a single query: `ROW_NUMBER()`
+and `COUNT(*)` windows partitioned by `status_id`, filtered on the row
+number (Django wraps the windowed query in a subquery). Tasks are in
+`(rank, id)` order, the manual order set by `/api/tasks/<id>/move/`.
+Columns that have more tasks carry a `next_cursor`; `column_page()`
+continues one column from it with a keyset query, so extending a column
+never re-reads the tasks already shown.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from backend import lookups
+
+from .models import TaskStatus
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def encode_cursor(task):
+    raw = json.dumps([task.rank, task.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the cursor's `(rank, id)`. Raises `ValueError` on malformed input."""
+    try:
+        rank, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return str(rank), int(task_id)
+    except (TypeError, UnicodeDecodeError, json.JSONDecodeError, binascii.Error) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def _column(status_id, name):
+    return {'status': {'id': status_id, 'name': name}, 'total': 0, 'tasks': [], 'next_cursor': None}
+
+
+def board_columns(tasks, limit=DEFAULT_LIMIT):
+    """Group `tasks` (an already scoped queryset) into status columns."""
+    ranked = (
+        tasks.annotate(
+            column_row=Window(RowNumber(), partition_by=[F('status_id')], order_by=[F('rank').asc(), F('id').asc()]),
+            column_total=Window(Count('id'), partition_by=[F('status_id')]),
+        )
+        .filter(column_row__lte=limit)
+        .order_by('status_id', 'column_row')
+    )
+    columns = {pk: _column(pk, name) for pk, name in sorted(lookups.get_lookup(TaskStatus).items())}
+    for task in ranked:
+        column = columns.get(task.status_id)
+        if column is None:
+            # Tasks still sitting in a soft-deleted status.
+            column = columns[task.status_id] = _column(task.status_id, task.status.name)
+        column['total'] = task.column_total
+        column['tasks'].append(task)
+    for column in columns.values():
+        if column['total'] > len(column['tasks']):
+            column['next_cursor'] = encode_cursor(column['tasks'][-1])
+    return list(columns.values())
+
+
+def column_page(tasks, status_id, cursor=None, limit=DEFAULT_LIMIT):
+    """Return `(tasks, next_cursor)` for one column after `cursor`."""
+    qs = tasks.filter(status_id=status_id)
+    if cursor:
+        rank, task_id = decode_cursor(cursor)
+        qs = qs.filter(Q(rank__gt=rank) | Q(rank=rank, id__gt=task_id))
+    rows = list(qs.order_by('rank', 'id')[:limit + 1])
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
@@ -0,0 +1,125 @@
+# apps/tasks/cloning.py
+"""Copy a project and all of its live tasks in one transaction.
+
+Used to stamp out template projects with thousands of tasks. Tasks are
+read with one query and written with chunked multi-row INSERTs
+(`bulk_create()`, `BATCH_SIZE` rows each), bypassing `Task.save()`; what
+`save()` would do per row is done once for the whole set instead:
+subtask links are remapped with one `bulk_update()`, closure rows come
+from `hierarchy.insert_tasks()`, tag links and "blocked by" dependencies
+between copied tasks are copied with `bulk_create()`, and counters are
+adjusted with a single `counters.apply_transitions()` call. Each copy gets
+one `created` activity entry naming its source task; no task events are
+published.
+
+Backends that do not return ids from multi-row INSERTs (MySQL) get them
+by reading the new project's task ids back in order: the project is new
+and invisible to other transactions, and auto-increment ids follow
+insertion order.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.projects.models import Project
+
+from . import activity, counters, hierarchy, ranking
+from .models import Task, TaskDependency, TaskTag
+
+BATCH_SIZE = 500
+
+_COPIED_FIELDS = ('id', 'title', 'description', 'deadline', 'rank', 'parent_id', 'status_id', 'assignee_id')
+
+
+def _assign_ids(copies, project_id):
+    if all(copy.pk is not None for copy in copies):
+        return
+    ids = list(Task.objects.filter(project_id=project_id).order_by('id').values_list('id', flat=True))
+    if len(ids) != len(copies):
+        raise RuntimeError(f'Expected {len(copies)} cloned tasks in project {project_id}, found {len(ids)}')
+    for copy, pk in zip(copies, ids):
+        copy.pk = pk
+        copy._state.adding = False
+
+
+def clone_project(source, created_by, name=None, start_date=None, clear_assignees=False, status_id=None, actor_id=None):
+    """Copy `source` and its live tasks into a new project and return it.
+
+    `start_date` moves the copy's `project_start_date` there and shifts its
+    end date and every task deadline by the same amount. `clear_assignees`
+    leaves the copied tasks unassigned; `status_id` puts them all in that
+    status, keeping their relative order.
+    """
+    now = timezone.now()
+    shift = start_date - source.project_start_date if start_date is not None else None
+
+    with transaction.atomic():
+        project = Project.objects.create(
+            name=name or source.name,
+            description=source.description,
+            project_start_date=start_date or source.project_start_date,
+            project_end_date=source.project_end_date + shift if shift else source.project_end_date,
+            project_status_id=source.project_status_id,
+            created_by=created_by,
+            created_at=now,
+            modified_at=now,
+        )
+
+        rows = list(
+            Task.objects.filter(project=source, deleted_at__isnull=True)
+            .order_by('id').values(*_COPIED_FIELDS)
+        )
+        ranks = [row['rank'] for row in rows]
+        if status_id is not None:
+            # One column now: interleave the old columns in board order.
+            order = sorted(range(len(rows)), key=lambda i: (rows[i]['status_id'], rows[i]['rank'], rows[i]['id']))
+            for i, key in zip(order, ranking.spread_keys(len(rows))):
+                ranks[i] = key
+
+        copies = [
+            Task(
+                title=row['title'],
+                description=row['description'],
+                deadline=row['deadline'] + shift if shift and row['deadline'] else row['deadline'],
+                rank=rank,
+                status_id=status_id or row['status_id'],
+                assignee_id=None if clear_assignees else row['assignee_id'],
+                project=project,
+                version=1,
+                created_at=now,
+                modified_at=now,
+            )
+            for row, rank in zip(rows, ranks)
+        ]
+        Task.objects.bulk_create(copies, batch_size=BATCH_SIZE)
+        _assign_ids(copies, project.pk)
+        id_map = {row['id']: copy.pk for row, copy in zip(rows, copies)}
+
+        # Subtasks of deleted tasks become roots, as they are on the board.
+        children = []
+        for row, copy in zip(rows, copies):
+            if row['parent_id'] in id_map:
+                copy.parent_id = id_map[row['parent_id']]
+                children.append(copy)
+        Task.objects.bulk_update(children, ['parent'], batch_size=BATCH_SIZE)
+        hierarchy.insert_tasks(copies)
+
+        tag_links = TaskTag.objects.filter(task__project=source).values_list('task_id', 'tag_id')
+        TaskTag.objects.bulk_create(
+            [TaskTag(task_id=id_map[task_id], tag_id=tag_id) for task_id, tag_id in tag_links if task_id in id_map],
+            batch_size=BATCH_SIZE,
+        )
+        # Only dependencies between two copied tasks are kept.
+        links = TaskDependency.objects.filter(task__project=source).values_list('task_id', 'blocked_by_id')
+        TaskDependency.objects.bulk_create(
+            [
+                TaskDependency(task_id=id_map[task_id], blocked_by_id=id_map[blocked_by_id], created_at=now)
+                for task_id, blocked_by_id in links
+                if task_id in id_map and blocked_by_id in id_map
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        counters.apply_transitions([(None, counters.state_of(copy)) for copy in copies])
+        for row, copy in zip(rows, copies):
+            activity.record(copy, activity.ACTION_CREATED, actor_id, {'cloned_from': [None, row['id']]})
+    return project
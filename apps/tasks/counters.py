@@ -0,0 +1,339 @@
+# apps/tasks/counters.py
+"""Incrementally maintained task counters.
+
+Per assignee (`AssigneeWorkload`) and per project (`Project.task_count`,
+`open_task_count` and `ProjectStatusCount` rows per status).
+
+`Task.save()` (and therefore `Task.delete()`, the viewsets and anything
+else that saves tasks one by one) computes the task's counted state
+before and after the write and calls `apply_transition()` in the same
+transaction. Counters are changed with `F()` expressions, so concurrent
+writers never overwrite each other's increments. Code that writes tasks
+in bulk (`QuerySet.update()`, `bulk_create()`) must report its changes
+through `apply_transitions()`.
+
+`rebuild_workload()`/`rebuild_projects()` recompute everything with one
+GROUP BY each, and `refresh_overdue()` refreshes the clock-dependent
+overdue counts; they back `manage.py reconcile_counters`.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from backend import lookups
+
+from apps.projects.models import Project
+
+from .models import TERMINAL_STATUS_NAMES, AssigneeWorkload, ProjectStatusCount, Task, TaskStatus
+
+TaskState = namedtuple('TaskState', 'assignee_id project_id status_id deadline live')
+
+_STATE_FIELDS = ('assignee_id', 'project_id', 'status_id', 'deadline', 'deleted_at')
+
+
+def terminal_status_ids():
+    return set(lookups.ids_by_name(TaskStatus, TERMINAL_STATUS_NAMES))
+
+
+def state_from(values):
+    """The state from a `{attname: value}` mapping, or `None` if it lacks a field."""
+    if not all(name in values for name in _STATE_FIELDS):
+        return None
+    return TaskState(
+        values['assignee_id'], values['project_id'], values['status_id'], values['deadline'],
+        values['deleted_at'] is None,
+    )
+
+
+def state_of(task):
+    return TaskState(task.assignee_id, task.project_id, task.status_id, task.deadline, task.deleted_at is None)
+
+
+def load_state(task_id):
+    row = Task.objects.filter(pk=task_id).values_list(*_STATE_FIELDS).first()
+    if row is None:
+        return None
+    assignee_id, project_id, status_id, deadline, deleted_at = row
+    return TaskState(assignee_id, project_id, status_id, deadline, deleted_at is None)
+
+
+def _open_deadlines(terminal):
+    return (
+        Task.objects.filter(deleted_at__isnull=True, deadline__isnull=False)
+        .exclude(status_id__in=terminal)
+    )
+
+
+def _ensure_workload_rows(user_ids):
+    AssigneeWorkload.objects.bulk_create(
+        [AssigneeWorkload(user_id=user_id) for user_id in user_ids], ignore_conflicts=True,
+    )
+
+
+def _update_workload(user_id, values):
+    if not AssigneeWorkload.objects.filter(user_id=user_id).update(**values):
+        _ensure_workload_rows([user_id])
+        AssigneeWorkload.objects.filter(user_id=user_id).update(**values)
+
+
+def apply_transition(old, new):
+    """Adjust counters for a task going from state `old` to `new`.
+
+    Either state may be `None` (task did not exist / no longer counted).
+    """
+    if old != new:
+        apply_transitions([(old, new)])
+
+
+def apply_transitions(transitions):
+    """Apply many `(old, new)` transitions with one UPDATE per touched row."""
+    terminal = terminal_status_ids()
+    now = timezone.now()
+    workload = {}
+    projects = {}
+    status_counts = {}
+
+    for old, new in transitions:
+        if old == new:
+            continue
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None or not state.live:
+                continue
+            is_open = state.status_id not in terminal
+
+            project = projects.setdefault(state.project_id, {'total': 0, 'open': 0})
+            project['total'] += sign
+            project['open'] += sign if is_open else 0
+            key = (state.project_id, state.status_id)
+            status_counts[key] = status_counts.get(key, 0) + sign
+
+            if state.assignee_id is None:
+                continue
+            entry = workload.setdefault(state.assignee_id, {'open': 0, 'done': 0, 'deadline': None})
+            entry['open' if is_open else 'done'] += sign
+            if is_open and state.deadline is not None:
+                # An added open deadline can only lower the minimum; removing
+                # one may raise it, which needs a recompute.
+                if sign < 0 or entry['deadline'] == 'recompute':
+                    entry['deadline'] = 'recompute'
+                elif entry['deadline'] is None or state.deadline < entry['deadline']:
+                    entry['deadline'] = state.deadline
+
+    for user_id, entry in workload.items():
+        values = {}
+        if entry['open']:
+            values['open_count'] = F('open_count') + entry['open']
+        if entry['done']:
+            values['done_count'] = F('done_count') + entry['done']
+        if entry['deadline'] == 'recompute':
+            values['next_deadline'] = Subquery(
+                _open_deadlines(terminal).filter(assignee_id=user_id)
+                .order_by('deadline').values('deadline')[:1]
+            )
+        elif entry['deadline'] is not None:
+            values['next_deadline'] = Least(Coalesce(F('next_deadline'), Value(entry['deadline'])), Value(entry['deadline']))
+        if values:
+            _update_workload(user_id, values)
+
+    for project_id, entry in projects.items():
+        values = {}
+        if entry['total']:
+            values['task_count'] = F('task_count') + entry['total']
+        if entry['open']:
+            values['open_task_count'] = F('open_task_count') + entry['open']
+        if values:
+            Project.objects.filter(pk=project_id).update(**values)
+
+    for (project_id, status_id), delta in status_counts.items():
+        if not delta:
+            continue
+        rows = ProjectStatusCount.objects.filter(project_id=project_id, status_id=status_id)
+        if not rows.update(count=F('count') + delta, modified_at=now):
+            ProjectStatusCount.objects.bulk_create(
+                [ProjectStatusCount(project_id=project_id, status_id=status_id)], ignore_conflicts=True,
+            )
+            rows.update(count=F('count') + delta, modified_at=now)
+
+
+def _workload_totals(terminal, now):
+    open_q = ~Q(status_id__in=terminal)
+    return (
+        Task.objects.filter(deleted_at__isnull=True, assignee__isnull=False)
+        .values('assignee_id')
+        .annotate(
+            open=Count('id', filter=open_q),
+            done=Count('id', filter=Q(status_id__in=terminal)),
+            overdue=Count('id', filter=open_q & Q(deadline__lt=now)),
+            next_deadline=Min('deadline', filter=open_q),
+        )
+        .order_by()
+    )
+
+
+def workload_drift(now=None):
+    """Return `{user_id: (stored, actual)}` for rows whose counters are off."""
+    now = now or timezone.now()
+    terminal = terminal_status_ids()
+    actual = {
+        row['assignee_id']: (row['open'], row['done'], row['next_deadline'])
+        for row in _workload_totals(terminal, now)
+    }
+    stored = {
+        user_id: (open_count, done_count, next_deadline)
+        for user_id, open_count, done_count, next_deadline in AssigneeWorkload.objects.values_list(
+            'user_id', 'open_count', 'done_count', 'next_deadline',
+        )
+    }
+    drift = {}
+    for user_id in actual.keys() | stored.keys():
+        have = stored.get(user_id, (0, 0, None))
+        want = actual.get(user_id, (0, 0, None))
+        if have != want:
+            drift[user_id] = (have, want)
+    return drift
+
+
+def rebuild_workload(now=None):
+    """Recompute every workload row with one GROUP BY. Returns rows written."""
+    now = now or timezone.now()
+    terminal = terminal_status_ids()
+    with transaction.atomic():
+        # Lock existing rows first: task writes that start meanwhile wait
+        # and then apply their increments on top of the rebuilt values.
+        list(AssigneeWorkload.objects.select_for_update().values_list('pk', flat=True))
+        rows = [
+            AssigneeWorkload(
+                user_id=row['assignee_id'], open_count=row['open'], done_count=row['done'],
+                overdue_count=row['overdue'], next_deadline=row['next_deadline'], overdue_as_of=now,
+            )
+            for row in _workload_totals(terminal, now)
+        ]
+        AssigneeWorkload.objects.update(
+            open_count=0, done_count=0, overdue_count=0, next_deadline=None, overdue_as_of=now,
+        )
+        options = {
+            'update_conflicts': True,
+            'update_fields': ['open_count', 'done_count', 'overdue_count', 'next_deadline', 'overdue_as_of'],
+        }
+        if connection.features.supports_update_conflicts_with_target:
+            options['unique_fields'] = ['user']
+        AssigneeWorkload.objects.bulk_create(rows, batch_size=500, **options)
+    return len(rows)
+
+
+def _project_totals(terminal, now):
+    open_q = ~Q(status_id__in=terminal)
+    return (
+        Task.objects.filter(deleted_at__isnull=True)
+        .values('project_id')
+        .annotate(
+            total=Count('id'),
+            open=Count('id', filter=open_q),
+            overdue=Count('id', filter=open_q & Q(deadline__lt=now)),
+        )
+        .order_by()
+    )
+
+
+def _status_totals():
+    return (
+        Task.objects.filter(deleted_at__isnull=True)
+        .values('project_id', 'status_id').annotate(n=Count('id')).order_by()
+    )
+
+
+def project_drift(now=None):
+    """Return `{project_id: (stored, actual)}` for projects whose counters are off.
+
+    Each side is `(task_count, open_task_count, {status_id: count})`.
+    """
+    now = now or timezone.now()
+    terminal = terminal_status_ids()
+    by_status = {}
+    for row in _status_totals():
+        by_status.setdefault(row['project_id'], {})[row['status_id']] = row['n']
+    actual = {
+        row['project_id']: (row['total'], row['open'], by_status.get(row['project_id'], {}))
+        for row in _project_totals(terminal, now)
+    }
+    stored_status = {}
+    for project_id, status_id, count in ProjectStatusCount.objects.exclude(count=0).values_list(
+        'project_id', 'status_id', 'count',
+    ):
+        stored_status.setdefault(project_id, {})[status_id] = count
+    stored = {
+        project_id: (total, open_count, stored_status.get(project_id, {}))
+        for project_id, total, open_count in Project.objects.values_list('id', 'task_count', 'open_task_count')
+    }
+    drift = {}
+    for project_id in actual.keys() | stored.keys():
+        have = stored.get(project_id, (0, 0, {}))
+        want = actual.get(project_id, (0, 0, {}))
+        if have != want:
+            drift[project_id] = (have, want)
+    return drift
+
+
+def rebuild_projects(now=None):
+    """Recompute project counters and per-status counts. Returns projects with tasks."""
+    now = now or timezone.now()
+    terminal = terminal_status_ids()
+    with transaction.atomic():
+        # Same locking as `rebuild_workload`.
+        list(Project.objects.select_for_update().values_list('pk', flat=True))
+        list(ProjectStatusCount.objects.select_for_update().values_list('pk', flat=True))
+        totals = list(_project_totals(terminal, now))
+        statuses = list(_status_totals())
+
+        Project.objects.update(task_count=0, open_task_count=0, overdue_task_count=0, overdue_as_of=now)
+        Project.objects.bulk_update(
+            [
+                Project(id=row['project_id'], task_count=row['total'], open_task_count=row['open'],
+                        overdue_task_count=row['overdue'])
+                for row in totals
+            ],
+            ['task_count', 'open_task_count', 'overdue_task_count'], batch_size=500,
+        )
+        # Rows are zeroed rather than deleted so projects that lost all
+        # their tasks still show up as changed to the snapshot job.
+        ProjectStatusCount.objects.update(count=0, modified_at=now)
+        options = {'update_conflicts': True, 'update_fields': ['count', 'modified_at']}
+        if connection.features.supports_update_conflicts_with_target:
+            options['unique_fields'] = ['project', 'status']
+        ProjectStatusCount.objects.bulk_create(
+            [ProjectStatusCount(project_id=row['project_id'], status_id=row['status_id'], count=row['n'], modified_at=now)
+             for row in statuses],
+            batch_size=500, **options,
+        )
+    return len(totals)
+
+
+def refresh_overdue(now=None):
+    """Recount overdue open tasks per assignee and per project as of `now`."""
+    now = now or timezone.now()
+    terminal = terminal_status_ids()
+    overdue = _open_deadlines(terminal).filter(deadline__lt=now)
+    counts = dict(
+        overdue.filter(assignee__isnull=False)
+        .values('assignee_id').annotate(n=Count('id')).order_by()
+        .values_list('assignee_id', 'n')
+    )
+    project_counts = dict(
+        overdue.values('project_id').annotate(n=Count('id')).order_by().values_list('project_id', 'n')
+    )
+    with transaction.atomic():
+        _ensure_workload_rows(counts)
+        AssigneeWorkload.objects.update(overdue_count=0, overdue_as_of=now)
+        AssigneeWorkload.objects.bulk_update(
+            [AssigneeWorkload(user_id=user_id, overdue_count=n) for user_id, n in counts.items()],
+            ['overdue_count'], batch_size=500,
+        )
+        Project.objects.update(overdue_task_count=0, overdue_as_of=now)
+        Project.objects.bulk_update(
+            [Project(id=project_id, overdue_task_count=n) for project_id, n in project_counts.items()],
+            ['overdue_task_count'], batch_size=500,
+        )
+    return len(counts), len(project_counts)
@@ -0,0 +1,211 @@
+# apps/tasks/events.py
+"""In-process pub/sub for task change events.
+
+`TaskViewSet` publishes an event after each committed write and the SSE
+endpoint (`apps.tasks.sse`) subscribes to them. The broker is pluggable
+through `settings.TASK_EVENTS_BROKER`:
+
+- `InMemoryBroker` (default) fans events out to subscribers in this
+  process only.
+- `RedisBroker` relays events through a Redis channel so subscribers on
+  every worker see writes made by any worker. Requires the `redis`
+  package and `TASK_EVENTS_REDIS_URL`.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+EVENT_CREATED = 'created'
+EVENT_UPDATED = 'updated'
+EVENT_STATUS = 'status'
+EVENT_DELETED = 'deleted'
+# Not a task event: the user's project memberships changed.
+EVENT_MEMBERSHIP = 'membership'
+
+
+class Subscription:
+    """A subscriber's queue, bound to the event loop that reads it.
+
+    Publishing happens on request threads, so events are handed to the
+    loop with `call_soon_threadsafe`. A subscriber that falls more than
+    `maxsize` events behind is marked overflowed and should be closed;
+    the client then resyncs through `/api/tasks/changes/`.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Wake the reader so it notices the overflow.
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop already closed; the subscriber is going away.
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InMemoryBroker:
+    """Fan events out to subscribers in the current process."""
+
+    def __init__(self, queue_size=100, **options):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        self._fan_out(event)
+
+    def _fan_out(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.deliver(event)
+
+    def subscribe(self):
+        """Register a subscriber on the running event loop."""
+        sub = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+
+class RedisBroker(InMemoryBroker):
+    """Relay events between workers through a Redis pub/sub channel.
+
+    Each process keeps a single Redis subscription (started with the first
+    local subscriber) and fans incoming events out in memory, so idle SSE
+    connections cost no Redis connections of their own.
+    """
+
+    def __init__(self, url=None, channel='tasker:task-events', **options):
+        super().__init__(**options)
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImproperlyConfigured('RedisBroker requires the `redis` package.') from exc
+        self.url = url or getattr(settings, 'TASK_EVENTS_REDIS_URL', '')
+        if not self.url:
+            raise ImproperlyConfigured('Set TASK_EVENTS_REDIS_URL to use RedisBroker.')
+        self.channel = channel
+        self._client = redis.Redis.from_url(self.url)
+        self._listener = None
+
+    def publish(self, event):
+        self._client.publish(self.channel, json.dumps(event, cls=DjangoJSONEncoder))
+
+    def subscribe(self):
+        sub = super().subscribe()
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return sub
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get('type') != 'message':
+                    continue
+                try:
+                    self._fan_out(json.loads(message['data']))
+                except ValueError:
+                    logger.warning("Dropping malformed task event from Redis")
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(getattr(settings, 'TASK_EVENTS_BROKER', 'apps.tasks.events.InMemoryBroker'))
+                _broker = broker_class(**getattr(settings, 'TASK_EVENTS_BROKER_OPTIONS', {}))
+    return _broker
+
+
+def build_task_event(kind, task, data=None, previous_assignee_id=None):
+    """Build the event payload for a task write.
+
+    `audience` lists the user ids (besides admins/managers) allowed to see
+    the event: the current assignee and, on reassignment, the previous one
+    so their view can drop the task.
+    """
+    audience = {task.assignee_id, previous_assignee_id} - {None}
+    return {
+        'type': kind,
+        'task_id': task.id,
+        'project_id': task.project_id,
+        'audience': sorted(audience),
+        'modified_at': task.modified_at,
+        'task': data,
+    }
+
+
+def publish_task_event(kind, task, data=None, previous_assignee_id=None):
+    """Publish a task event once the current transaction commits."""
+    event = json.loads(json.dumps(
+        build_task_event(kind, task, data, previous_assignee_id), cls=DjangoJSONEncoder
+    ))
+
+    def _publish():
+        try:
+            get_broker().publish(event)
+        except Exception:
+            logger.exception("Failed to publish %s event for task id=%s", kind, task.id)
+
+    transaction.on_commit(_publish)
+
+
+def publish_membership_event(user_id, project_id):
+    """Tell `user_id`'s open streams, after commit, to reload their projects."""
+    event = {'type': EVENT_MEMBERSHIP, 'user_id': user_id, 'project_id': project_id}
+
+    def _publish():
+        try:
+            get_broker().publish(event)
+        except Exception:
+            logger.exception("Failed to publish membership event for user id=%s", user_id)
+
+    transaction.on_commit(_publish)
+
+
+def membership_changed(sender, instance, **kwargs):
+    """Signal receiver for saved and deleted `ProjectMember` rows."""
+    publish_membership_event(instance.user_id, instance.project_id)
@@ -0,0 +1,203 @@
+# apps/tasks/hierarchy.py
+"""Subtasks (closure table) and "blocked by" dependencies.
+
+The subtask tree lives in `Task.parent` and, for queries, in
+`TaskClosure`: one row per (ancestor, descendant) pair, including each
+task with itself at depth 0. All descendants, all ancestors and the
+"would this create a cycle" check are then single indexed lookups.
+`Task.save()` keeps the table current: `insert_tasks()` adds the rows of
+new tasks (in bulk, for code that uses `bulk_create()`), and `move()`
+re-links a whole subtree when a task gets a new parent, with two set-based
+statements.
+
+Dependencies form a graph rather than a tree. `creates_cycle()` walks it
+with one recursive CTE; `blocked_exists()` is the `EXISTS` subquery
+behind `is_blocked` (a live blocker not in a terminal status).
+
+`move()` and `add_dependency()` check for cycles with the rows involved
+locked (`SELECT ... FOR UPDATE`): the task, plus every task above the new
+parent or down the new blocker's chain. Two writes that could only make a
+cycle together share at least one of those rows, so the second waits for
+the first and checks against its result.
+"""
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Prefetch
+from django.utils import timezone
+
+from backend import lookups
+
+from .models import TERMINAL_STATUS_NAMES, Task, TaskClosure, TaskDependency, TaskStatus, TaskTag
+
+
+class HierarchyError(ValueError):
+    """The change would put a task inside its own subtree or dependency chain."""
+
+
+def parent_changed(task, original=None):
+    """Has `task.parent_id` changed from `original` (as loaded), or from the database?"""
+    if original is not None and 'parent_id' in original:
+        return original['parent_id'] != task.parent_id
+    current = Task.objects.filter(pk=task.pk).values_list('parent_id', flat=True).first()
+    return current != task.parent_id
+
+
+def is_descendant(task_id, ancestor_id):
+    """True if `task_id` is `ancestor_id` or somewhere below it."""
+    return TaskClosure.objects.filter(ancestor_id=ancestor_id, descendant_id=task_id).exists()
+
+
+def insert_tasks(tasks):
+    """Add closure rows for newly inserted `tasks`.
+
+    Parents may be existing tasks or other tasks in `tasks`, in any order.
+    Existing parents' paths are read with one query and all rows are
+    written with `bulk_create()`.
+    """
+    tasks = list(tasks)
+    batch = {task.pk: task for task in tasks}
+    outside = {task.parent_id for task in tasks if task.parent_id and task.parent_id not in batch}
+    paths = {}
+    for ancestor_id, descendant_id, depth in TaskClosure.objects.filter(descendant_id__in=outside).values_list(
+        'ancestor_id', 'descendant_id', 'depth',
+    ):
+        paths.setdefault(descendant_id, []).append((ancestor_id, depth))
+
+    rows = []
+    pending = tasks
+    while pending:
+        waiting = []
+        for task in pending:
+            if task.parent_id and task.parent_id not in paths:
+                if task.parent_id not in batch:
+                    raise HierarchyError(f'Parent {task.parent_id} of task {task.pk} has no closure rows')
+                waiting.append(task)
+                continue
+            path = [(task.pk, 0)] + [(a, depth + 1) for a, depth in paths.get(task.parent_id, ())]
+            paths[task.pk] = path
+            rows.extend(TaskClosure(ancestor_id=a, descendant_id=task.pk, depth=depth) for a, depth in path)
+        if len(waiting) == len(pending):
+            raise HierarchyError('Subtask parents form a cycle')
+        pending = waiting
+    TaskClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+def _lock_tasks(task_ids):
+    """Lock the task rows in id order, so concurrent callers cannot deadlock."""
+    list(Task.objects.select_for_update().filter(pk__in=task_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def move(task):
+    """Re-link `task` and its subtree under `task.parent_id` (or make it a root).
+
+    Must run inside a transaction; `Task.save()` provides one.
+    """
+    if task.parent_id is not None:
+        path = TaskClosure.objects.filter(descendant_id=task.parent_id).values_list('ancestor_id', flat=True)
+        _lock_tasks({task.pk, task.parent_id, *path})
+        if is_descendant(task.parent_id, task.pk):
+            raise HierarchyError('A task cannot be moved under itself or one of its subtasks')
+    subtree = list(TaskClosure.objects.filter(ancestor_id=task.pk).values_list('descendant_id', 'depth'))
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+    # Drop the paths from the old ancestors into the subtree...
+    TaskClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+    if task.parent_id is None:
+        return
+    # ...and add one from every new ancestor to every subtree node.
+    ancestors = TaskClosure.objects.filter(descendant_id=task.parent_id).values_list('ancestor_id', 'depth')
+    TaskClosure.objects.bulk_create(
+        [
+            TaskClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in ancestors
+            for descendant_id, down in subtree
+        ],
+        batch_size=1000,
+    )
+
+
+def descendants(task_id, max_depth=None):
+    """Live tasks below `task_id`, annotated with `depth` (1 = children)."""
+    # One filter() call, so every condition applies to the same closure row.
+    conditions = {'closure_ancestors__ancestor_id': task_id, 'closure_ancestors__depth__gt': 0}
+    if max_depth is not None:
+        conditions['closure_ancestors__depth__lte'] = max_depth
+    return Task.objects.filter(deleted_at__isnull=True, **conditions).annotate(depth=F('closure_ancestors__depth'))
+
+
+def ancestors(task_id):
+    """Tasks above `task_id`, annotated with `depth` (1 = parent)."""
+    return Task.objects.filter(
+        closure_descendants__descendant_id=task_id, closure_descendants__depth__gt=0,
+    ).annotate(depth=F('closure_descendants__depth'))
+
+
+_CHAIN_SQL = """
+    WITH RECURSIVE chain (id) AS (
+        SELECT blocked_by_id FROM tbl_task_dependencies WHERE task_id = %s
+        UNION
+        SELECT d.blocked_by_id FROM tbl_task_dependencies d JOIN chain c ON d.task_id = c.id
+    )
+    SELECT 1 FROM chain WHERE id = %s LIMIT 1
+"""
+
+
+_BLOCKERS_SQL = """
+    WITH RECURSIVE chain (id) AS (
+        SELECT %s
+        UNION
+        SELECT d.blocked_by_id FROM tbl_task_dependencies d JOIN chain c ON d.task_id = c.id
+    )
+    SELECT id FROM chain
+"""
+
+
+def creates_cycle(task_id, blocked_by_id):
+    """Would "`task_id` is blocked by `blocked_by_id`" close a cycle?"""
+    if task_id == blocked_by_id:
+        return True
+    with connection.cursor() as cursor:
+        # Is the new blocker (transitively) blocked by the task already?
+        cursor.execute(_CHAIN_SQL, [blocked_by_id, task_id])
+        return cursor.fetchone() is not None
+
+
+def add_dependency(task, blocked_by):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # The new blocker and everything it is (transitively) blocked by.
+            cursor.execute(_BLOCKERS_SQL, [blocked_by.pk])
+            chain = {row[0] for row in cursor.fetchall()}
+        _lock_tasks(chain | {task.pk})
+        if creates_cycle(task.pk, blocked_by.pk):
+            raise HierarchyError('This dependency would create a cycle')
+        return TaskDependency.objects.get_or_create(
+            task=task, blocked_by=blocked_by, defaults={'created_at': timezone.now()},
+        )
+
+
+def blocked_exists(outer_ref='pk'):
+    terminal = lookups.ids_by_name(TaskStatus, TERMINAL_STATUS_NAMES)
+    return Exists(
+        TaskDependency.objects.filter(task_id=OuterRef(outer_ref), blocked_by__deleted_at__isnull=True)
+        .exclude(blocked_by__status_id__in=terminal)
+    )
+
+
+def with_relations(qs):
+    """Annotate `is_blocked` and prefetch what `TaskSerializer` reads per task.
+
+    Blocker ids, and tag links with their tags.
+    """
+    return qs.annotate(is_blocked=blocked_exists()).prefetch_related(
+        Prefetch('blocker_links', queryset=TaskDependency.objects.only('id', 'task_id', 'blocked_by_id')),
+        Prefetch(
+            'tag_links',
+            queryset=TaskTag.objects.select_related('tag').only('id', 'task_id', 'tag__name', 'tag__deleted_at'),
+        ),
+    )
+
+
+def is_blocked(task):
+    annotated = getattr(task, 'is_blocked', None)
+    if annotated is not None:
+        return bool(annotated)
+    return Task.objects.filter(pk=task.pk).filter(blocked_exists()).exists()
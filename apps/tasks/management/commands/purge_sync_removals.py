@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks import sync
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete delta-sync removal records older than "
+        "TASK_SYNC_REMOVAL_RETENTION_DAYS. Run it daily; cursors older than "
+        "the retention period are rejected by /api/tasks/changes/ and must "
+        "resync from scratch."
+    )
+
+    def handle(self, *args, **options):
+        deleted = sync.purge()
+        self.stdout.write(f"Deleted {deleted} removal records")
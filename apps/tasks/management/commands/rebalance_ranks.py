@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.tasks import ranking
+
+
+class Command(BaseCommand):
+    help = (
+        "Respread the rank keys of board columns whose keys grew longer than "
+        "--max-length (or that contain duplicate keys). Run it from cron, e.g. "
+        "nightly; each column is rewritten in its own short transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-length', type=int, default=getattr(settings, 'TASK_RANK_MAX_LENGTH', 16),
+            help='Rebalance columns with keys longer than this (default: TASK_RANK_MAX_LENGTH or 16).',
+        )
+        parser.add_argument('--project', type=int, help='Only this project id.')
+        parser.add_argument('--check', action='store_true', help='Only list the columns; change nothing.')
+
+    def handle(self, *args, **options):
+        columns = ranking.columns_to_rebalance(options['max_length'], options['project'])
+        for project_id, status_id in columns:
+            if options['check']:
+                self.stdout.write(f"project={project_id} status={status_id} needs rebalancing")
+                continue
+            count = ranking.rebalance_column(project_id, status_id)
+            self.stdout.write(f"project={project_id} status={status_id}: rebalanced {count} tasks")
+        self.stdout.write(f"{len(columns)} columns {'need rebalancing' if options['check'] else 'rebalanced'}")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks import counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Check or rebuild the maintained task counters (assignee workload and "
+        "project task counts). Run with --overdue from cron every few minutes "
+        "to refresh the clock-dependent overdue counts; run a full rebuild to "
+        "repair drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift; change nothing.')
+        parser.add_argument('--overdue', action='store_true', help='Only refresh overdue counts.')
+
+    def handle(self, *args, **options):
+        if options['overdue']:
+            users, projects = counters.refresh_overdue()
+            self.stdout.write(f"Refreshed overdue counts ({users} assignees, {projects} projects with overdue tasks)")
+            return
+
+        workload_drift = counters.workload_drift()
+        for user_id, (have, want) in sorted(workload_drift.items()):
+            self.stdout.write(f"workload user={user_id}: stored={have} actual={want}")
+        project_drift = counters.project_drift()
+        for project_id, (have, want) in sorted(project_drift.items()):
+            self.stdout.write(f"project id={project_id}: stored={have} actual={want}")
+        if options['check']:
+            self.stdout.write(f"{len(workload_drift)} workload rows and {len(project_drift)} projects drifted")
+            return
+
+        users = counters.rebuild_workload()
+        projects = counters.rebuild_projects()
+        self.stdout.write(
+            f"Rebuilt {users} workload rows ({len(workload_drift)} had drifted) and "
+            f"{projects} project counters ({len(project_drift)} had drifted)"
+        )
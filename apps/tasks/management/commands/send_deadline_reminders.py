@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.tasks import reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Email assignees about tasks crossing the deadline reminder thresholds "
+        "(settings.TASK_REMINDER_THRESHOLDS). Run once from cron, or with "
+        "--loop as a long-running worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping every --interval seconds.')
+        parser.add_argument('--interval', type=int, default=None, help='Seconds between sweeps in --loop mode.')
+        parser.add_argument('--batch-size', type=int, default=None, help='Tasks per query and per email batch.')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or getattr(settings, 'TASK_REMINDER_INTERVAL_SECONDS', 60)
+        while True:
+            sent = reminders.sweep(batch_size=options['batch_size'])
+            pruned = reminders.prune()
+            self.stdout.write(f"Sent {sent} reminders, pruned {pruned} stale reminder rows")
+            if not options['loop']:
+                return
+            # Don't hold a DB connection open while sleeping.
+            close_old_connections()
+            time.sleep(interval)
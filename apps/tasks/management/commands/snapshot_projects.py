@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Record today's per-status task counts of every project whose tasks "
+        "changed since the previous run (the data behind /burndown/). Run it "
+        "nightly, shortly before midnight, and on demand; reruns on the same "
+        "day overwrite that day's rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Snapshot every project, changed or not.')
+
+    def handle(self, *args, **options):
+        written = snapshots.take_snapshots(full=options['full'])
+        self.stdout.write(f"Snapshotted {written} projects")
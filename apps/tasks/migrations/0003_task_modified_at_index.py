@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:16
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Now
+
+
+def backfill_modified_at(apps, schema_editor):
+    # Rows written before `Task.save()` maintained `modified_at` would be
+    # invisible to the delta-sync cursor, so give them a starting value.
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(modified_at__isnull=True).update(
+        modified_at=Coalesce('deleted_at', 'created_at', Now())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_seed_project_statuses'),
+        ('tasks', '0002_seed_task_statuses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['modified_at', 'id'], name='tbl_tasks_modified_id_idx'),
+        ),
+        migrations.RunPython(backfill_modified_at, migrations.RunPython.noop),
+    ]
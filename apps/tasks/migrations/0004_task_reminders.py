@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_seed_project_statuses'),
+        ('tasks', '0003_task_modified_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskReminder',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('threshold_minutes', models.PositiveIntegerField()),
+                ('deadline', models.DateTimeField()),
+                ('sent_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'tbl_task_reminders',
+                'managed': True,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['deadline', 'id'], name='tbl_tasks_deadline_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='task',
+            field=models.ForeignKey(db_column='task_id', on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='tasks.task'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='taskreminder',
+            unique_together={('task', 'threshold_minutes')},
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+# Frozen copy of TERMINAL_STATUS_NAMES at the time of this migration.
+TERMINAL_STATUS_NAMES = ('completed',)
+
+
+def backfill_workload(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskStatus = apps.get_model('tasks', 'TaskStatus')
+    AssigneeWorkload = apps.get_model('tasks', 'AssigneeWorkload')
+    now = timezone.now()
+    terminal = list(TaskStatus.objects.filter(name__in=TERMINAL_STATUS_NAMES).values_list('id', flat=True))
+    open_q = ~Q(status_id__in=terminal)
+    rows = (
+        Task.objects.filter(deleted_at__isnull=True, assignee__isnull=False)
+        .values('assignee_id')
+        .annotate(
+            open=Count('id', filter=open_q),
+            done=Count('id', filter=Q(status_id__in=terminal)),
+            overdue=Count('id', filter=open_q & Q(deadline__lt=now)),
+            next_deadline=Min('deadline', filter=open_q),
+        )
+        .order_by()
+    )
+    AssigneeWorkload.objects.bulk_create([
+        AssigneeWorkload(
+            user_id=row['assignee_id'], open_count=row['open'], done_count=row['done'],
+            overdue_count=row['overdue'], next_deadline=row['next_deadline'], overdue_as_of=now,
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_full_name_index'),
+        ('projects', '0003_project_members'),
+        ('tasks', '0005_task_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssigneeWorkload',
+            fields=[
+                ('user', models.OneToOneField(db_column='user_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_count', models.IntegerField(default=0)),
+                ('done_count', models.IntegerField(default=0)),
+                ('overdue_count', models.IntegerField(default=0)),
+                ('next_deadline', models.DateTimeField(blank=True, null=True)),
+                ('overdue_as_of', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'tbl_assignee_workload',
+                'managed': True,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'deadline'], name='tbl_tasks_assignee_dl_idx'),
+        ),
+        migrations.RunPython(backfill_workload, migrations.RunPython.noop),
+    ]
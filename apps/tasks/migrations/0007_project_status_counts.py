@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+# Frozen copy of TERMINAL_STATUS_NAMES at the time of this migration.
+TERMINAL_STATUS_NAMES = ('completed',)
+
+
+def backfill_project_counters(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskStatus = apps.get_model('tasks', 'TaskStatus')
+    Project = apps.get_model('projects', 'Project')
+    ProjectStatusCount = apps.get_model('tasks', 'ProjectStatusCount')
+    now = timezone.now()
+    terminal = list(TaskStatus.objects.filter(name__in=TERMINAL_STATUS_NAMES).values_list('id', flat=True))
+    open_q = ~Q(status_id__in=terminal)
+    live = Task.objects.filter(deleted_at__isnull=True)
+    totals = (
+        live.values('project_id')
+        .annotate(total=Count('id'), open=Count('id', filter=open_q),
+                  overdue=Count('id', filter=open_q & Q(deadline__lt=now)))
+        .order_by()
+    )
+    Project.objects.update(overdue_as_of=now)
+    Project.objects.bulk_update(
+        [Project(id=row['project_id'], task_count=row['total'], open_task_count=row['open'],
+                 overdue_task_count=row['overdue']) for row in totals],
+        ['task_count', 'open_task_count', 'overdue_task_count'], batch_size=500,
+    )
+    ProjectStatusCount.objects.bulk_create(
+        [ProjectStatusCount(project_id=row['project_id'], status_id=row['status_id'], count=row['n'])
+         for row in live.values('project_id', 'status_id').annotate(n=Count('id')).order_by()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_task_counters'),
+        ('tasks', '0006_assignee_workload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStatusCount',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(db_column='project_id', on_delete=django.db.models.deletion.CASCADE, related_name='task_status_counts', to='projects.project')),
+                ('status', models.ForeignKey(db_column='status_id', on_delete=django.db.models.deletion.CASCADE, to='tasks.taskstatus')),
+            ],
+            options={
+                'db_table': 'tbl_project_task_status_counts',
+                'managed': True,
+                'unique_together': {('project', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_project_counters, migrations.RunPython.noop),
+    ]
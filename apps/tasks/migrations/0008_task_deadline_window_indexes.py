@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_task_counters'),
+        ('tasks', '0007_project_status_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'deadline'], name='tbl_tasks_project_dl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at'], name='tbl_tasks_created_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_task_counters'),
+        ('tasks', '0008_task_deadline_window_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'id'], name='tbl_tasks_project_status_idx'),
+        ),
+    ]
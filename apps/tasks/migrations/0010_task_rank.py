@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of `apps.tasks.ranking.spread_keys` as of this migration, so
+# later changes to the ranking code cannot change what the backfill writes.
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+
+def spread_keys(count):
+    width = 1
+    while BASE ** width < BASE * (count + 1):
+        width += 1
+    step = BASE ** width // (count + 1)
+    keys = []
+    for position in range(1, count + 1):
+        value = step * position
+        if value % BASE == 0:
+            value += 1  # keys never end in 0
+        digits = ''
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits = DIGITS[digit] + digits
+        keys.append(digits)
+    return keys
+
+
+def backfill_ranks(apps, schema_editor):
+    # Existing tasks keep their id order within each status column.
+    Task = apps.get_model('tasks', 'Task')
+    columns = (
+        Task.objects.filter(deleted_at__isnull=True)
+        .values_list('project_id', 'status_id').distinct().order_by()
+    )
+    for project_id, status_id in list(columns):
+        tasks = list(
+            Task.objects.filter(project_id=project_id, status_id=status_id, deleted_at__isnull=True)
+            .order_by('id').only('id')
+        )
+        for task, key in zip(tasks, spread_keys(len(tasks))):
+            task.rank = key
+        Task.objects.bulk_update(tasks, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_task_counters'),
+        ('tasks', '0009_task_board_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tbl_tasks_project_status_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'rank'], name='tbl_tasks_column_rank_idx'),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+    ]
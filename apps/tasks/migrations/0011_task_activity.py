@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskActivity',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('action', models.CharField(max_length=20)),
+                ('changes', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField()),
+                ('actor', models.ForeignKey(blank=True, db_column='actor_id', db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(db_column='task_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='activity', to='tasks.task')),
+            ],
+            options={
+                'db_table': 'tbl_task_activity',
+                'managed': True,
+                'indexes': [models.Index(fields=['task', 'id'], name='tbl_task_activity_task_idx')],
+            },
+        ),
+    ]
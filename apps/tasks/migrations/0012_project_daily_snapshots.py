@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_task_counters'),
+        ('tasks', '0011_task_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectDailySnapshot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('taken_at', models.DateTimeField()),
+                ('project', models.ForeignKey(db_column='project_id', on_delete=django.db.models.deletion.CASCADE, related_name='daily_snapshots', to='projects.project')),
+                ('status', models.ForeignKey(db_column='status_id', on_delete=django.db.models.deletion.CASCADE, to='tasks.taskstatus')),
+            ],
+            options={
+                'db_table': 'tbl_project_daily_snapshots',
+                'managed': True,
+                'indexes': [models.Index(fields=['taken_at'], name='tbl_project_snap_taken_idx')],
+                'unique_together': {('project', 'day', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_project_daily_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='parent',
+            field=models.ForeignKey(blank=True, db_column='parent_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subtasks', to='tasks.task'),
+        ),
+        migrations.CreateModel(
+            name='TaskClosure',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(db_column='ancestor_id', on_delete=django.db.models.deletion.CASCADE, related_name='closure_descendants', to='tasks.task')),
+                ('descendant', models.ForeignKey(db_column='descendant_id', on_delete=django.db.models.deletion.CASCADE, related_name='closure_ancestors', to='tasks.task')),
+            ],
+            options={
+                'db_table': 'tbl_task_closure',
+                'managed': True,
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='tbl_task_closure_desc_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('blocked_by', models.ForeignKey(db_column='blocked_by_id', on_delete=django.db.models.deletion.CASCADE, related_name='blocking_links', to='tasks.task')),
+                ('task', models.ForeignKey(db_column='task_id', on_delete=django.db.models.deletion.CASCADE, related_name='blocker_links', to='tasks.task')),
+            ],
+            options={
+                'db_table': 'tbl_task_dependencies',
+                'managed': True,
+                'indexes': [models.Index(fields=['blocked_by', 'task'], name='tbl_task_deps_blocker_idx')],
+                'unique_together': {('task', 'blocked_by')},
+            },
+        ),
+        # Every existing task is a root: it only needs its depth-0 row.
+        migrations.RunSQL(
+            'INSERT INTO tbl_task_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM tbl_tasks',
+            migrations.RunSQL.noop,
+        ),
+    ]
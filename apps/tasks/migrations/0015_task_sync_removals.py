@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSyncRemoval',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('removed_at', models.DateTimeField()),
+                ('task', models.ForeignKey(db_column='task_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tasks.task')),
+                ('user', models.ForeignKey(db_column='user_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'tbl_task_sync_removals',
+                'managed': True,
+                'indexes': [models.Index(fields=['user', 'removed_at', 'task'], name='tbl_task_sync_rm_user_idx'), models.Index(fields=['removed_at'], name='tbl_task_sync_rm_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:32
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_all_changed(apps, schema_editor):
+    # The next snapshot run picks up every project once.
+    ProjectStatusCount = apps.get_model('tasks', 'ProjectStatusCount')
+    ProjectStatusCount.objects.update(modified_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_task_counters'),
+        ('tasks', '0015_task_sync_removals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectstatuscount',
+            name='modified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='projectstatuscount',
+            index=models.Index(fields=['modified_at'], name='tbl_project_status_cnt_mod_idx'),
+        ),
+        migrations.RunPython(mark_all_changed, migrations.RunPython.noop),
+    ]
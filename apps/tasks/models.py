@@ -1,10 +1,15 @@
 # apps/tasks/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from apps.projects.models import Project
+from backend.concurrency import VersionConflict
 
 User = get_user_model()
 
+# Status names that mean a task needs no further work.
+TERMINAL_STATUS_NAMES = ('completed',)
+
 
 class TaskStatus(models.Model):
     id = models.AutoField(primary_key=True)
@@ -22,6 +27,22 @@ class TaskStatus(models.Model):
         return self.name
 
 
+class Tag(models.Model):
+    """A label for tasks; names are stored lowercase and are unique."""
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=50, unique=True)
+    created_at = models.DateTimeField(null=True, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'tbl_tags'
+        app_label = 'tasks'
+        managed = True
+
+    def __str__(self):
+        return self.name
+
+
 class Task(models.Model):
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=100)
@@ -30,6 +51,19 @@ class Task(models.Model):
     created_at = models.DateTimeField(null=True, blank=True)
     modified_at = models.DateTimeField(null=True, blank=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
+    # Optimistic concurrency: bumped by every save, exposed as the ETag.
+    version = models.PositiveIntegerField(default=1)
+    # Manual order within a status column (see `ranking`); new tasks go last.
+    rank = models.CharField(max_length=255, default='', blank=True)
+    # Subtasks; the full hierarchy is kept in `TaskClosure` (see `hierarchy`).
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='subtasks',
+        db_column='parent_id'
+    )
 
     status = models.ForeignKey(
         TaskStatus,
@@ -50,6 +84,7 @@ class Task(models.Model):
         related_name='tasks',
         db_column='project_id'
     )
+    tags = models.ManyToManyField(Tag, through='TaskTag', related_name='tasks', blank=True)
     # Note: legacy `tbl_tasks` does not include a `created_by` column.
     # We do not model it here to match the existing schema.
 
@@ -59,10 +94,337 @@ class Task(models.Model):
         app_label = 'tasks'
         managed = True
         ordering = ['-created_at']
+        indexes = [
+            # Delta-sync cursor: `/api/tasks/changes/` pages on (modified_at, id).
+            models.Index(fields=['modified_at', 'id'], name='tbl_tasks_modified_id_idx'),
+            # Deadline reminder sweeps range-scan upcoming deadlines.
+            models.Index(fields=['deadline', 'id'], name='tbl_tasks_deadline_id_idx'),
+            # Workload counters recompute an assignee's earliest open deadline;
+            # also serves per-assignee deadline windows and the calendar.
+            models.Index(fields=['assignee', 'deadline'], name='tbl_tasks_assignee_dl_idx'),
+            # Per-project deadline windows / calendar.
+            models.Index(fields=['project', 'deadline'], name='tbl_tasks_project_dl_idx'),
+            # Default list ordering and `created_at_*` ranges.
+            models.Index(fields=['created_at'], name='tbl_tasks_created_idx'),
+            # Board columns and moves: a project's tasks per status in
+            # (rank, id) order.
+            models.Index(fields=['project', 'status', 'rank'], name='tbl_tasks_column_rank_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Keep the row as loaded for `save()` to diff against; nothing is
+        # computed from it unless the task is saved.
+        instance._loaded_row = (field_names, values)
+        return instance
+
+    def _original_values(self):
+        """Field values as last loaded or saved, by attribute name, or `None`."""
+        original = self.__dict__.get('_original')
+        if original is None and '_loaded_row' in self.__dict__:
+            original = self._original = dict(zip(*self.__dict__.pop('_loaded_row')))
+        return original
+
+    def save(self, *args, **kwargs):
+        # Counters and the closure table are adjusted in the same
+        # transaction as the task row; cached tag counts are invalidated.
+        from . import activity, counters, hierarchy, sync, tagging
+
+        with transaction.atomic():
+            adding = self._state.adding
+            original = None if adding else self._original_values()
+            old_state = counters.state_from(original) if original is not None else None
+            if old_state is None and not adding:
+                old_state = counters.load_state(self.pk)
+            update_fields = kwargs.get('update_fields')
+            reparent = (
+                not adding
+                and (update_fields is None or 'parent' in update_fields)
+                and hierarchy.parent_changed(self, original)
+            )
+            self._save_row(*args, **kwargs)
+            if adding:
+                hierarchy.insert_tasks([self])
+            elif reparent:
+                hierarchy.move(self)
+            new_state = counters.state_of(self)
+            counters.apply_transition(old_state, new_state)
+            tagging.invalidate_for_transition(old_state, new_state)
+            sync.record_task_exit(self, old_state, new_state)
+        # Exposed for `activity.record()`; the saved values become the new
+        # baseline so a second save only reports what it changed.
+        self.last_changes = activity.diff(original, self)
+        self._original = activity.snapshot(self)
+
+    def _save_row(self, *args, **kwargs):
+        # Every write bumps `modified_at` so delta-sync clients pick it up,
+        # including partial saves that pass `update_fields`.
+        now = timezone.now()
+        if self._state.adding and self.created_at is None:
+            self.created_at = now
+        self.modified_at = now
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra = [f for f in ('modified_at', 'version') if f not in update_fields]
+            kwargs['update_fields'] = list(update_fields) + extra
+
+        if self._state.adding:
+            if not self.rank:
+                from . import ranking
+                self.rank = ranking.key_between(ranking.last_rank(self.project_id, self.status_id), None)
+            super().save(*args, **kwargs)
+            return
+
+        # Updates only apply to the version this instance was read at (or
+        # the one a client sent in If-Match); see `_do_update`.
+        expected = self.version
+        self._expected_version = expected
+        self.version = expected + 1
+        if update_fields is None:
+            kwargs.setdefault('force_update', True)
+        try:
+            super().save(*args, **kwargs)
+        except VersionConflict:
+            self.version = expected
+            raise
+        finally:
+            self._expected_version = None
+
+    def _do_update(self, base_qs, *args, **kwargs):
+        expected = getattr(self, '_expected_version', None)
+        if expected is not None:
+            base_qs = base_qs.filter(version=expected)
+        updated = super()._do_update(base_qs, *args, **kwargs)
+        if expected is not None and not updated:
+            raise VersionConflict(f'Task {self.pk} is no longer at version {expected}')
+        return updated
+
     def delete(self, *args, **kwargs):
-        self.deleted_at = models.functions.Now()
-        self.save(update_fields=['deleted_at'])
\ No newline at end of file
+        # Soft delete; `save()` also bumps `modified_at` so the row shows up
+        # as a tombstone in `/api/tasks/changes/`.
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+
+class TaskReminder(models.Model):
+    """Records that a deadline reminder was sent for a task.
+
+    One row per (task, threshold). The task's deadline is stored so a
+    rescheduled task is reminded again for its new deadline.
+    """
+    id = models.BigAutoField(primary_key=True)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders', db_column='task_id')
+    threshold_minutes = models.PositiveIntegerField()
+    deadline = models.DateTimeField()
+    sent_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tbl_task_reminders'
+        app_label = 'tasks'
+        managed = True
+        unique_together = ('task', 'threshold_minutes')
+
+
+class AssigneeWorkload(models.Model):
+    """Per-assignee task counters behind `/api/tasks/workload/`.
+
+    `open_count`, `done_count` and `next_deadline` (earliest deadline among
+    open tasks) are maintained by `Task.save()` through `counters`.
+    `overdue_count` depends on the clock, so it is refreshed by
+    `manage.py reconcile_counters --overdue` and stamped with `overdue_as_of`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='workload', db_column='user_id')
+    open_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+    overdue_count = models.IntegerField(default=0)
+    next_deadline = models.DateTimeField(null=True, blank=True)
+    overdue_as_of = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'tbl_assignee_workload'
+        app_label = 'tasks'
+        managed = True
+
+    def __str__(self):
+        return f'workload({self.user_id})'
+
+
+class ProjectStatusCount(models.Model):
+    """Live tasks per (project, status), maintained like the `Project` counters.
+
+    `modified_at` is set by every change to `count`, including tasks moved
+    to another project or deleted outright, which leave nothing behind in
+    `tbl_tasks`; the snapshot job uses it to find changed projects.
+    """
+    id = models.BigAutoField(primary_key=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_status_counts', db_column='project_id')
+    status = models.ForeignKey(TaskStatus, on_delete=models.CASCADE, db_column='status_id')
+    count = models.IntegerField(default=0)
+    modified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'tbl_project_task_status_counts'
+        app_label = 'tasks'
+        managed = True
+        unique_together = ('project', 'status')
+        indexes = [
+            models.Index(fields=['modified_at'], name='tbl_project_status_cnt_mod_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.project_id}/{self.status_id}: {self.count}'
+
+
+class TaskActivity(models.Model):
+    """Append-only history of task writes, one row per change.
+
+    `changes` maps each changed field to `[old, new]`. Rows are written in
+    batches by `activity` and never updated. The foreign keys carry no
+    database constraint so inserts do no lookups and a removed user or
+    task cannot make a batch fail.
+    """
+    id = models.BigAutoField(primary_key=True)
+    task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, db_constraint=False, related_name='activity', db_column='task_id',
+    )
+    actor = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        related_name='+', db_column='actor_id',
+    )
+    action = models.CharField(max_length=20)
+    changes = models.JSONField(default=dict)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tbl_task_activity'
+        app_label = 'tasks'
+        managed = True
+        indexes = [
+            # `/api/tasks/<id>/history/` pages newest first by id.
+            models.Index(fields=['task', 'id'], name='tbl_task_activity_task_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id} {self.action}'
+
+
+class ProjectDailySnapshot(models.Model):
+    """Tasks per status of a project as of one day, for burndown charts.
+
+    Written by `manage.py snapshot_projects` only for projects whose tasks
+    changed since the previous run; a day without rows means nothing
+    changed, and readers carry the last earlier snapshot forward.
+    """
+    id = models.BigAutoField(primary_key=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_snapshots', db_column='project_id')
+    day = models.DateField()
+    status = models.ForeignKey(TaskStatus, on_delete=models.CASCADE, db_column='status_id')
+    count = models.IntegerField(default=0)
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tbl_project_daily_snapshots'
+        app_label = 'tasks'
+        managed = True
+        # Also the index for `/burndown/` date ranges of one project.
+        unique_together = ('project', 'day', 'status')
+        indexes = [
+            # The snapshot job finds its previous run with MAX(taken_at).
+            models.Index(fields=['taken_at'], name='tbl_project_snap_taken_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.project_id} {self.day} {self.status_id}: {self.count}'
+
+
+class TaskClosure(models.Model):
+    """Transitive closure of the subtask tree: one row per (ancestor, descendant).
+
+    Every task has a `depth=0` row for itself. Descendants of a task are
+    `ancestor=task`, its ancestors `descendant=task`, each one indexed
+    query. Maintained by `hierarchy` on insert and on reparenting.
+    """
+    id = models.BigAutoField(primary_key=True)
+    ancestor = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='closure_descendants', db_column='ancestor_id')
+    descendant = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='closure_ancestors', db_column='descendant_id')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'tbl_task_closure'
+        app_label = 'tasks'
+        managed = True
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='tbl_task_closure_desc_idx'),
+        ]
+
+
+class TaskDependency(models.Model):
+    """`task` is blocked by `blocked_by` until that task is completed."""
+    id = models.BigAutoField(primary_key=True)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='blocker_links', db_column='task_id')
+    blocked_by = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='blocking_links', db_column='blocked_by_id')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tbl_task_dependencies'
+        app_label = 'tasks'
+        managed = True
+        unique_together = ('task', 'blocked_by')
+        indexes = [
+            # Reverse lookups ("what does this task block") and the cycle check.
+            models.Index(fields=['blocked_by', 'task'], name='tbl_task_deps_blocker_idx'),
+        ]
+
+
+class TaskTag(models.Model):
+    """Join table between tasks and tags, indexed in both directions."""
+    id = models.BigAutoField(primary_key=True)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='tag_links', db_column='task_id')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='task_links', db_column='tag_id')
+
+    class Meta:
+        db_table = 'tbl_task_tags'
+        app_label = 'tasks'
+        managed = True
+        # (task, tag): a task's tags; (tag, task): tag filters group on it.
+        unique_together = ('task', 'tag')
+        indexes = [
+            models.Index(fields=['tag', 'task'], name='tbl_task_tags_tag_idx'),
+        ]
+
+
+class TaskSyncRemoval(models.Model):
+    """A task leaving a user's view without being deleted.
+
+    Written in the same transaction as the change that hides the task
+    (reassignment, a move to another project, the user leaving the
+    project), so `/api/tasks/changes/` can tell the user's offline copy to
+    drop it. Rows older than `TASK_SYNC_REMOVAL_RETENTION_DAYS` are
+    purged; older cursors must resync from scratch.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', db_column='user_id',
+    )
+    task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', db_column='task_id',
+    )
+    removed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tbl_task_sync_removals'
+        app_label = 'tasks'
+        managed = True
+        indexes = [
+            # A user's removals in `(removed_at, task)` cursor order.
+            models.Index(fields=['user', 'removed_at', 'task'], name='tbl_task_sync_rm_user_idx'),
+            models.Index(fields=['removed_at'], name='tbl_task_sync_rm_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id} hidden from {self.user_id}'
@@ -1,13 +1,16 @@
 # apps/tasks/permissions.py
 from rest_framework import permissions
 
+from apps.projects.membership import is_member
+
 class IsProjectMemberOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
         # Primary rule for non-safe methods:
         # - If caller has role 'admin' or 'manager' (from token), allow.
-        # - Otherwise, require that the token user's id matches the task assignee id.
+        # - Otherwise, require that the token user's id matches the task assignee id,
+        #   or that the token user is a member of the task's project.
 
         token = getattr(request, 'auth', None)
         payload = None
@@ -50,9 +53,12 @@ class IsProjectMemberOrReadOnly(permissions.BasePermission):
         assignee_id = getattr(assignee, 'id', None) if assignee is not None else None
 
         try:
-            if token_user_id is not None and assignee_id is not None:
-                return int(token_user_id) == int(assignee_id)
+            if token_user_id is not None and assignee_id is not None and int(token_user_id) == int(assignee_id):
+                return True
         except Exception:
             return False
 
-        return False
\ No newline at end of file
+        if token_user_id is not None and is_member(token_user_id, getattr(obj, 'project_id', None)):
+            return True
+
+        return False
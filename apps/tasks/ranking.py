@@ -0,0 +1,173 @@
+# apps/tasks/ranking.py
+"""Fractional (lexicographic) rank keys for manual ordering of tasks.
+
+A rank is a string of base-36 digits read as a fraction `0.<digits>`;
+tasks in a column are ordered by `(rank, id)`. A key strictly between any
+two others always exists, so moving a task rewrites only that task's row.
+Keys use digits and lowercase letters only, so byte order and MySQL's
+case-insensitive collations agree, and never end in `0`, so there is
+always room below a key.
+
+Appending to a column steps a counter whose length grows with the log of
+the number of appends (see `key_after()`). Keys get longer as tasks are
+repeatedly dropped into the same gap; `spread_keys()` produces short,
+evenly spaced keys for a whole column and backs `manage.py
+rebalance_ranks`.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .models import Task
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+_VALUE = {digit: value for value, digit in enumerate(DIGITS)}
+
+
+def validate(key):
+    if not key or key[-1] == '0' or any(ch not in _VALUE for ch in key):
+        raise ValueError(f'Invalid rank key {key!r}')
+
+
+def _midpoint(a, b):
+    """Digits strictly between fractions `a` and `b` (`b=None`: 1.0)."""
+    if b is not None:
+        # Skip the common prefix; `a` is padded with zeros.
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    low = _VALUE[a[0]] if a else 0
+    high = _VALUE[b[0]] if b is not None else BASE
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    if b is not None and len(b) > 1:
+        # The first digits are adjacent: b's first digit alone sorts
+        # between them.
+        return b[0]
+    return DIGITS[low] + _midpoint(a[1:], None)
+
+
+def key_between(a, b):
+    """A key with `a < key < b`; either bound may be `None` (open end)."""
+    if a is not None:
+        validate(a)
+    if b is not None:
+        validate(b)
+        if a is not None and a >= b:
+            raise ValueError(f'Rank keys out of order: {a!r} >= {b!r}')
+    if a is None:
+        return key_before(b) if b is not None else DIGITS[BASE // 2]
+    if b is None:
+        return key_after(a)
+    return _midpoint(a, b)
+
+
+def _to_int(digits):
+    value = 0
+    for digit in digits:
+        value = value * BASE + _VALUE[digit]
+    return value
+
+
+def _to_digits(value, width):
+    digits = ''
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits = DIGITS[digit] + digits
+    return digits
+
+
+def key_after(a):
+    """The smallest "append" key above `a`.
+
+    Append keys are `z` * n followed by an (n + 1)-digit counter whose
+    first digit is not `z`: `1`..`y`, then `z01`..`zyz`, then
+    `zz001`.., so each extra pair of digits makes room for 36 times as
+    many appends (about 1,200 at three characters, 45,000 at five) and
+    a long column of appends stays short. A key with a longer tail (a
+    midpoint) steps to the next counter value.
+    """
+    head = len(a) - len(a.lstrip('z'))
+    width = head + 1
+    value = _to_int(a[head:head + width].ljust(width, '0'))
+    while True:
+        if value >= (BASE - 1) * BASE ** (width - 1):
+            # The counter ran into `z`: one more `z` and one more digit.
+            head, width, value = head + 1, width + 1, 0
+        key = 'z' * head + _to_digits(value, width)
+        if key > a and key[-1] != '0':
+            return key
+        value += 1
+
+
+def key_before(b):
+    """The next key below `b` at `b`'s length (or one digit longer)."""
+    last = _VALUE[b[-1]]
+    key = (b[:-1] + DIGITS[last - 1]).rstrip('0')
+    return key or _midpoint('', b)
+
+
+def spread_keys(count):
+    """`count` evenly spaced keys of equal, minimal length, in order.
+
+    Neighbouring keys are at least `BASE` steps apart, leaving room for
+    inserts and appends at that length.
+    """
+    width = 1
+    while BASE ** width < BASE * (count + 1):
+        width += 1
+    step = BASE ** width // (count + 1)
+    keys = []
+    for position in range(1, count + 1):
+        value = step * position
+        if value % BASE == 0:
+            value += 1  # keys never end in 0
+        keys.append(_to_digits(value, width))
+    return keys
+
+
+def column_tasks(project_id, status_id):
+    return Task.objects.filter(project_id=project_id, status_id=status_id, deleted_at__isnull=True)
+
+
+def last_rank(project_id, status_id):
+    return (
+        column_tasks(project_id, status_id).exclude(rank='')
+        .order_by('-rank', '-id').values_list('rank', flat=True).first()
+    )
+
+
+def rebalance_column(project_id, status_id):
+    """Give every task of a column a fresh, short key, keeping its order.
+
+    Bumps `version` and `modified_at` of the rewritten rows so ETags and
+    delta-sync clients see the new ranks. Returns the number of tasks.
+    """
+    with transaction.atomic():
+        tasks = list(
+            column_tasks(project_id, status_id).select_for_update()
+            .order_by('rank', 'id').only('id', 'rank')
+        )
+        now = timezone.now()
+        for task, key in zip(tasks, spread_keys(len(tasks))):
+            task.rank = key
+            task.version = F('version') + 1
+            task.modified_at = now
+        Task.objects.bulk_update(tasks, ['rank', 'version', 'modified_at'], batch_size=500)
+    return len(tasks)
+
+
+def columns_to_rebalance(max_length, project_id=None):
+    """`(project_id, status_id)` of columns with long or duplicate keys."""
+    live = Task.objects.filter(deleted_at__isnull=True)
+    if project_id is not None:
+        live = live.filter(project_id=project_id)
+    long_keys = live.annotate(rank_length=Length('rank')).filter(rank_length__gt=max_length)
+    duplicates = live.values('project_id', 'status_id', 'rank').annotate(n=Count('id')).filter(n__gt=1).order_by()
+    columns = set(long_keys.values_list('project_id', 'status_id').distinct().order_by())
+    columns.update((row['project_id'], row['status_id']) for row in duplicates)
+    return sorted(columns)
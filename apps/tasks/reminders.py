@@ -0,0 +1,108 @@
+# apps/tasks/reminders.py
+"""Deadline reminder sweep.
+
+For each threshold (minutes before the deadline, smallest first) the
+sweep range-scans `tbl_tasks` on the `(deadline, id)` index for open,
+assigned tasks due within the threshold and skips tasks that already have
+a `TaskReminder` row for that threshold and deadline. Only tasks inside
+the largest threshold window are ever read, so the cost depends on how
+many tasks are due soon, not on table size.
+
+When a task crosses several thresholds at once (e.g. it was created an
+hour before its deadline) the assignee gets a single email and all the
+crossed thresholds are recorded.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from backend import lookups
+from .models import TERMINAL_STATUS_NAMES, Task, TaskReminder, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+def get_thresholds():
+    return sorted(set(getattr(settings, 'TASK_REMINDER_THRESHOLDS', [1440, 60])))
+
+
+def _build_message(task):
+    deadline = timezone.localtime(task.deadline).strftime('%Y-%m-%d %H:%M %Z')
+    subject = f"Reminder: '{task.title}' is due {deadline}"
+    body = (
+        f"Hi {task.assignee.full_name or task.assignee.username},\n\n"
+        f"The task '{task.title}' in project '{task.project.name}' is due {deadline}.\n"
+    )
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [task.assignee.email])
+
+
+def _record(tasks, thresholds, now):
+    rows = [
+        TaskReminder(task_id=t.id, threshold_minutes=m, deadline=t.deadline, sent_at=now)
+        for t in tasks for m in thresholds
+    ]
+    options = {'update_conflicts': True, 'update_fields': ['deadline', 'sent_at']}
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['task', 'threshold_minutes']
+    TaskReminder.objects.bulk_create(rows, **options)
+
+
+def sweep(now=None, batch_size=None):
+    """Send due reminders and return how many emails were sent."""
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, 'TASK_REMINDER_BATCH_SIZE', 500)
+    thresholds = get_thresholds()
+    terminal_ids = lookups.ids_by_name(TaskStatus, TERMINAL_STATUS_NAMES)
+    sent = 0
+
+    for index, threshold in enumerate(thresholds):
+        window_end = now + timedelta(minutes=threshold)
+        already_sent = TaskReminder.objects.filter(
+            task_id=OuterRef('pk'), threshold_minutes=threshold, deadline=OuterRef('deadline'),
+        )
+        qs = (
+            Task.objects
+            .filter(deadline__gt=now, deadline__lte=window_end, deleted_at__isnull=True, assignee__isnull=False)
+            .exclude(status_id__in=terminal_ids)
+            .filter(~Exists(already_sent))
+            .select_related('assignee', 'project')
+            .order_by('deadline', 'id')
+        )
+        # Thresholds this task has also crossed (the larger ones).
+        crossed = thresholds[index:]
+
+        last = None
+        while True:
+            page = qs
+            if last is not None:
+                page = page.filter(Q(deadline__gt=last.deadline) | Q(deadline=last.deadline, id__gt=last.id))
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            messages = [_build_message(t) for t in batch if t.assignee.email]
+            try:
+                get_connection().send_messages(messages)
+            except Exception:
+                # Nothing recorded, so the batch is retried on the next sweep.
+                logger.exception("Failed sending %s deadline reminders (threshold=%sm)", len(messages), threshold)
+                return sent
+            _record(batch, crossed, now)
+            sent += len(messages)
+            last = batch[-1]
+            if len(batch) < batch_size:
+                break
+
+    logger.info("Deadline reminder sweep sent %s reminders", sent)
+    return sent
+
+
+def prune(now=None):
+    """Delete reminder rows for deadlines that have passed."""
+    now = now or timezone.now()
+    deleted, _ = TaskReminder.objects.filter(deadline__lt=now).delete()
+    return deleted
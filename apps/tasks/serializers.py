@@ -1,6 +1,8 @@
 # apps/tasks/serializers.py
+from django.db import transaction
 from rest_framework import serializers
-from .models import Task, TaskStatus
+from . import hierarchy, tagging
+from .models import Task, TaskActivity, TaskStatus
 from django.contrib.auth import get_user_model
 from apps.projects.models import Project
 
@@ -32,15 +34,31 @@ class TaskSerializer(serializers.ModelSerializer):
         source='status',
         write_only=True
     )
+    parent_id = serializers.PrimaryKeyRelatedField(
+        queryset=Task.objects.filter(deleted_at__isnull=True),
+        source='parent',
+        required=False,
+        allow_null=True
+    )
+    is_blocked = serializers.SerializerMethodField()
+    blocked_by = serializers.SerializerMethodField()
+    # Tag names; read back in `to_representation`.
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=tagging.MAX_TAG_LENGTH),
+        max_length=tagging.MAX_TAGS_PER_TASK,
+        write_only=True,
+        required=False
+    )
 
     class Meta:
         model = Task
         fields = [
             'id', 'title', 'description', 'status', 'status_id',
             'assignee', 'assignee_id', 'deadline', 'created_at', 'modified_at',
-            'deleted_at', 'project', 'project_id'
+            'deleted_at', 'project', 'project_id', 'version', 'rank',
+            'parent_id', 'is_blocked', 'blocked_by', 'tags'
         ]
-        read_only_fields = ['created_at', 'modified_at', 'deleted_at']
+        read_only_fields = ['created_at', 'modified_at', 'deleted_at', 'version', 'rank']
 
     def get_project(self, obj):
         if obj.project is None:
@@ -50,10 +68,68 @@ class TaskSerializer(serializers.ModelSerializer):
             'name': getattr(obj.project, 'name', None)
         }
 
+    def get_is_blocked(self, obj):
+        return hierarchy.is_blocked(obj)
+
+    def get_blocked_by(self, obj):
+        # Prefetched by `hierarchy.with_relations()` in list views.
+        return sorted(link.blocked_by_id for link in obj.blocker_links.all())
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['tags'] = tagging.tag_names(instance)
+        return data
+
+    def create(self, validated_data):
+        tags = validated_data.pop('tags', None)
+        # The task and its tags are written together or not at all.
+        with transaction.atomic():
+            task = super().create(validated_data)
+            if tags is not None:
+                tagging.set_tags(task, tags)
+        return task
+
+    def update(self, instance, validated_data):
+        tags = validated_data.pop('tags', None)
+        try:
+            with transaction.atomic():
+                task = super().update(instance, validated_data)
+                if tags is not None:
+                    tagging.set_tags(task, tags)
+        except hierarchy.HierarchyError as exc:
+            # `validate()` checks without locks; a concurrent move can still
+            # make the parent a subtask, which `hierarchy.move()` rejects.
+            raise serializers.ValidationError({'parent_id': str(exc)})
+        return task
+
+    def validate(self, attrs):
+        parent = attrs.get('parent')
+        if parent is not None:
+            project = attrs.get('project') or getattr(self.instance, 'project', None)
+            if project is not None and parent.project_id != project.id:
+                raise serializers.ValidationError({'parent_id': 'The parent task must be in the same project.'})
+            if self.instance is not None and hierarchy.is_descendant(parent.id, self.instance.id):
+                raise serializers.ValidationError({'parent_id': 'A task cannot be moved under itself or one of its subtasks.'})
+        return attrs
+
     def get_assignee(self, obj):
         if obj.assignee is None:
             return None
         return {
             'id': getattr(obj.assignee, 'id', None),
             'username': getattr(obj.assignee, 'username', None)
-        }
\ No newline at end of file
+        }
+
+
+class TaskActivitySerializer(serializers.ModelSerializer):
+    actor = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TaskActivity
+        fields = ['id', 'action', 'changes', 'actor', 'created_at']
+
+    def get_actor(self, obj):
+        if obj.actor_id is None:
+            return None
+        actor = obj.actor
+        return {'id': obj.actor_id, 'username': getattr(actor, 'username', None)}
@@ -0,0 +1,102 @@
+# apps/tasks/snapshots.py
+"""Daily per-project, per-status task counts behind `/burndown/`.
+
+`take_snapshots()` copies the maintained `ProjectStatusCount` counters of
+every project whose counts changed since the previous run into
+`ProjectDailySnapshot` rows for today, one per live status. Changes are
+found through the counters' own `modified_at`, which the counter update
+sets for both the old and the new project of a task, so tasks moved to
+another project or deleted outright are not missed. Running it
+again the same day overwrites today's rows, so it can run nightly and on
+demand. Projects that did not change get no rows; `burndown()` carries
+the last earlier snapshot forward over such days.
+"""
+import datetime
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from backend import lookups
+
+from .models import TERMINAL_STATUS_NAMES, ProjectDailySnapshot, ProjectStatusCount, TaskStatus
+
+MAX_RANGE_DAYS = 366
+# Look back a little before the previous run so tasks written by
+# transactions that committed just after it are not missed.
+CHANGE_OVERLAP = datetime.timedelta(minutes=5)
+
+
+def changed_project_ids(since):
+    counts = ProjectStatusCount.objects.all()
+    if since is not None:
+        counts = counts.filter(modified_at__gte=since)
+    return set(counts.values_list('project_id', flat=True).distinct().order_by())
+
+
+def take_snapshots(now=None, full=False):
+    """Snapshot changed projects (all with `full`). Returns projects written."""
+    now = now or timezone.now()
+    day = timezone.localdate(now)
+    since = None if full else ProjectDailySnapshot.objects.aggregate(last=Max('taken_at'))['last']
+    if since is not None:
+        since -= CHANGE_OVERLAP
+    project_ids = changed_project_ids(since)
+    if not project_ids:
+        return 0
+
+    status_ids = sorted(lookups.get_lookup(TaskStatus))
+    counts = {
+        (project_id, status_id): count
+        for project_id, status_id, count in ProjectStatusCount.objects.filter(
+            project_id__in=project_ids,
+        ).values_list('project_id', 'status_id', 'count')
+    }
+    rows = [
+        ProjectDailySnapshot(
+            project_id=project_id, day=day, status_id=status_id,
+            count=counts.get((project_id, status_id), 0), taken_at=now,
+        )
+        for project_id in sorted(project_ids)
+        for status_id in status_ids
+    ]
+    options = {'update_conflicts': True, 'update_fields': ['count', 'taken_at']}
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['project', 'day', 'status']
+    with transaction.atomic():
+        ProjectDailySnapshot.objects.bulk_create(rows, batch_size=500, **options)
+    return len(project_ids)
+
+
+def burndown(project_id, start, end):
+    """Per-day counts for `start..end` (dates, inclusive), oldest first.
+
+    Reads the snapshot rows in the range plus the last snapshot day before
+    it, so days without a snapshot repeat the previous day's counts.
+    """
+    snapshots = ProjectDailySnapshot.objects.filter(project_id=project_id)
+    baseline = snapshots.filter(day__lt=start).aggregate(day=Max('day'))['day']
+    by_day = {}
+    for day, status_id, count in snapshots.filter(day__gte=baseline or start, day__lte=end).values_list(
+        'day', 'status_id', 'count',
+    ):
+        by_day.setdefault(day, {})[status_id] = count
+
+    names = lookups.get_lookup(TaskStatus)
+    terminal = set(lookups.ids_by_name(TaskStatus, TERMINAL_STATUS_NAMES))
+    current = by_day.get(baseline, {})
+    days = []
+    day = start
+    while day <= end:
+        current = by_day.get(day, current)
+        done = sum(n for status_id, n in current.items() if status_id in terminal)
+        total = sum(current.values())
+        days.append({
+            'date': day.isoformat(),
+            'by_status': {names.get(status_id, str(status_id)): n for status_id, n in sorted(current.items())},
+            'total': total,
+            'open': total - done,
+            'done': done,
+        })
+        day += datetime.timedelta(days=1)
+    return days
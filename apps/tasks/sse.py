@@ -0,0 +1,183 @@
+# apps/tasks/sse.py
+"""Server-Sent Events stream of task changes, served directly on ASGI.
+
+Mounted by `backend/asgi.py` at `/api/tasks/stream/`. Each connection is a
+coroutine plus a small queue; no thread or DB connection is held while a
+client is idle, so a worker can keep thousands of subscribers open.
+
+Authentication uses the same JWT as the REST API (Authorization header or
+`access_token` cookie). Admins and managers receive every event; other
+users only receive events for tasks they are (or just stopped being)
+assigned to, and for tasks of projects they are a member of. The member
+project set is read from the membership cache on connect and reloaded when
+a `membership` event for the user arrives, or every
+`TASK_EVENTS_MEMBERSHIP_REFRESH_SECONDS` in case one was missed.
+
+The stream ends with an `expired` event when the access token expires, so a
+revoked or deactivated user stays connected no longer than the token's
+lifetime; the client reconnects with a refreshed token.
+"""
+import asyncio
+import json
+import time
+from http.cookies import SimpleCookie
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.projects.membership import member_project_ids
+
+from .events import EVENT_MEMBERSHIP, get_broker
+
+STREAM_PATH = '/api/tasks/stream/'
+
+
+def _raw_token(scope):
+    headers = dict(scope.get('headers') or [])
+    auth = headers.get(b'authorization', b'').decode('latin-1')
+    if auth.lower().startswith('bearer '):
+        return auth[7:].strip()
+    cookie_header = headers.get(b'cookie', b'').decode('latin-1')
+    if cookie_header:
+        morsel = SimpleCookie(cookie_header).get('access_token')
+        if morsel is not None:
+            return morsel.value
+    return None
+
+
+def _principal(payload):
+    """Return `(user_id, is_privileged)` from a validated token payload."""
+    user_id = payload.get('user_id')
+    role_obj = payload.get('role')
+    if isinstance(role_obj, dict):
+        name = role_obj.get('role_name') or role_obj.get('name')
+        is_privileged = str(name or '').lower() in ('admin', 'manager')
+    elif isinstance(role_obj, str):
+        is_privileged = role_obj.lower() in ('admin', 'manager')
+    else:
+        roles = payload.get('roles') or []
+        if isinstance(roles, (list, tuple)):
+            is_privileged = any(str(r).lower() in ('admin', 'manager') for r in roles)
+        else:
+            is_privileged = str(roles).lower() in ('admin', 'manager')
+    return user_id, is_privileged
+
+
+def can_see(event, user_id, is_privileged, project_ids=frozenset()):
+    if is_privileged:
+        return True
+    if event.get('project_id') in project_ids:
+        return True
+    try:
+        return user_id is not None and int(user_id) in event.get('audience', ())
+    except (TypeError, ValueError):
+        return False
+
+
+async def _send_error(send, status, detail):
+    body = json.dumps({'detail': detail}).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def task_events_app(scope, receive, send):
+    """ASGI app streaming task events as `text/event-stream`."""
+    if scope['method'] != 'GET':
+        await _send_error(send, 405, 'Method not allowed')
+        return
+
+    raw = _raw_token(scope)
+    if not raw:
+        await _send_error(send, 401, 'Authentication credentials were not provided.')
+        return
+    try:
+        payload = AccessToken(raw).payload
+    except TokenError:
+        await _send_error(send, 401, 'Invalid token')
+        return
+    user_id, is_privileged = _principal(payload)
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        await _send_error(send, 401, 'Invalid token')
+        return
+    load_projects = sync_to_async(member_project_ids)
+    project_ids = frozenset() if is_privileged else await load_projects(user_id)
+
+    keepalive = getattr(settings, 'TASK_EVENTS_KEEPALIVE_SECONDS', 15)
+    refresh = getattr(settings, 'TASK_EVENTS_MEMBERSHIP_REFRESH_SECONDS', 300)
+    loop = asyncio.get_running_loop()
+    # `exp` is wall-clock; convert it once to the loop's monotonic clock.
+    expires_at = loop.time() + (payload['exp'] - time.time()) if payload.get('exp') else None
+    refresh_at = loop.time() + refresh
+    broker = get_broker()
+    sub = broker.subscribe()
+
+    disconnected = asyncio.Event()
+
+    async def _watch_disconnect():
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+                # Unblock the writer loop.
+                sub.deliver(None)
+                return
+
+    watcher = asyncio.ensure_future(_watch_disconnect())
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Stop nginx from buffering the stream.
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': f'retry: {keepalive * 1000}\n\n'.encode(), 'more_body': True})
+
+        while not disconnected.is_set():
+            timeout = keepalive
+            if expires_at is not None:
+                timeout = min(timeout, expires_at - loop.time())
+                if timeout <= 0:
+                    await send({'type': 'http.response.body', 'body': b'event: expired\ndata: {}\n\n', 'more_body': True})
+                    break
+            try:
+                event = await asyncio.wait_for(sub.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+                if not is_privileged and loop.time() >= refresh_at:
+                    project_ids = await load_projects(user_id)
+                    refresh_at = loop.time() + refresh
+                continue
+            if event is None:
+                if sub.overflowed:
+                    # Client fell behind; tell it to resync via /changes/.
+                    await send({'type': 'http.response.body', 'body': b'event: resync\ndata: {}\n\n', 'more_body': True})
+                break
+            if event['type'] == EVENT_MEMBERSHIP:
+                if event.get('user_id') != user_id:
+                    continue
+                if not is_privileged:
+                    project_ids = await load_projects(user_id)
+                    refresh_at = loop.time() + refresh
+            elif not can_see(event, user_id, is_privileged, project_ids):
+                continue
+            data = json.dumps(event, separators=(',', ':'))
+            chunk = f"event: {event['type']}\ndata: {data}\n\n".encode()
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        if not disconnected.is_set():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        broker.unsubscribe(sub)
+        watcher.cancel()
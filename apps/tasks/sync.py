@@ -0,0 +1,94 @@
+# apps/tasks/sync.py
+"""Delta sync support: tasks that leave a user's view.
+
+`/api/tasks/changes/` returns the caller's visible tasks changed after a
+cursor. A task that stops being visible without being deleted (assigned
+to someone else, moved to a project the user is not a member of, or the
+user removed from its project) no longer matches that scope, so it is
+recorded as a `TaskSyncRemoval` for each user who lost it, in the same
+transaction, and reported to them in `removed`. Admins and managers see
+every task and need no removals.
+
+`Task.modified_at` is stamped before the write commits, so a cursor past
+it can miss a slow transaction; `overlap()` is how far `/changes/` moves a
+caught-up cursor back to re-read such writes.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.projects.models import ProjectMember
+
+from .models import Task, TaskSyncRemoval
+
+
+def overlap():
+    return datetime.timedelta(seconds=getattr(settings, 'TASK_CHANGES_OVERLAP_SECONDS', 300))
+
+
+def retention():
+    return datetime.timedelta(days=getattr(settings, 'TASK_SYNC_REMOVAL_RETENTION_DAYS', 30))
+
+
+def _viewers(project_id, assignee_id, members):
+    if project_id not in members:
+        members[project_id] = set(ProjectMember.objects.filter(project_id=project_id).values_list('user_id', flat=True))
+    viewers = set(members[project_id])
+    if assignee_id is not None:
+        viewers.add(assignee_id)
+    return viewers
+
+
+def record_task_exit(task, old, new):
+    """Record the users who lost sight of `task` going from `old` to `new`.
+
+    `old` and `new` are `counters.TaskState`s. Deleted tasks are reported
+    as tombstones instead.
+    """
+    if old is None or not old.live or not new.live:
+        return
+    if (old.assignee_id, old.project_id) == (new.assignee_id, new.project_id):
+        return
+    members = {}
+    lost = _viewers(old.project_id, old.assignee_id, members) - _viewers(new.project_id, new.assignee_id, members)
+    TaskSyncRemoval.objects.bulk_create(
+        [TaskSyncRemoval(user_id=user_id, task_id=task.pk, removed_at=task.modified_at) for user_id in sorted(lost)]
+    )
+
+
+def record_member_exit(project_id, user_id):
+    """Record the project's tasks `user_id` no longer sees after leaving it."""
+    now = timezone.now()
+    task_ids = (
+        Task.objects.filter(project_id=project_id, deleted_at__isnull=True)
+        .exclude(assignee_id=user_id).values_list('id', flat=True)
+    )
+    TaskSyncRemoval.objects.bulk_create(
+        [TaskSyncRemoval(user_id=user_id, task_id=task_id, removed_at=now) for task_id in task_ids],
+        batch_size=1000,
+    )
+
+
+def member_removed(sender, instance, **kwargs):
+    """Signal receiver for deleted `ProjectMember` rows."""
+    record_member_exit(instance.project_id, instance.user_id)
+
+
+def removals_after(user_id, modified_at=None, task_id=None):
+    """The user's removals after the `(modified_at, task_id)` cursor."""
+    rows = TaskSyncRemoval.objects.filter(user_id=user_id)
+    if modified_at is not None:
+        if task_id is None:
+            rows = rows.filter(removed_at__gt=modified_at)
+        else:
+            rows = rows.filter(Q(removed_at__gt=modified_at) | Q(removed_at=modified_at, task_id__gt=task_id))
+    return rows.order_by('removed_at', 'task_id')
+
+
+def purge(now=None):
+    """Delete removals older than the retention period. Returns the count."""
+    cutoff = (now or timezone.now()) - retention()
+    deleted, _ = TaskSyncRemoval.objects.filter(removed_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,168 @@
+# apps/tasks/tagging.py
+"""Task tags: assignment, AND/OR filtering and cached per-project counts.
+
+Tags are user-created and unbounded, so names are resolved to ids with
+one query on the unique `name` index rather than through `lookups`, and
+filters never join `tbl_tags`. `?tags=a,b` (all of) compiles to one
+semi-join on `tbl_task_tags` grouped by task with
+`HAVING COUNT(DISTINCT tag_id) = <number of tags>`; `?tags_any=a,b`
+(any of) is a single `EXISTS`. Both are served by the `(tag, task)` index.
+
+`project_tag_counts()` counts live tasks per tag for a project with one
+GROUP BY and caches the result for `TAG_COUNTS_CACHE_TTL` seconds;
+`set_tags()` invalidates it, and so does `Task.save()` (through
+`invalidate_for_transition()`) for both the old and the new project when
+a task is moved, deleted or restored.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+
+from .models import Tag, TaskTag
+
+MAX_TAGS_PER_TASK = 20
+MAX_TAG_LENGTH = 50
+
+
+def normalize(names):
+    """Lowercase, strip and de-duplicate tag names, keeping their order."""
+    if isinstance(names, str):
+        names = names.split(',')
+    seen = []
+    for name in names:
+        name = ' '.join(str(name).split()).lower()[:MAX_TAG_LENGTH]
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def ids_by_name(names):
+    """`{name: id}` for the existing live tags among `names`."""
+    return dict(Tag.objects.filter(name__in=names, deleted_at__isnull=True).values_list('name', 'id'))
+
+
+def _ensure_tags(names):
+    ids = ids_by_name(names)
+    for name in names:
+        if name in ids:
+            continue
+        try:
+            with transaction.atomic():
+                tag, _ = Tag.objects.get_or_create(name=name, defaults={'created_at': timezone.now()})
+        except IntegrityError:
+            # Created concurrently.
+            tag = Tag.objects.get(name=name)
+        if tag.deleted_at is not None:
+            tag.deleted_at = None
+            tag.save(update_fields=['deleted_at'])
+        ids[name] = tag.pk
+    return ids
+
+
+def tag_names(task):
+    """The task's live tag names, sorted.
+
+    Uses `tag_links` with their tags as prefetched by
+    `hierarchy.with_relations()`, else one query.
+    """
+    if 'tag_links' in getattr(task, '_prefetched_objects_cache', {}):
+        return sorted(link.tag.name for link in task.tag_links.all() if link.tag.deleted_at is None)
+    return sorted(Tag.objects.filter(task_links__task=task, deleted_at__isnull=True).values_list('name', flat=True))
+
+
+def set_tags(task, names):
+    """Make `names` the task's tags, changing only the rows that differ."""
+    names = normalize(names)
+    ids = _ensure_tags(names)
+    wanted = set(ids.values())
+    current = dict(TaskTag.objects.filter(task=task).values_list('tag_id', 'tag__name'))
+    if wanted == set(current):
+        return
+    before = sorted(current.values())
+    TaskTag.objects.filter(task=task, tag_id__in=set(current) - wanted).delete()
+    TaskTag.objects.bulk_create(
+        [TaskTag(task=task, tag_id=pk) for pk in wanted - set(current)], ignore_conflicts=True,
+    )
+    # Drop tag links prefetched with the task so it is serialized fresh.
+    getattr(task, '_prefetched_objects_cache', {}).pop('tag_links', None)
+    # Reported by the activity log along with the task's own fields.
+    changes = getattr(task, 'last_changes', None) or {}
+    changes['tags'] = [before, sorted(names)]
+    task.last_changes = changes
+    invalidate_counts(task.project_id)
+
+
+def filter_all(queryset, names):
+    """Tasks carrying every tag in `names`."""
+    names = normalize(names)
+    if not names:
+        return queryset
+    ids = ids_by_name(names)
+    if len(ids) < len(names):
+        return queryset.none()
+    matching = (
+        TaskTag.objects.filter(tag_id__in=ids.values())
+        .values('task_id')
+        .annotate(matched=Count('tag_id', distinct=True))
+        .filter(matched=len(ids))
+        .values('task_id')
+    )
+    return queryset.filter(id__in=matching)
+
+
+def filter_any(queryset, names):
+    """Tasks carrying at least one tag in `names`."""
+    names = normalize(names)
+    if not names:
+        return queryset
+    ids = ids_by_name(names)
+    if not ids:
+        return queryset.none()
+    return queryset.filter(Exists(TaskTag.objects.filter(task_id=OuterRef('pk'), tag_id__in=ids.values())))
+
+
+def _counts_key(project_id):
+    return f'tag_counts:{project_id}'
+
+
+def project_tag_counts(project_id):
+    """`[{"name", "count"}]` of live tasks per tag in a project, most used first."""
+    key = _counts_key(project_id)
+    counts = cache.get(key)
+    if counts is None:
+        rows = (
+            TaskTag.objects.filter(
+                task__project_id=project_id, task__deleted_at__isnull=True, tag__deleted_at__isnull=True,
+            )
+            .values('tag__name').annotate(n=Count('id')).order_by()
+        )
+        counts = sorted(
+            ({'name': row['tag__name'], 'count': row['n']} for row in rows),
+            key=lambda item: (-item['count'], item['name']),
+        )
+        cache.set(key, counts, getattr(settings, 'TAG_COUNTS_CACHE_TTL', 300))
+    return counts
+
+
+def invalidate_counts(project_id):
+    key = _counts_key(project_id)
+    cache.delete(key)
+    # Again after commit, in case a reader cached the old counts meanwhile.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_for_transition(old, new):
+    """Invalidate counts a task write may have changed.
+
+    `old` and `new` are the task's `counters.TaskState` before and after
+    the write. Only a change of project or liveness moves the task's tags
+    between counts; tag edits go through `set_tags()`.
+    """
+    if old is None or new is None:
+        return
+    if (old.project_id, old.live) == (new.project_id, new.live):
+        return
+    for project_id in {old.project_id, new.project_id}:
+        invalidate_counts(project_id)
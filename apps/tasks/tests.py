@@ -1,3 +1,971 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import logging
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.serializers import MyTokenObtainPairSerializer
+from apps.projects import membership
+from apps.projects.models import Project, ProjectMember
+from backend import counting, idempotency
+from backend.concurrency import VersionConflict
+
+from . import activity, counters, events, hierarchy, ranking, reminders, snapshots, sse, sync, tagging
+from .models import AssigneeWorkload, ProjectDailySnapshot, ProjectStatusCount, Task, TaskClosure, TaskReminder, TaskStatus
+from .permissions import IsProjectMemberOrReadOnly
+from .serializers import TaskSerializer
+from .viewsets import TaskViewSet, encode_changes_cursor
+
+User = get_user_model()
+
+
+class RankKeyTests(SimpleTestCase):
+
+    def test_appends_stay_short(self):
+        keys = [ranking.key_between(None, None)]
+        for _ in range(5000):
+            keys.append(ranking.key_between(keys[-1], None))
+        self.assertEqual(keys, sorted(set(keys)))
+        for key in keys:
+            ranking.validate(key)
+        self.assertLessEqual(max(len(key) for key in keys), 5)
+
+    def test_append_after_any_key(self):
+        for key in ('z', 'zz', 'y', 'yz', 'ji', 'zz1', 'zyz'):
+            after = ranking.key_after(key)
+            ranking.validate(after)
+            self.assertGreater(after, key)
+
+    def test_key_between_neighbours(self):
+        for a, b in (('i', 'j'), ('y', 'z01'), ('0i', '1'), (None, '1')):
+            key = ranking.key_between(a, b)
+            ranking.validate(key)
+            self.assertTrue((a is None or a < key) and key < b)
+
+
+class TaskApiTestCase(TestCase):
+    """Seeded admin, a regular user and an empty project."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.select_related('role').get(username='admin')
+        cls.bob = User.objects.create_user(
+            'bob', 'bob@example.com', 'pw', full_name='Bob', created_at=timezone.now(), role_id=3,
+        )
+        cls.project = Project.objects.create(
+            name='P', description='x', created_by=cls.admin,
+            project_start_date=timezone.now(), project_end_date=timezone.now() + datetime.timedelta(days=30),
+        )
+        statuses = {status.name: status.id for status in TaskStatus.objects.all()}
+        cls.todo, cls.done = statuses['todo'], statuses['completed']
+
+    def setUp(self):
+        self.client = APIClient()
+        self.login(self.admin)
+
+    def login(self, user):
+        # Object permissions read the role from the JWT payload.
+        token = MyTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def create(self, title='t', **fields):
+        data = {'title': title, 'description': 'x', 'project_id': self.project.id, 'status_id': self.todo, **fields}
+        response = self.client.post('/api/tasks/', data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+
+class ConditionalUpdateTests(TaskApiTestCase):
+
+    def test_stale_if_match_is_rejected(self):
+        task = self.create()
+        response = self.client.patch(f"/api/tasks/{task['id']}/", {'title': 'u1'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"2"')
+        response = self.client.patch(f"/api/tasks/{task['id']}/", {'title': 'u2'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Task.objects.get(pk=task['id']).title, 'u1')
+
+    def test_concurrent_save_conflicts(self):
+        task = self.create()
+        stale = Task.objects.get(pk=task['id'])
+        Task.objects.get(pk=task['id']).save()
+        with mock.patch.object(TaskViewSet, 'get_object', return_value=stale):
+            response = self.client.patch(f"/api/tasks/{task['id']}/", {'title': 'lost'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Task.objects.get(pk=task['id']).version, 2)
+        with self.assertRaises(VersionConflict):
+            stale.save()
+
+class IdempotencyTests(TaskApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.data = {'title': 'once', 'description': 'x', 'project_id': self.project.id, 'status_id': self.todo}
+
+    def post(self, key, data=None):
+        return self.client.post('/api/tasks/', data or self.data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def claim(self, key, **entry):
+        # What the first request leaves in the cache while it is running.
+        request = SimpleNamespace(user=self.admin, method='POST', path='/api/tasks/', data=self.data)
+        cache_key = idempotency._cache_key(request, key)
+        cache.set(cache_key, {'state': idempotency.PENDING, 'fingerprint': idempotency.request_fingerprint(request), **entry})
+        return cache_key
+
+    def test_idempotent_create_is_replayed(self):
+        first = self.post('test-create-once')
+        second = self.post('test-create-once')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json()['id'], first.data['id'])
+        self.assertEqual(Task.objects.filter(title='once').count(), 1)
+
+    def test_key_reused_for_another_body_is_rejected(self):
+        self.assertEqual(self.post('reused').status_code, 201)
+        response = self.post('reused', {**self.data, 'title': 'other'})
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(Task.objects.filter(title='other').exists())
+
+    def test_duplicate_waits_for_the_running_request(self):
+        cache_key = self.claim('in-flight')
+
+        def first_request_finishes(seconds):
+            entry = {**cache.get(cache_key), 'state': idempotency.DONE, 'status': 201, 'data': {'id': 42}, 'headers': {}}
+            cache.set(cache_key, entry)
+
+        with mock.patch.object(idempotency.time, 'sleep', side_effect=first_request_finishes):
+            response = self.post('in-flight')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(response.json(), {'id': 42})
+        self.assertFalse(Task.objects.filter(title='once').exists())
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_duplicate_gets_409_while_the_first_is_still_running(self):
+        self.claim('in-flight')
+        response = self.post('in-flight')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Task.objects.filter(title='once').exists())
+
+
+class BatchRequestTests(TaskApiTestCase):
+
+    def batch(self, *items, **extra):
+        return self.client.post('/api/batch/', {'requests': list(items)}, format='json', **extra)
+
+    def test_items_run_in_order_as_the_caller(self):
+        task = self.create('a')
+        response = self.batch(
+            {'id': 'before', 'method': 'GET', 'path': f'/api/tasks/?project_id={self.project.id}'},
+            {'id': 'rename', 'method': 'PATCH', 'path': f"/api/tasks/{task['id']}/", 'body': {'title': 'b'},
+             'headers': {'If-Match': '"1"'}},
+            {'id': 'stale', 'method': 'PATCH', 'path': f"/api/tasks/{task['id']}/", 'body': {'title': 'c'},
+             'headers': {'If-Match': '"1"'}},
+            {'id': 'after', 'method': 'GET', 'path': f"/api/tasks/{task['id']}/"},
+            {'id': 'missing', 'path': '/api/nothing-here/'},
+        )
+        self.assertEqual(response.status_code, 200)
+        results = {item['id']: item for item in response.data['responses']}
+        self.assertEqual(list(results), ['before', 'rename', 'stale', 'after', 'missing'])
+        self.assertEqual(
+            [item['status'] for item in results.values()], [200, 200, 412, 200, 404],
+        )
+        self.assertEqual([t['title'] for t in results['before']['body']], ['a'])
+        self.assertEqual(results['after']['body']['title'], 'b')
+        self.assertEqual(results['rename']['headers']['ETag'], '"2"')
+        # A write in the batch pins the client to the primary.
+        self.assertIn('db_pin', response.cookies)
+
+    def test_items_keep_the_callers_permissions(self):
+        task = self.create('a')
+        self.login(self.bob)
+        response = self.batch(
+            {'method': 'PATCH', 'path': f"/api/tasks/{task['id']}/", 'body': {'title': 'x'},
+             'headers': {'Authorization': f'Bearer {AccessToken.for_user(self.admin)}'}},
+            {'method': 'GET', 'path': f'/api/tasks/?project_id={self.project.id}'},
+        )
+        self.assertEqual([item['status'] for item in response.data['responses']], [404, 200])
+        self.assertEqual(response.data['responses'][1]['body'], [])
+        self.assertEqual(Task.objects.get(pk=task['id']).title, 'a')
+        self.assertNotIn('db_pin', response.cookies)
+
+    def test_invalid_batches_are_rejected(self):
+        self.assertEqual(self.client.post('/api/batch/', {'requests': []}, format='json').status_code, 400)
+        self.assertEqual(self.batch({'method': 'GET', 'path': '/admin/'}).status_code, 400)
+        self.assertEqual(self.batch({'method': 'TRACE', 'path': '/api/tasks/'}).status_code, 400)
+        self.assertEqual(self.batch({'method': 'POST', 'path': '/api/batch/', 'body': {}}).status_code, 400)
+        with self.settings(BATCH_MAX_REQUESTS=1):
+            self.assertEqual(self.batch({'path': '/api/tasks/'}, {'path': '/api/tasks/'}).status_code, 400)
+        self.client.credentials()
+        self.assertEqual(self.batch({'path': '/api/tasks/'}).status_code, 401)
+
+    @override_settings(BATCH_TIME_BUDGET_SECONDS=0)
+    def test_items_past_the_time_budget_get_503(self):
+        response = self.batch({'path': '/api/tasks/'}, {'method': 'POST', 'path': '/api/tasks/', 'body': {}})
+        self.assertEqual([item['status'] for item in response.data['responses']], [503, 503])
+
+
+class CounterTests(TaskApiTestCase):
+
+    def assertCounts(self, total, open_count, by_status):
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual((project.task_count, project.open_task_count), (total, open_count))
+        stored = dict(ProjectStatusCount.objects.filter(project=project).exclude(count=0).values_list('status_id', 'count'))
+        self.assertEqual(stored, by_status)
+        self.assertEqual(counters.project_drift(), {})
+        self.assertEqual(counters.workload_drift(), {})
+
+    def test_create_move_and_delete(self):
+        deadline = (timezone.now() + datetime.timedelta(days=2)).isoformat()
+        a = self.create('a', assignee_id=self.bob.id, deadline=deadline)
+        self.create('b', status_id=self.done)
+        self.assertCounts(2, 1, {self.todo: 1, self.done: 1})
+        self.assertEqual(AssigneeWorkload.objects.get(user=self.bob).open_count, 1)
+
+        response = self.client.post(f"/api/tasks/{a['id']}/move/", {'status_id': self.done}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertCounts(2, 0, {self.done: 2})
+        workload = AssigneeWorkload.objects.get(user=self.bob)
+        self.assertEqual((workload.open_count, workload.done_count, workload.next_deadline), (0, 1, None))
+
+        self.assertEqual(self.client.delete(f"/api/tasks/{a['id']}/").status_code, 204)
+        self.assertCounts(1, 0, {self.done: 1})
+
+    def test_workload_endpoint(self):
+        now = timezone.now()
+        self.create('late', assignee_id=self.bob.id, deadline=(now - datetime.timedelta(days=1)).isoformat())
+        soon = now + datetime.timedelta(days=1)
+        self.create('soon', assignee_id=self.bob.id, deadline=soon.isoformat())
+        counters.refresh_overdue(now)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/workload/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['username']: row for row in response.data}
+        self.assertEqual(
+            (rows['bob']['open'], rows['bob']['overdue'], rows['bob']['done'], rows['bob']['overdue_as_of']),
+            (2, 1, 0, now),
+        )
+        self.assertEqual(rows['bob']['next_deadline'], now - datetime.timedelta(days=1))
+        self.assertEqual((rows['admin']['open'], rows['admin']['next_deadline']), (0, None))
+        # One row per user from the counters table: the cost does not grow with users.
+        for n in range(3):
+            User.objects.create_user(f'idle{n}', f'idle{n}@example.com', 'pw', full_name='x', created_at=now, role_id=3)
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(len(self.client.get('/api/tasks/workload/').data), len(rows) + 3)
+
+        response = self.client.get('/api/tasks/workload/', {'user_id': self.bob.id})
+        self.assertEqual([row['username'] for row in response.data], ['bob'])
+        self.assertEqual(self.client.get('/api/tasks/workload/', {'user_id': 'x'}).status_code, 400)
+        self.login(self.bob)
+        self.assertEqual(self.client.get('/api/tasks/workload/').status_code, 403)
+
+    def test_save_diffs_against_loaded_values(self):
+        a = self.create('a')
+        task = Task.objects.get(pk=a['id'])
+        self.assertNotIn('_original', task.__dict__)
+        task.status_id = self.done
+        task.title = 'renamed'
+        task.save()
+        self.assertEqual(task.last_changes, {'title': ['a', 'renamed'], 'status_id': [self.todo, self.done]})
+        self.assertCounts(1, 0, {self.done: 1})
+
+        task.title = 'again'
+        task.save(update_fields=['title'])
+        self.assertEqual(task.last_changes, {'title': ['renamed', 'again']})
+
+        # Only some fields loaded: the counted state is read back instead.
+        partial = Task.objects.only('id', 'status_id', 'version').get(pk=a['id'])
+        partial.status_id = self.todo
+        partial.save(update_fields=['status'])
+        self.assertCounts(1, 1, {self.todo: 1})
+
+
+class DeadlineWindowTests(TaskApiTestCase):
+    # A Monday, safely in the past so open tasks due then are overdue.
+    base = datetime.datetime(2020, 1, 6, 9, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        day = datetime.timedelta(days=1)
+        self.ids = {}
+        for title, deadline, status in (
+            ('a', self.base, self.todo),
+            ('b', self.base + day, self.done),
+            ('c', self.base + day + datetime.timedelta(hours=5), self.todo),
+            ('d', self.base + 7 * day, self.todo),
+            ('e', None, self.todo),
+            ('f', timezone.now() + 10 * day, self.todo),
+        ):
+            fields = {'deadline': deadline.isoformat()} if deadline else {}
+            self.ids[title] = self.create(title, status_id=status, **fields)['id']
+
+    def titles(self, **params):
+        response = self.client.get('/api/tasks/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(task['title'] for task in response.data)
+
+    def calendar(self, **params):
+        params = {'start': self.base.isoformat(), 'end': (self.base + datetime.timedelta(days=8)).isoformat(), **params}
+        return self.client.get('/api/tasks/calendar/', params)
+
+    def test_range_filters_are_inclusive(self):
+        after, before = self.base.isoformat(), (self.base + datetime.timedelta(days=1)).isoformat()
+        self.assertEqual(self.titles(deadline_after=after, deadline_before=before), ['a', 'b'])
+        self.assertEqual(self.titles(deadline_before=after), ['a'])
+        self.assertEqual(self.titles(created_at_after=(timezone.now() - datetime.timedelta(minutes=1)).isoformat()),
+                         list('abcdef'))
+        self.assertEqual(self.titles(created_at_before=self.base.isoformat()), [])
+        Task.objects.filter(pk=self.ids['c']).update(modified_at=self.base)
+        self.assertEqual(self.titles(modified_at_before=(self.base + datetime.timedelta(hours=1)).isoformat()), ['c'])
+        self.assertEqual(self.client.get('/api/tasks/', {'deadline_after': 'soon'}).status_code, 400)
+
+    def test_overdue_filter(self):
+        self.assertEqual(self.titles(overdue='true'), ['a', 'c', 'd'])
+        self.assertEqual(self.titles(overdue='false'), ['b', 'e', 'f'])
+        self.assertEqual(self.titles(overdue='true', deadline_after=(self.base + datetime.timedelta(days=2)).isoformat()), ['d'])
+
+    def test_calendar_counts_per_day_and_week(self):
+        response = self.calendar()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'date': '2020-01-06', 'total': 1, 'open': 1, 'done': 0, 'overdue': 1},
+            {'date': '2020-01-07', 'total': 2, 'open': 1, 'done': 1, 'overdue': 1},
+            {'date': '2020-01-13', 'total': 1, 'open': 1, 'done': 0, 'overdue': 1},
+        ])
+        self.assertEqual(self.calendar(bucket='week').data['results'], [
+            {'date': '2020-01-06', 'total': 3, 'open': 2, 'done': 1, 'overdue': 2},
+            {'date': '2020-01-13', 'total': 1, 'open': 1, 'done': 0, 'overdue': 1},
+        ])
+
+    def test_calendar_uses_list_filters_and_visibility(self):
+        self.assertEqual([row['total'] for row in self.calendar(status=self.done).data['results']], [1])
+        self.assertEqual(self.calendar(project_id=self.project.id + 1).data['results'], [])
+        self.login(self.bob)
+        self.assertEqual(self.calendar().data['results'], [])
+
+    def test_calendar_rejects_bad_ranges(self):
+        self.assertEqual(self.client.get('/api/tasks/calendar/', {'start': self.base.isoformat()}).status_code, 400)
+        self.assertEqual(self.calendar(end=self.base.isoformat()).status_code, 400)
+        self.assertEqual(self.calendar(end=(self.base + datetime.timedelta(days=401)).isoformat()).status_code, 400)
+        self.assertEqual(self.calendar(bucket='month').status_code, 400)
+
+
+class BoardTests(TaskApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [self.create(f't{n}')['id'] for n in range(5)]
+        self.create('done', status_id=self.done, assignee_id=self.bob.id)
+
+    def board(self, **params):
+        response = self.client.get(f'/api/projects/{self.project.id}/board/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def column(self, status_id, **params):
+        columns = {column['status']['id']: column for column in self.board(**params)['columns']}
+        return columns[status_id]
+
+    def test_columns_hold_the_first_tasks_and_totals(self):
+        columns = {column['status']['name']: column for column in self.board(limit=2)['columns']}
+        self.assertEqual(list(columns), [status.name for status in TaskStatus.objects.order_by('id')])
+        todo, done = columns['todo'], columns['completed']
+        self.assertEqual((todo['total'], [task['title'] for task in todo['tasks']]), (5, ['t0', 't1']))
+        self.assertIsNotNone(todo['next_cursor'])
+        self.assertEqual((done['total'], len(done['tasks']), done['next_cursor']), (1, 1, None))
+        self.assertEqual(columns['in progress'], {**columns['in progress'], 'total': 0, 'tasks': [], 'next_cursor': None})
+
+    def test_query_count_does_not_grow_with_the_tasks(self):
+        # The sampled INFO record of the project lookup adds a lazy COUNT(*).
+        logger = logging.getLogger('apps.projects.viewsets')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.WARNING)
+        self.board(limit=2)  # fill the cached status lookup
+        with CaptureQueriesContext(connection) as queries:
+            self.board(limit=2)
+        # Read it now: every request resets the connection's query log.
+        expected = len(queries)
+        for n in range(5):
+            self.create(f'more{n}')
+        with self.assertNumQueries(expected):
+            self.board(limit=2)
+
+    def test_cursor_continues_one_column(self):
+        first = self.column(self.todo, limit=2)
+        titles, cursor = [task['title'] for task in first['tasks']], first['next_cursor']
+        while cursor:
+            page = self.board(status_id=self.todo, cursor=cursor, limit=2)
+            self.assertEqual(page['status_id'], self.todo)
+            titles += [task['title'] for task in page['tasks']]
+            cursor = page['next_cursor']
+        self.assertEqual(titles, ['t0', 't1', 't2', 't3', 't4'])
+        response = self.client.get(f'/api/projects/{self.project.id}/board/', {'status_id': self.todo, 'cursor': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_columns_follow_the_manual_order(self):
+        response = self.client.post(f'/api/tasks/{self.ids[4]}/move/', {'before_id': self.ids[0]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([task['title'] for task in self.column(self.todo, limit=3)['tasks']], ['t4', 't0', 't1'])
+
+    def test_other_users_only_see_their_tasks(self):
+        self.login(self.bob)
+        self.assertEqual([column['total'] for column in self.board()['columns'] if column['total']], [1])
+        ProjectMember.objects.create(project=self.project, user=self.bob, created_at=timezone.now())
+        self.assertEqual(self.column(self.todo)['total'], 5)
+
+
+class ActivityHistoryTests(TaskApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(activity.flush)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = self.create('a')
+        self.url = f"/api/tasks/{self.task['id']}/"
+
+    def write(self, method, path, data, **headers):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(self.url + path, data, format='json', **headers)
+
+    def history(self, **params):
+        response = self.client.get(self.url + 'history/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_records_who_changed_what(self):
+        self.assertEqual(self.write('patch', '', {'title': 'b'}).status_code, 200)
+        self.assertEqual(self.write('patch', 'status/', {'status_id': self.done}).status_code, 200)
+        # Writes that fail or change nothing leave no trace.
+        self.assertEqual(self.write('patch', '', {'title': 'c'}, HTTP_IF_MATCH='"1"').status_code, 412)
+        self.assertEqual(self.write('patch', '', {'title': 'b'}).status_code, 200)
+
+        # Rows still in the buffer are flushed before the history is read.
+        self.assertGreater(activity._buffer.pending(), 0)
+        rows = self.history()['results']
+        self.assertEqual([row['action'] for row in rows], ['status', 'updated', 'created'])
+        self.assertEqual(rows[0]['changes'], {'status_id': [self.todo, self.done]})
+        self.assertEqual(rows[1]['changes'], {'title': ['a', 'b']})
+        self.assertEqual(rows[2]['changes']['title'], [None, 'a'])
+        self.assertEqual(rows[0]['actor'], {'id': self.admin.id, 'username': 'admin'})
+
+    def test_pages_newest_first(self):
+        for title in ('b', 'c', 'd'):
+            self.write('patch', '', {'title': title})
+        page = self.history(limit=2)
+        self.assertTrue(page['has_more'])
+        self.assertEqual([row['changes']['title'][1] for row in page['results']], ['d', 'c'])
+        page = self.history(limit=2, before=page['next_cursor'])
+        self.assertEqual([row['changes']['title'][1] for row in page['results']], ['b', 'a'])
+        self.assertEqual((page['has_more'], page['next_cursor']), (False, None))
+        self.assertEqual(self.client.get(self.url + 'history/', {'before': 'x'}).status_code, 400)
+
+    def test_history_is_scoped_like_the_task(self):
+        self.login(self.bob)
+        self.assertEqual(self.client.get(self.url + 'history/').status_code, 404)
+
+
+class SnapshotTests(TaskApiTestCase):
+    day0 = datetime.datetime(2026, 1, 5, 12, tzinfo=datetime.timezone.utc)
+
+    def at(self, days, hours=0):
+        return mock.patch.object(timezone, 'now', return_value=self.day0 + datetime.timedelta(days=days, hours=hours))
+
+    def snapshot(self, days):
+        # An hour after the day's writes, past the overlap with the previous run.
+        with self.at(days, hours=1):
+            return snapshots.take_snapshots()
+
+    def counts(self, project, days):
+        day = (self.day0 + datetime.timedelta(days=days)).date()
+        return dict(ProjectDailySnapshot.objects.filter(project=project, day=day).exclude(count=0).values_list('status_id', 'count'))
+
+    def test_projects_a_task_left_are_snapshotted(self):
+        other = Project.objects.create(
+            name='Q', description='x', created_by=self.admin,
+            project_start_date=self.day0, project_end_date=self.day0 + datetime.timedelta(days=30),
+        )
+        with self.at(0):
+            a, b, c = (Task(title=t, description='x', project=p, status_id=self.todo) for t, p in (
+                ('a', self.project), ('b', self.project), ('c', other),
+            ))
+            for task in (a, b, c):
+                task.save()
+        self.assertEqual(self.snapshot(0), 2)
+
+        # Moving a task out of a project changes both projects.
+        with self.at(1):
+            a.project = other
+            a.save()
+        self.assertEqual(self.snapshot(1), 2)
+        self.assertEqual((self.counts(self.project, 1), self.counts(other, 1)), ({self.todo: 1}, {self.todo: 2}))
+
+        # Edits that leave the counts alone do not.
+        with self.at(2):
+            b.title = 'renamed'
+            b.save()
+        self.assertEqual(self.snapshot(2), 0)
+
+        # Bulk deletes bypass the counters; the rebuild marks every project.
+        Task.objects.filter(pk=c.pk).delete()
+        with self.at(3):
+            counters.rebuild_projects()
+        self.assertEqual(self.snapshot(3), 2)
+        self.assertEqual(self.counts(other, 3), {self.todo: 1})
+
+        totals = [day['total'] for day in snapshots.burndown(self.project.id, self.day0.date(), (self.day0 + datetime.timedelta(days=3)).date())]
+        self.assertEqual(totals, [2, 1, 1, 1])
+
+    def test_status_change_is_snapshotted(self):
+        with self.at(0):
+            task = Task(title='a', description='x', project=self.project, status_id=self.todo)
+            task.save()
+        self.snapshot(0)
+        with self.at(1):
+            task.status_id = self.done
+            task.save()
+        self.assertEqual(self.snapshot(1), 1)
+        self.assertEqual(self.counts(self.project, 1), {self.done: 1})
+
+
+class ClosureTests(TaskApiTestCase):
+
+    def closure(self, task_id):
+        return set(TaskClosure.objects.filter(descendant_id=task_id).values_list('ancestor_id', 'depth'))
+
+    def test_reparent_moves_the_subtree(self):
+        a = self.create('a')['id']
+        b = self.create('b', parent_id=a)['id']
+        c = self.create('c', parent_id=b)['id']
+        d = self.create('d')['id']
+        self.assertEqual(self.closure(c), {(c, 0), (b, 1), (a, 2)})
+
+        response = self.client.patch(f'/api/tasks/{b}/', {'parent_id': d}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.closure(b), {(b, 0), (d, 1)})
+        self.assertEqual(self.closure(c), {(c, 0), (b, 1), (d, 2)})
+        self.assertEqual(set(hierarchy.descendants(a).values_list('id', flat=True)), set())
+
+        response = self.client.patch(f'/api/tasks/{d}/', {'parent_id': c}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.closure(d), {(d, 0)})
+
+    def test_move_rechecks_after_validation(self):
+        # As if another request moved `b` under `a` after `validate()` ran.
+        a = self.create('a')['id']
+        b = self.create('b', parent_id=a)['id']
+        with mock.patch.object(TaskSerializer, 'validate', lambda serializer, attrs: attrs):
+            response = self.client.patch(f'/api/tasks/{a}/', {'parent_id': b}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent_id', response.data)
+        self.assertEqual(self.closure(a), {(a, 0)})
+        self.assertIsNone(Task.objects.get(pk=a).parent_id)
+
+    def test_dependency_cycle_is_rejected(self):
+        a, b, c = (Task.objects.get(pk=self.create(title)['id']) for title in 'abc')
+        hierarchy.add_dependency(a, b)
+        hierarchy.add_dependency(b, c)
+        with self.assertRaises(hierarchy.HierarchyError):
+            hierarchy.add_dependency(c, a)
+        response = self.client.post(f'/api/tasks/{c.id}/dependencies/', {'blocked_by_id': a.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_dependencies_only_list_visible_blockers(self):
+        task = Task.objects.get(pk=self.create('mine', assignee_id=self.bob.id)['id'])
+        hidden = Task.objects.get(pk=self.create('hidden')['id'])
+        shown = Task.objects.get(pk=self.create('shown', assignee_id=self.bob.id)['id'])
+        hierarchy.add_dependency(task, hidden)
+        hierarchy.add_dependency(task, shown)
+        url = f'/api/tasks/{task.id}/dependencies/'
+        self.assertEqual([row['title'] for row in self.client.get(url).data], ['hidden', 'shown'])
+        self.login(self.bob)
+        self.assertEqual([row['title'] for row in self.client.get(url).data], ['shown'])
+
+
+class TagTests(TaskApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.ids = {title: self.create(title, tags=tags)['id'] for title, tags in (
+            ('a', ['x', 'y']), ('b', ['X ']), ('c', ['y']), ('d', []),
+        )}
+
+    def titles(self, **params):
+        response = self.client.get('/api/tasks/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(task['title'] for task in response.data)
+
+    def counts(self, project_id=None):
+        return self.client.get(f'/api/projects/{project_id or self.project.id}/tags/').data
+
+    def test_all_and_any_filters(self):
+        self.assertEqual(self.titles(tags='x,y'), ['a'])
+        self.assertEqual(self.titles(tags=' X '), ['a', 'b'])
+        self.assertEqual(self.titles(tags_any='x,y'), ['a', 'b', 'c'])
+        self.assertEqual(self.titles(tags='x,unknown'), [])
+        self.assertEqual(self.titles(tags_any='unknown'), [])
+        self.assertEqual(self.titles(tags_any='unknown,y'), ['a', 'c'])
+
+    def test_tags_are_returned_and_replaced(self):
+        url = f"/api/tasks/{self.ids['a']}/"
+        self.assertEqual(self.client.get(url).data['tags'], ['x', 'y'])
+        response = self.client.patch(url, {'tags': ['z', 'x']}, format='json')
+        self.assertEqual(response.data['tags'], ['x', 'z'])
+        self.assertEqual(self.titles(tags='y'), ['c'])
+
+    def test_counts_follow_tag_edits_moves_and_deletes(self):
+        other = Project.objects.create(
+            name='Q', description='x', created_by=self.admin,
+            project_start_date=timezone.now(), project_end_date=timezone.now() + datetime.timedelta(days=30),
+        )
+        self.assertEqual(self.counts(), [{'name': 'x', 'count': 2}, {'name': 'y', 'count': 2}])
+        self.assertEqual(self.counts(other.id), [])
+
+        self.client.patch(f"/api/tasks/{self.ids['d']}/", {'tags': ['y']}, format='json')
+        self.assertEqual(self.counts(), [{'name': 'y', 'count': 3}, {'name': 'x', 'count': 2}])
+
+        # Both the project the task left and the one it joined are recounted.
+        response = self.client.patch(f"/api/tasks/{self.ids['b']}/", {'project_id': other.id}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.counts(), [{'name': 'y', 'count': 3}, {'name': 'x', 'count': 1}])
+        self.assertEqual(self.counts(other.id), [{'name': 'x', 'count': 1}])
+
+        self.assertEqual(self.client.delete(f"/api/tasks/{self.ids['c']}/").status_code, 204)
+        self.assertEqual(self.counts(), [{'name': 'y', 'count': 2}, {'name': 'x', 'count': 1}])
+
+        # Writes outside the API are covered too.
+        task = Task.objects.get(pk=self.ids['a'])
+        task.project = other
+        task.save()
+        self.assertEqual(self.counts(), [{'name': 'y', 'count': 1}])
+        self.assertEqual(tagging.project_tag_counts(other.id), [{'name': 'x', 'count': 2}, {'name': 'y', 'count': 1}])
+
+
+@override_settings(TASK_CHANGES_OVERLAP_SECONDS=0)
+class ChangesTests(TaskApiTestCase):
+
+    def changes(self, cursor=None, **params):
+        if cursor:
+            params['since'] = cursor
+        response = self.client.get('/api/tasks/changes/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_pages_through_changes_by_cursor(self):
+        ids = [self.create(title)['id'] for title in 'abc']
+        page = self.changes(limit=2)
+        self.assertEqual([task['id'] for task in page['results']], ids[:2])
+        self.assertTrue(page['has_more'])
+        page = self.changes(page['next_cursor'], limit=2)
+        self.assertEqual([task['id'] for task in page['results']], ids[2:])
+        self.assertFalse(page['has_more'])
+
+        cursor = page['next_cursor']
+        self.assertEqual(self.changes(cursor)['results'], [])
+        self.client.patch(f'/api/tasks/{ids[0]}/', {'title': 'a2'}, format='json')
+        self.assertEqual([task['title'] for task in self.changes(cursor)['results']], ['a2'])
+
+    def test_deleted_tasks_are_tombstones(self):
+        task = self.create()
+        cursor = self.changes()['next_cursor']
+        self.assertEqual(self.client.delete(f"/api/tasks/{task['id']}/").status_code, 204)
+        page = self.changes(cursor)
+        self.assertEqual(page['results'], [])
+        self.assertEqual([entry['id'] for entry in page['deleted']], [task['id']])
+
+    def test_tasks_leaving_a_members_view_are_removed(self):
+        other = Project.objects.create(
+            name='Other', description='x', created_by=self.admin,
+            project_start_date=timezone.now(), project_end_date=timezone.now() + datetime.timedelta(days=30),
+        )
+        ProjectMember.objects.create(project=self.project, user=self.bob)
+        moved, kept, assigned = (self.create(title)['id'] for title in ('moved', 'kept', 'assigned'))
+        self.client.patch(f'/api/tasks/{assigned}/', {'assignee_id': self.bob.id}, format='json')
+
+        self.login(self.bob)
+        page = self.changes()
+        self.assertEqual({task['id'] for task in page['results']}, {moved, kept, assigned})
+        cursor = page['next_cursor']
+
+        self.login(self.admin)
+        self.client.patch(f'/api/tasks/{moved}/', {'project_id': other.id}, format='json')
+        self.login(self.bob)
+        page = self.changes(cursor)
+        self.assertEqual((page['results'], page['removed']), ([], [moved]))
+        cursor = page['next_cursor']
+
+        # Leaving the project hides its tasks, except those assigned to bob.
+        ProjectMember.objects.filter(project=self.project, user=self.bob).delete()
+        page = self.changes(cursor)
+        self.assertEqual(page['removed'], [kept])
+        self.assertEqual(self.changes(page['next_cursor'])['removed'], [])
+
+    def test_old_cursor_needs_a_full_sync(self):
+        self.login(self.bob)
+        stale = encode_changes_cursor(timezone.now() - sync.retention() - datetime.timedelta(minutes=1), 0)
+        self.assertEqual(self.client.get('/api/tasks/changes/', {'since': stale}).status_code, 410)
+        self.assertEqual(self.client.get('/api/tasks/changes/', {'since': 'nonsense'}).status_code, 400)
+
+    @override_settings(TASK_CHANGES_OVERLAP_SECONDS=300)
+    def test_caught_up_cursor_rereads_recent_writes(self):
+        # A write stamped before the read but committed after it is not lost.
+        task = self.create()
+        page = self.changes()
+        self.assertFalse(page['has_more'])
+        self.assertEqual([entry['id'] for entry in self.changes(page['next_cursor'])['results']], [task['id']])
+
+
+class TaskEventStreamTests(SimpleTestCase):
+    """Drive the SSE ASGI app against a private in-memory broker."""
+
+    def token(self, user_id=5, role='user', seconds=60):
+        token = AccessToken()
+        token['user_id'] = user_id
+        token['role'] = role
+        token.set_exp(lifetime=datetime.timedelta(seconds=seconds))
+        return str(token)
+
+    def stream(self, token, published=(), projects=frozenset(), until_closed=False):
+        """Connect, publish `published` in order and return the body and project loads."""
+        broker = events.InMemoryBroker()
+        loads = []
+
+        def load_projects(user_id):
+            loads.append(user_id)
+            return projects[len(loads) - 1] if isinstance(projects, list) else projects
+
+        async def run():
+            inbox = asyncio.Queue()
+            sent = []
+
+            async def receive():
+                return await inbox.get()
+
+            async def send(message):
+                sent.append(message)
+
+            headers = [(b'authorization', f'Bearer {token}'.encode())] if token else []
+            app = asyncio.ensure_future(sse.task_events_app({'method': 'GET', 'headers': headers}, receive, send))
+            await asyncio.sleep(0.05)
+            for event in published:
+                broker.publish(event)
+                await asyncio.sleep(0.01)
+            if not until_closed:
+                await inbox.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(app, 5)
+            return sent
+
+        with mock.patch.object(sse, 'get_broker', return_value=broker), \
+                mock.patch.object(sse, 'member_project_ids', side_effect=load_projects):
+            sent = asyncio.run(run())
+        status = sent[0].get('status')
+        body = b''.join(message.get('body', b'') for message in sent[1:]).decode()
+        return status, body, loads
+
+    def task_event(self, task_id, project_id, audience=()):
+        return {'type': events.EVENT_UPDATED, 'task_id': task_id, 'project_id': project_id, 'audience': list(audience)}
+
+    def test_requires_a_valid_token(self):
+        self.assertEqual(self.stream(None)[0], 401)
+        self.assertEqual(self.stream('not-a-token')[0], 401)
+
+    def test_user_only_gets_visible_events(self):
+        status, body, loads = self.stream(self.token(), [
+            self.task_event(1, project_id=10),
+            self.task_event(2, project_id=20, audience=[5]),
+            self.task_event(3, project_id=20, audience=[6]),
+        ], projects=frozenset({10}))
+        self.assertEqual(status, 200)
+        self.assertIn('"task_id":1,', body)
+        self.assertIn('"task_id":2,', body)
+        self.assertNotIn('"task_id":3,', body)
+        self.assertEqual(loads, [5])
+
+    def test_admin_gets_every_event(self):
+        _, body, loads = self.stream(self.token(role='admin'), [self.task_event(3, project_id=20, audience=[6])])
+        self.assertIn('"task_id":3,', body)
+        self.assertEqual(loads, [])
+
+    @override_settings(TASK_EVENTS_KEEPALIVE_SECONDS=0.01)
+    def test_membership_event_reloads_projects(self):
+        _, body, loads = self.stream(self.token(), [
+            self.task_event(1, project_id=20),
+            {'type': events.EVENT_MEMBERSHIP, 'user_id': 6, 'project_id': 20},
+            {'type': events.EVENT_MEMBERSHIP, 'user_id': 5, 'project_id': 20},
+            self.task_event(2, project_id=20),
+        ], projects=[frozenset(), frozenset({20})])
+        # Keepalives alone do not reload the set.
+        self.assertIn(': keepalive', body)
+        self.assertEqual(loads, [5, 5])
+        self.assertNotIn('"task_id":1,', body)
+        self.assertIn('"task_id":2,', body)
+        self.assertEqual(body.count('event: membership'), 1)
+
+    @override_settings(TASK_EVENTS_KEEPALIVE_SECONDS=0.2)
+    def test_stream_ends_when_the_token_expires(self):
+        _, body, _ = self.stream(self.token(seconds=1), until_closed=True)
+        self.assertTrue(body.endswith('event: expired\ndata: {}\n\n'))
+
+    def test_slow_subscriber_is_told_to_resync(self):
+        broker = events.InMemoryBroker(queue_size=2)
+
+        async def run():
+            sub = broker.subscribe()
+            for task_id in range(5):
+                broker.publish(self.task_event(task_id, project_id=1))
+            await asyncio.sleep(0)
+            return sub
+
+        sub = asyncio.run(run())
+        self.assertTrue(sub.overflowed)
+
+
+class TaskEventPublishTests(TaskApiTestCase):
+
+    def test_writes_publish_after_commit(self):
+        # The commits also queue activity rows; write them inside this test.
+        self.addCleanup(activity.flush)
+        broker = mock.Mock()
+        with mock.patch.object(events, 'get_broker', return_value=broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                task = self.create(assignee_id=self.bob.id)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(f"/api/tasks/{task['id']}/", {'assignee_id': self.admin.id}, format='json')
+        created, updated = (call.args[0] for call in broker.publish.call_args_list)
+        self.assertEqual((created['type'], created['task_id'], created['audience']), ('created', task['id'], [self.bob.id]))
+        self.assertEqual(updated['type'], 'updated')
+        # The previous assignee still hears about it, so their view can drop it.
+        self.assertEqual(set(updated['audience']), {self.admin.id, self.bob.id})
+
+
+@override_settings(TASK_REMINDER_THRESHOLDS=[60, 1440])
+class DeadlineReminderTests(TaskApiTestCase):
+
+    def task(self, minutes, **fields):
+        fields.setdefault('assignee', self.bob)
+        fields.setdefault('status_id', self.todo)
+        task = Task(
+            title=f'due in {minutes}m', description='x', project=self.project,
+            deadline=self.now + datetime.timedelta(minutes=minutes), **fields,
+        )
+        task.save()
+        return task
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+
+    def sweep(self, minutes=0, **options):
+        mail.outbox = []
+        sent = reminders.sweep(now=self.now + datetime.timedelta(minutes=minutes), **options)
+        self.assertEqual(sent, len(mail.outbox))
+        return sorted(message.subject.split("'")[1] for message in mail.outbox)
+
+    def test_reminds_once_per_threshold(self):
+        soon = self.task(30)
+        later = self.task(600)
+        self.task(30, status_id=self.done)
+        self.task(30, assignee=None)
+        self.task(3000)
+
+        # `soon` crosses both thresholds at once but gets one email.
+        self.assertEqual(self.sweep(), ['due in 30m', 'due in 600m'])
+        self.assertEqual(soon.reminders.count(), 2)
+        self.assertEqual(mail.outbox[0].to, ['bob@example.com'])
+        self.assertEqual(self.sweep(), [])
+        self.assertEqual(self.sweep(minutes=545), ['due in 600m'])
+        self.assertEqual(later.reminders.count(), 2)
+
+    def test_rescheduled_task_is_reminded_again(self):
+        task = self.task(30)
+        self.assertEqual(self.sweep(), ['due in 30m'])
+        task.deadline += datetime.timedelta(minutes=10)
+        task.save()
+        self.assertEqual(self.sweep(), ['due in 30m'])
+        self.assertEqual(set(task.reminders.values_list('deadline', flat=True)), {task.deadline})
+
+    def test_failed_send_is_retried(self):
+        self.task(30)
+        with mock.patch.object(reminders, 'get_connection', side_effect=ConnectionError):
+            self.assertEqual(reminders.sweep(now=self.now), 0)
+        self.assertFalse(TaskReminder.objects.exists())
+        self.assertEqual(self.sweep(), ['due in 30m'])
+
+    def test_sweeps_in_batches(self):
+        for minutes in (10, 20, 30):
+            self.task(minutes)
+        self.assertEqual(self.sweep(batch_size=2), ['due in 10m', 'due in 20m', 'due in 30m'])
+
+    def test_prune_drops_passed_deadlines(self):
+        self.task(30)
+        self.sweep()
+        self.assertEqual(reminders.prune(now=self.now + datetime.timedelta(minutes=31)), 2)
+
+
+class CountedPaginationTests(TaskApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for title in 'abc':
+            self.create(title)
+
+    def test_lists_are_only_paginated_on_request(self):
+        response = self.client.get('/api/tasks/')
+        self.assertIsInstance(response.data, list)
+        response = self.client.get('/api/tasks/', {'page_size': 2})
+        self.assertEqual((response.data['count'], response.data['count_exact']), (3, True))
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    @override_settings(COUNT_EXACT_THRESHOLD=2)
+    def test_large_counts_are_cached(self):
+        response = self.client.get('/api/tasks/', {'page': 1, 'page_size': 2})
+        self.assertEqual((response.data['count'], response.data['count_exact']), (3, False))
+        self.create('d')
+        # Served from the cache until COUNT_CACHE_TTL passes.
+        response = self.client.get('/api/tasks/', {'page': 1, 'page_size': 2})
+        self.assertEqual(response.data['count'], 3)
+        cache.clear()
+        response = self.client.get('/api/tasks/', {'page': 1, 'page_size': 2})
+        self.assertEqual(response.data['count'], 4)
+
+    @override_settings(COUNT_EXACT_THRESHOLD=2, COUNT_STRATEGY='estimate')
+    def test_estimate_never_undercounts(self):
+        qs = Task.objects.all()
+        with mock.patch.object(counting, 'estimate_count', return_value=100):
+            self.assertEqual(counting.count_queryset(qs, scope='high'), (100, False))
+        with mock.patch.object(counting, 'estimate_count', return_value=1):
+            self.assertEqual(counting.count_queryset(qs, scope='low'), (3, False))
+        with mock.patch.object(counting, 'estimate_count', return_value=None):
+            self.assertEqual(counting.count_queryset(qs, scope='none'), (3, False))
+
+
+class MembershipPermissionTests(TaskApiTestCase):
+
+    def test_removed_member_loses_write_access_at_once(self):
+        task = Task.objects.get(pk=self.create()['id'])
+        request = SimpleNamespace(method='PATCH', auth={'user_id': self.bob.id}, user=self.bob)
+        permission = IsProjectMemberOrReadOnly()
+        ProjectMember.objects.create(project=self.project, user=self.bob)
+        self.assertTrue(permission.has_object_permission(request, None, task))
+
+        ProjectMember.objects.filter(project=self.project, user=self.bob).delete()
+        # As another worker would: its cached set still lists the project.
+        cache.set(membership._key(self.bob.id), frozenset({self.project.id}))
+        self.assertFalse(permission.has_object_permission(request, None, task))
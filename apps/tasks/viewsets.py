@@ -1,24 +1,71 @@
 # apps/tasks/viewsets.py
+import base64
+import datetime
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, filters as drf_filters
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as dj_filters
 from rest_framework.permissions import IsAuthenticated
-from .models import Task
-from .serializers import TaskSerializer
+from .models import TERMINAL_STATUS_NAMES, Task, TaskActivity, TaskDependency, AssigneeWorkload
+from backend import lookups
+from .serializers import TaskActivitySerializer, TaskSerializer
 from .permissions import IsProjectMemberOrReadOnly
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status as http_status
 from apps.tasks.models import TaskStatus
 from rest_framework.exceptions import PermissionDenied
+from . import activity, events, hierarchy, ranking, sync, tagging
+from backend.concurrency import EditConflict, PreconditionFailed, VersionConflict, etag_for, parse_if_match
+from backend.idempotency import idempotent
+from apps.projects.membership import is_member, member_exists
+from apps.accounts.permissions import IsAdminOrManagerRole
+from django.contrib.auth import get_user_model
+
+
+def overdue_q(now, terminal=None):
+    """Q for tasks past their deadline and not in a terminal status."""
+    if terminal is None:
+        terminal = lookups.ids_by_name(TaskStatus, TERMINAL_STATUS_NAMES)
+    return Q(deadline__lt=now) & ~Q(status_id__in=terminal)
+
+
+def encode_changes_cursor(modified_at, task_id):
+    raw = f'{modified_at.isoformat()}|{task_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_changes_cursor(cursor):
+    """Return `(modified_at, id)` for a cursor from `encode_changes_cursor`.
+
+    Raises `ValueError` for malformed cursors.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        modified_part, id_part = raw.rsplit('|', 1)
+        modified_at = parse_datetime(modified_part)
+        task_id = int(id_part)
+    except Exception as exc:
+        raise ValueError('Invalid cursor') from exc
+    if modified_at is None:
+        raise ValueError('Invalid cursor')
+    return modified_at, task_id
+
 
 class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated, IsProjectMemberOrReadOnly]
 
     def get_queryset(self):
+        base_qs = Task.objects.filter(deleted_at__isnull=True).select_related('status', 'assignee', 'project')
+        return self.scope_queryset(hierarchy.with_relations(base_qs))
+
+    def scope_queryset(self, base_qs):
         # Determine user identity and role. If the user is admin, return all
-        # non-deleted tasks. If a normal user, only return tasks assigned to
+        # tasks of `base_qs`. If a normal user, only return tasks assigned to
         # them. Prefer `request.user` but fall back to JWT token payload.
         user = getattr(self.request, 'user', None)
         owner_id = None
@@ -61,8 +108,6 @@ class TaskViewSet(viewsets.ModelViewSet):
                     elif isinstance(roles, str):
                         is_privileged = roles.lower() in ('admin', 'manager')
 
-        base_qs = Task.objects.filter(deleted_at__isnull=True).select_related('status', 'assignee', 'project')
-
         # Support optional filtering by ?user_id=<id>
         user_id_param = self.request.query_params.get('user_id')
         if user_id_param is not None:
@@ -111,6 +156,11 @@ class TaskViewSet(viewsets.ModelViewSet):
             if owner_id is not None and owner_id == uid:
                 return base_qs.filter(assignee__id=owner_id)
 
+            # ...or restrict to that user's tasks in projects the caller
+            # is a member of.
+            if owner_id is not None:
+                return base_qs.filter(member_exists(owner_id), assignee__id=uid)
+
             # Unauthorized to view other user's tasks
             return Task.objects.none()
 
@@ -119,15 +169,66 @@ class TaskViewSet(viewsets.ModelViewSet):
             return base_qs
 
         if owner_id is not None:
-            return base_qs.filter(assignee__id=owner_id)
+            # Own tasks plus every task of the caller's projects, as one
+            # indexed EXISTS on tbl_project_members.
+            return base_qs.filter(Q(assignee__id=owner_id) | member_exists(owner_id))
 
         # No identity info -> return empty queryset to avoid leaking tasks.
         return Task.objects.none()
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         # Legacy `tbl_tasks` has no `created_by` column, so just save the
         # task as provided. The frontend should set `assignee`/`project`.
-        serializer.save()
+        task = serializer.save()
+        activity.record(task, activity.ACTION_CREATED, self.request.user.id)
+        events.publish_task_event(events.EVENT_CREATED, task, serializer.data)
+
+    def check_if_match(self, task):
+        """Apply the request's `If-Match` to `task` before it is saved.
+
+        A stale version fails right away; otherwise the version from the
+        header becomes the one `Task.save()` requires in its conditional
+        UPDATE, so a write that raced in since is caught there.
+        """
+        required = parse_if_match(self.request.headers.get('If-Match'))
+        if required is None:
+            return
+        if required != task.version:
+            raise PreconditionFailed()
+        task.version = required
+
+    def save_versioned(self, save):
+        try:
+            return save()
+        except VersionConflict:
+            # 412 if the client asked for a version, 409 otherwise.
+            if self.request.headers.get('If-Match') is not None:
+                raise PreconditionFailed()
+            raise EditConflict()
+
+    def perform_update(self, serializer):
+        previous_assignee_id = serializer.instance.assignee_id
+        self.check_if_match(serializer.instance)
+        task = self.save_versioned(serializer.save)
+        activity.record(task, activity.ACTION_UPDATED, self.request.user.id)
+        events.publish_task_event(events.EVENT_UPDATED, task, serializer.data, previous_assignee_id)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Single-task responses carry the version as a strong ETag.
+        data = getattr(response, 'data', None)
+        if isinstance(data, dict) and 'version' in data and response.status_code < 300:
+            response['ETag'] = etag_for(data['version'])
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        self.check_if_match(instance)
+        self.save_versioned(instance.delete)
+        activity.record(instance, activity.ACTION_DELETED, self.request.user.id)
+        events.publish_task_event(events.EVENT_DELETED, instance)
 
     @action(detail=True, methods=['patch'], url_path='status')
     def status(self, request, pk=None):
@@ -147,9 +248,375 @@ class TaskViewSet(viewsets.ModelViewSet):
         except TaskStatus.DoesNotExist:
             return Response({'detail': 'Invalid status_id'}, status=http_status.HTTP_400_BAD_REQUEST)
 
+        self.check_if_match(task)
+        task.status = status_obj
+        self.save_versioned(lambda: task.save(update_fields=['status', 'modified_at']))
+        activity.record(task, activity.ACTION_STATUS, request.user.id)
+        data = TaskSerializer(task, context={'request': request}).data
+        events.publish_task_event(events.EVENT_STATUS, task, data)
+        return Response(data, status=http_status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='move')
+    def move(self, request, pk=None):
+        """Reorder a task within its project's board (drag and drop).
+
+        Body: `{"after_id": <id>, "before_id": <id>, "status_id": <id>}`, all
+        optional. The task is placed right after `after_id` and/or right
+        before `before_id`, which must be in the target column (`status_id`,
+        default the task's current status); with neither it goes last.
+        Only the moved task's row is written: it gets a rank key between
+        its new neighbours (see `ranking`).
+        """
+        task = self.get_object()
+        status_id = request.data.get('status_id', task.status_id)
+        try:
+            status_obj = TaskStatus.objects.get(pk=status_id)
+        except (TaskStatus.DoesNotExist, TypeError, ValueError):
+            return Response({'detail': 'Invalid status_id'}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        self.check_if_match(task)
+        column = ranking.column_tasks(task.project_id, status_obj.id).exclude(pk=task.pk)
+        try:
+            rank = self.rank_between(column, request.data.get('after_id'), request.data.get('before_id'))
+        except ValueError:
+            # Equal neighbouring keys (concurrent inserts): respread the column once.
+            ranking.rebalance_column(task.project_id, status_obj.id)
+            task.refresh_from_db(fields=['version'])
+            try:
+                rank = self.rank_between(column, request.data.get('after_id'), request.data.get('before_id'))
+            except ValueError as exc:
+                return Response({'detail': str(exc)}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        status_changed = status_obj.id != task.status_id
         task.status = status_obj
-        task.save(update_fields=['status', 'modified_at'])
-        return Response(TaskSerializer(task, context={'request': request}).data, status=http_status.HTTP_200_OK)
+        task.rank = rank
+        self.save_versioned(lambda: task.save(update_fields=['status', 'rank']))
+        activity.record(task, activity.ACTION_MOVED, request.user.id)
+        data = TaskSerializer(task, context={'request': request}).data
+        events.publish_task_event(events.EVENT_STATUS if status_changed else events.EVENT_UPDATED, task, data)
+        return Response(data, status=http_status.HTTP_200_OK)
+
+    @staticmethod
+    def rank_between(column, after_id, before_id):
+        """Rank key for a slot in `column`; raises `ValueError` if there is none."""
+        def neighbour(task_id, name):
+            try:
+                row = column.filter(pk=int(task_id)).values_list('rank', 'id').first()
+            except (TypeError, ValueError):
+                row = None
+            if row is None:
+                raise ValueError(f'{name} must be a task in the target column')
+            return row
+
+        ordered = column.order_by('rank', 'id').values_list('rank', 'id')
+        if after_id is not None:
+            lower = neighbour(after_id, 'after_id')
+            if before_id is not None:
+                upper = neighbour(before_id, 'before_id')
+            else:
+                upper = ordered.filter(Q(rank__gt=lower[0]) | Q(rank=lower[0], id__gt=lower[1])).first()
+        elif before_id is not None:
+            upper = neighbour(before_id, 'before_id')
+            lower = ordered.filter(Q(rank__lt=upper[0]) | Q(rank=upper[0], id__lt=upper[1])).reverse().first()
+        else:
+            lower = ordered.reverse().first()
+            upper = None
+        return ranking.key_between(lower[0] if lower else None, upper[0] if upper else None)
+
+    @action(detail=True, methods=['get'], url_path='subtasks')
+    def subtasks(self, request, pk=None):
+        """All tasks below this one (`?depth=1` for direct children only).
+
+        One indexed join on the closure table, scoped like the list
+        endpoint; each task carries its `depth` below this one.
+        """
+        task = self.get_object()
+        try:
+            max_depth = int(request.query_params['depth']) if request.query_params.get('depth') else None
+        except ValueError:
+            return Response({'detail': 'depth must be an integer'}, status=http_status.HTTP_400_BAD_REQUEST)
+        qs = self.scope_queryset(hierarchy.with_relations(
+            hierarchy.descendants(task.id, max_depth).select_related('status', 'assignee', 'project')
+        )).order_by('depth', 'rank', 'id')
+        return Response(self.with_depth(qs))
+
+    @action(detail=True, methods=['get'], url_path='ancestors')
+    def ancestors(self, request, pk=None):
+        """The chain of parents up to the root, nearest first."""
+        task = self.get_object()
+        qs = self.scope_queryset(hierarchy.with_relations(
+            hierarchy.ancestors(task.id).select_related('status', 'assignee', 'project')
+        )).order_by('depth')
+        return Response(self.with_depth(qs))
+
+    def with_depth(self, tasks):
+        results = []
+        for task in tasks:
+            data = TaskSerializer(task, context=self.get_serializer_context()).data
+            data['depth'] = task.depth
+            results.append(data)
+        return results
+
+    @action(detail=True, methods=['get', 'post'], url_path='dependencies')
+    def dependencies(self, request, pk=None):
+        """Tasks this one is blocked by (GET), or add one (POST `{"blocked_by_id": n}`).
+
+        A dependency that would close a cycle is rejected with 400.
+        """
+        task = self.get_object()
+        if request.method == 'GET':
+            # Only blockers the caller may see, like every other task list.
+            blockers = self.get_queryset().filter(blocking_links__task=task).order_by('id')
+            return Response(TaskSerializer(blockers, many=True, context=self.get_serializer_context()).data)
+
+        try:
+            blocker = self.get_queryset().get(pk=int(request.data.get('blocked_by_id')))
+        except (TypeError, ValueError, Task.DoesNotExist):
+            return Response({'detail': 'blocked_by_id must be a task you can see'}, status=http_status.HTTP_400_BAD_REQUEST)
+        try:
+            _, created = hierarchy.add_dependency(task, blocker)
+        except hierarchy.HierarchyError as exc:
+            return Response({'detail': str(exc)}, status=http_status.HTTP_400_BAD_REQUEST)
+        activity.record(task, activity.ACTION_UPDATED, request.user.id, {'blocked_by': [None, blocker.id]})
+        return Response(
+            TaskSerializer(self.get_object(), context=self.get_serializer_context()).data,
+            status=http_status.HTTP_201_CREATED if created else http_status.HTTP_200_OK,
+        )
+
+    @dependencies.mapping.delete
+    def remove_dependency(self, request, pk=None):
+        """Remove a dependency: DELETE `?blocked_by_id=n`."""
+        task = self.get_object()
+        try:
+            blocked_by_id = int(request.query_params.get('blocked_by_id'))
+        except (TypeError, ValueError):
+            return Response({'detail': 'blocked_by_id is required'}, status=http_status.HTTP_400_BAD_REQUEST)
+        deleted, _ = TaskDependency.objects.filter(task=task, blocked_by_id=blocked_by_id).delete()
+        if not deleted:
+            return Response({'detail': 'Not a dependency'}, status=http_status.HTTP_404_NOT_FOUND)
+        activity.record(task, activity.ACTION_UPDATED, request.user.id, {'blocked_by': [blocked_by_id, None]})
+        return Response(status=http_status.HTTP_204_NO_CONTENT)
+
+    history_page_size = 50
+    history_max_page_size = 200
+
+    @action(detail=True, methods=['get'], url_path='history')
+    def history(self, request, pk=None):
+        """The task's activity log, newest first.
+
+        Pages with `?limit=` and `?before=<next_cursor>`; keep requesting
+        while `has_more` is true.
+        """
+        task = self.get_object()
+        # Rows this worker still holds in its buffer become visible now.
+        activity.flush()
+        qs = TaskActivity.objects.filter(task_id=task.id).select_related('actor').order_by('-id')
+        before = request.query_params.get('before')
+        if before:
+            try:
+                qs = qs.filter(id__lt=int(before))
+            except (TypeError, ValueError):
+                return Response({'detail': 'Invalid cursor'}, status=http_status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', self.history_page_size))
+        except (TypeError, ValueError):
+            limit = self.history_page_size
+        limit = max(1, min(limit, self.history_max_page_size))
+
+        rows = list(qs[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return Response({
+            'results': TaskActivitySerializer(rows, many=True).data,
+            'next_cursor': str(rows[-1].id) if has_more else None,
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['get'], url_path='workload',
+            permission_classes=[IsAuthenticated, IsAdminOrManagerRole])
+    def workload(self, request):
+        """Per-user workload for assigning work (admins and managers).
+
+        Served from the maintained `tbl_assignee_workload` counters, one row
+        per active user (users without tasks report zeros), so the cost
+        does not grow with the number of tasks. `?user_id=` narrows it to
+        one user. `overdue` is as of `overdue_as_of` (last counter sweep).
+        """
+        users = (
+            get_user_model().objects.filter(deleted_at__isnull=True)
+            .select_related('workload').order_by('id')
+        )
+        user_id = request.query_params.get('user_id')
+        if user_id is not None:
+            try:
+                users = users.filter(id=int(user_id))
+            except (TypeError, ValueError):
+                return Response({'detail': 'Invalid user_id'}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        def row(user):
+            try:
+                counts = user.workload
+            except AssigneeWorkload.DoesNotExist:
+                counts = AssigneeWorkload(user=user)
+            return {
+                'user_id': user.id,
+                'username': user.username,
+                'full_name': user.full_name,
+                'open': counts.open_count,
+                'overdue': counts.overdue_count,
+                'done': counts.done_count,
+                'next_deadline': counts.next_deadline,
+                'overdue_as_of': counts.overdue_as_of,
+            }
+
+        page = self.paginate_queryset(users)
+        if page is not None:
+            return self.get_paginated_response([row(u) for u in page])
+        return Response([row(u) for u in users])
+
+    calendar_max_days = 400
+
+    @action(detail=False, methods=['get'], url_path='calendar')
+    def calendar(self, request):
+        """Task counts per day or week of `deadline`, computed in SQL.
+
+        `?start=<iso>&end=<iso>` (required, at most `calendar_max_days`
+        apart) and `?bucket=day|week` (default `day`; weeks start on Monday).
+        Accepts the list filters (`project_id`, `assignee_id`, `status`,
+        ...) and is scoped like the list endpoint. Buckets are in the
+        server's TIME_ZONE.
+        """
+        try:
+            start = parse_datetime(request.query_params.get('start') or '')
+            end = parse_datetime(request.query_params.get('end') or '')
+        except ValueError:
+            start = end = None
+        if start is None or end is None or end <= start:
+            return Response({'detail': 'start and end (ISO datetimes, start < end) are required'},
+                            status=http_status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+        if (end - start).days > self.calendar_max_days:
+            return Response({'detail': f'The range may span at most {self.calendar_max_days} days'},
+                            status=http_status.HTTP_400_BAD_REQUEST)
+        bucket = request.query_params.get('bucket', 'day')
+        trunc = {'day': TruncDate, 'week': TruncWeek}.get(bucket)
+        if trunc is None:
+            return Response({'detail': 'bucket must be day or week'}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        terminal = lookups.ids_by_name(TaskStatus, TERMINAL_STATUS_NAMES)
+        qs = self.filter_queryset(self.get_queryset()).filter(deadline__gte=start, deadline__lt=end)
+        rows = (
+            qs.order_by()
+            .annotate(bucket=trunc('deadline', tzinfo=timezone.get_current_timezone()))
+            .values('bucket')
+            .annotate(
+                total=Count('id'),
+                done=Count('id', filter=Q(status_id__in=terminal)),
+                overdue=Count('id', filter=overdue_q(now, terminal)),
+            )
+            .order_by('bucket')
+        )
+        results = []
+        for row in rows:
+            day = row['bucket']
+            if isinstance(day, datetime.datetime):
+                day = timezone.localtime(day).date() if timezone.is_aware(day) else day.date()
+            results.append({
+                'date': day.isoformat(),
+                'total': row['total'],
+                'open': row['total'] - row['done'],
+                'done': row['done'],
+                'overdue': row['overdue'],
+            })
+        return Response({'bucket': bucket, 'start': start, 'end': end, 'results': results})
+
+    changes_page_size = 500
+    changes_max_page_size = 1000
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """Delta sync: tasks created or modified after `?since=<cursor>`.
+
+        Returns live tasks in `results`, soft-deleted ones as tombstones in
+        `deleted`, and the ids of tasks that left the caller's view
+        (reassigned, moved, or the caller left the project) in `removed`,
+        all ordered by the indexed `(modified_at, id)` cursor and scoped
+        like the list endpoint. Omit `since` for a full initial sync and
+        keep requesting with `next_cursor` while `has_more` is true.
+        `?updated_since=<iso datetime>` may be used instead of a cursor.
+
+        Once caught up, `next_cursor` is moved back by
+        `TASK_CHANGES_OVERLAP_SECONDS` so writes that committed after the
+        read are not skipped; clients must apply entries idempotently. A
+        cursor older than `TASK_SYNC_REMOVAL_RETENTION_DAYS` gets 410 and
+        needs a full sync.
+        """
+        base_qs = hierarchy.with_relations(
+            Task.objects.filter(modified_at__isnull=False).select_related('status', 'assignee', 'project')
+        )
+        qs = self.filter_queryset(self.scope_queryset(base_qs))
+        now = timezone.now()
+
+        since = request.query_params.get('since')
+        updated_since = request.query_params.get('updated_since')
+        modified_at = task_id = None
+        if since:
+            try:
+                modified_at, task_id = decode_changes_cursor(since)
+            except ValueError:
+                return Response({'detail': 'Invalid cursor'}, status=http_status.HTTP_400_BAD_REQUEST)
+            qs = qs.filter(Q(modified_at__gt=modified_at) | Q(modified_at=modified_at, id__gt=task_id))
+        elif updated_since:
+            modified_at = parse_datetime(updated_since)
+            if modified_at is None:
+                return Response({'detail': 'Invalid updated_since'}, status=http_status.HTTP_400_BAD_REQUEST)
+            qs = qs.filter(modified_at__gt=modified_at)
+
+        track_removals = not IsAdminOrManagerRole().has_permission(request, self)
+        if track_removals and modified_at is not None and modified_at < now - sync.retention():
+            return Response(
+                {'detail': 'Cursor is too old; sync again from scratch'}, status=http_status.HTTP_410_GONE,
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', self.changes_page_size))
+        except (TypeError, ValueError):
+            limit = self.changes_page_size
+        limit = max(1, min(limit, self.changes_max_page_size))
+
+        # Tasks and removals merged on the same `(time, id)` timeline.
+        entries = [(t.modified_at, t.id, t) for t in qs.order_by('modified_at', 'id')[:limit + 1]]
+        if track_removals and modified_at is not None:
+            removals = sync.removals_after(request.user.id, modified_at, task_id)
+            entries += [(at, pk, None) for at, pk in removals.values_list('removed_at', 'task_id')[:limit + 1]]
+        entries.sort(key=lambda entry: (entry[0], entry[1], entry[2] is not None))
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        rows = [task for _, _, task in entries if task is not None]
+        live = [t for t in rows if t.deleted_at is None]
+        deleted = [{'id': t.id, 'deleted_at': t.deleted_at} for t in rows if t.deleted_at is not None]
+        # A task back in view later on this page needs no removal.
+        seen = {t.id for t in rows}
+        removed = sorted({pk for _, pk, task in entries if task is None and pk not in seen})
+        if entries:
+            cursor = entries[-1][:2]
+            if not has_more:
+                cursor = min(cursor, (now - sync.overlap(), 0))
+            next_cursor = encode_changes_cursor(*cursor)
+        else:
+            next_cursor = since
+        return Response({
+            'results': TaskSerializer(live, many=True, context={'request': request}).data,
+            'deleted': deleted,
+            'removed': removed,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+        })
 
     filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter, drf_filters.OrderingFilter]
     # support filtering by related project id via `?project_id=<id>`
@@ -157,21 +624,43 @@ class TaskViewSet(viewsets.ModelViewSet):
         project_id = dj_filters.NumberFilter(field_name='project__id', lookup_expr='exact')
         user_id = dj_filters.NumberFilter(field_name='assignee__id', lookup_expr='exact')
         assignee_id = dj_filters.NumberFilter(field_name='assignee__id', lookup_expr='exact')
+        # Ranges: `?deadline_after=<iso>&deadline_before=<iso>` (inclusive),
+        # likewise `created_at_*` and `modified_at_*`.
+        deadline = dj_filters.IsoDateTimeFromToRangeFilter(field_name='deadline')
+        created_at = dj_filters.IsoDateTimeFromToRangeFilter(field_name='created_at')
+        modified_at = dj_filters.IsoDateTimeFromToRangeFilter(field_name='modified_at')
+        # `?overdue=true`: past deadline and not in a terminal status.
+        overdue = dj_filters.BooleanFilter(method='filter_overdue')
+        # `?tags=a,b`: tagged with all of them; `?tags_any=a,b`: with any.
+        tags = dj_filters.CharFilter(method='filter_tags')
+        tags_any = dj_filters.CharFilter(method='filter_tags_any')
 
         class Meta:
             model = Task
             fields = ['status', 'assignee', 'project', 'project_id', 'user_id', 'assignee_id']
 
+        def filter_overdue(self, queryset, name, value):
+            condition = overdue_q(timezone.now())
+            return queryset.filter(condition) if value else queryset.exclude(condition)
+
+        def filter_tags(self, queryset, name, value):
+            return tagging.filter_all(queryset, value)
+
+        def filter_tags_any(self, queryset, name, value):
+            return tagging.filter_any(queryset, value)
+
     filterset_class = TaskFilter
     search_fields = ['title', 'description']
-    ordering_fields = ['deadline', 'created_at']
+    ordering_fields = ['deadline', 'created_at', 'rank']
     ordering = ['-created_at']
 
     def retrieve(self, request, pk=None):
-        """Return a single Task if the caller is admin/manager or the assignee.
+        """Return a single Task if the caller is admin/manager, the assignee or
+        a member of the task's project.
 
-        Admins/managers may view any task. Regular users may view only tasks
-        where their token `user_id` equals the task's assignee id.
+        Admins/managers may view any task. Regular users may view tasks
+        where their token `user_id` equals the task's assignee id, or tasks
+        of projects they are a member of.
         """
         task = self.get_object()
 
@@ -221,6 +710,8 @@ class TaskViewSet(viewsets.ModelViewSet):
         try:
             if token_user_id is not None and assignee_id is not None and int(token_user_id) == int(assignee_id):
                 return Response(TaskSerializer(task, context={'request': request}).data)
+            if token_user_id is not None and is_member(token_user_id, task.project_id):
+                return Response(TaskSerializer(task, context={'request': request}).data)
         except Exception:
             pass
 
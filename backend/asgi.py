@@ -3,6 +3,9 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests for ``/api/tasks/stream/`` are served by the Server-Sent Events app
+in ``apps.tasks.sse``; everything else goes to Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +16,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Import after Django is set up: the SSE app uses settings and simplejwt.
+from apps.tasks.sse import STREAM_PATH, task_events_app  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+        await task_events_app(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
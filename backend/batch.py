@@ -0,0 +1,219 @@
+# backend/batch.py
+"""`POST /api/batch/`: run several API calls in one round trip.
+
+Body::
+
+    {"requests": [
+        {"id": "users", "method": "GET", "path": "/api/auth/users/"},
+        {"method": "PATCH", "path": "/api/tasks/7/", "body": {"title": "x"},
+         "headers": {"If-Match": "\\"3\\""}}
+    ]}
+
+Response (always 200 when the batch itself is valid)::
+
+    {"responses": [{"id": "users", "status": 200, "headers": {...}, "body": [...]}, ...]}
+
+The caller is authenticated once, for the batch; every item is resolved
+with the normal URLconf and run through its view (permissions, throttles,
+validation) as that principal, in order. Runs of consecutive safe-method
+items are executed concurrently in a small thread pool; unsafe items run
+one at a time, and after a successful write the remaining reads use the
+primary database so they see it. Middleware is not re-run per item.
+
+Limits: `BATCH_MAX_REQUESTS` items per batch, `BATCH_MAX_CONCURRENCY`
+threads, and a `BATCH_TIME_BUDGET_SECONDS` wall-clock budget after which
+items that have not started are answered with 503.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, connections
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from backend import routers
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ALLOWED_METHODS = SAFE_METHODS + ('POST', 'PUT', 'PATCH', 'DELETE')
+# Headers an item may not override: identity comes from the batch.
+_FORBIDDEN_HEADERS = {'authorization', 'cookie', 'host', 'content-length', 'content-type'}
+BATCH_PATH = '/api/batch/'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class BatchItemError(ValueError):
+    pass
+
+
+def parse_items(payload):
+    items = payload.get('requests') if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        raise BatchItemError('"requests" must be a non-empty list')
+    limit = _setting('BATCH_MAX_REQUESTS', 20)
+    if len(items) > limit:
+        raise BatchItemError(f'At most {limit} requests per batch')
+
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise BatchItemError(f'Item {index} must be an object')
+        method = str(item.get('method', 'GET')).upper()
+        path = item.get('path')
+        if method not in ALLOWED_METHODS:
+            raise BatchItemError(f'Item {index}: unsupported method {method}')
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            raise BatchItemError(f'Item {index}: "path" must start with /api/')
+        if urlsplit(path).path.rstrip('/') == BATCH_PATH.rstrip('/'):
+            raise BatchItemError(f'Item {index}: batches cannot be nested')
+        headers = item.get('headers') or {}
+        if not isinstance(headers, dict):
+            raise BatchItemError(f'Item {index}: "headers" must be an object')
+        parsed.append({
+            'id': item.get('id', index),
+            'method': method,
+            'path': path,
+            'body': item.get('body'),
+            'headers': {k: str(v) for k, v in headers.items() if k.lower() not in _FORBIDDEN_HEADERS},
+        })
+    return parsed
+
+
+def build_subrequest(parent, item):
+    """A WSGIRequest for `item`, inheriting the batch request's environ."""
+    split = urlsplit(item['path'])
+    body = b'' if item['body'] is None else json.dumps(item['body']).encode()
+    environ = {
+        key: value for key, value in parent.META.items()
+        if not key.startswith('HTTP_') or key in ('HTTP_COOKIE', 'HTTP_X_FORWARDED_FOR', 'HTTP_USER_AGENT')
+    }
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': split.path,
+        'QUERY_STRING': split.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': BytesIO(body),
+    })
+    for name, value in item['headers'].items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return WSGIRequest(environ)
+
+
+def _render(item, response):
+    if hasattr(response, 'data'):
+        body = response.data
+    else:
+        content = getattr(response, 'content', b'')
+        try:
+            body = json.loads(content) if content else None
+        except ValueError:
+            body = content.decode(errors='replace')
+    headers = {k: v for k, v in response.items() if k.lower() != 'content-length'}
+    return {'id': item['id'], 'status': response.status_code, 'headers': headers, 'body': body}
+
+
+def _error(item, code, detail):
+    return {'id': item['id'], 'status': code, 'headers': {}, 'body': {'detail': detail}}
+
+
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'batch'
+    use_read_replica = False
+
+    def post(self, request):
+        try:
+            items = parse_items(request.data)
+        except BatchItemError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        deadline = time.monotonic() + _setting('BATCH_TIME_BUDGET_SECONDS', 10)
+        parent = request._request
+        # Replica reads only until the first write, and never for a client
+        # already pinned to the primary.
+        self.replica_ok = not parent.COOKIES.get(_setting('DATABASE_REPLICA_PIN_COOKIE', 'db_pin'))
+        wrote = False
+
+        responses = []
+        index = 0
+        while index < len(items):
+            run_end = index + 1
+            if items[index]['method'] in SAFE_METHODS:
+                while run_end < len(items) and items[run_end]['method'] in SAFE_METHODS:
+                    run_end += 1
+            run = items[index:run_end]
+            if time.monotonic() >= deadline:
+                responses.extend(_error(item, 503, 'Batch time budget exceeded') for item in run)
+            elif len(run) > 1:
+                responses.extend(self.run_concurrently(parent, run, deadline))
+            else:
+                result = self.dispatch_item(parent, run[0])
+                responses.append(result)
+                if run[0]['method'] not in SAFE_METHODS and result['status'] < 400:
+                    wrote = True
+                    self.replica_ok = False
+            index = run_end
+
+        # Only pin the client to the primary if something was written.
+        parent.db_pin = wrote
+        return Response({'responses': responses})
+
+    def run_concurrently(self, parent, run, deadline):
+        workers = min(_setting('BATCH_MAX_CONCURRENCY', 4), len(run))
+        if workers <= 1 or connection.in_atomic_block:
+            # Other threads would not see this transaction's writes.
+            return [self.dispatch_item(parent, item, deadline) for item in run]
+
+        def work(item):
+            try:
+                return self.dispatch_item(parent, item, deadline)
+            finally:
+                # Each worker thread has its own DB connections.
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as pool:
+            return list(pool.map(work, run))
+
+    def dispatch_item(self, parent, item, deadline=None):
+        if deadline is not None and time.monotonic() >= deadline:
+            return _error(item, 503, 'Batch time budget exceeded')
+        try:
+            match = resolve(urlsplit(item['path']).path)
+        except (Resolver404, Http404):
+            return _error(item, 404, 'Not found')
+
+        sub = build_subrequest(parent, item)
+        # Reuse the batch's authentication instead of re-validating the JWT.
+        sub._force_auth_user = self.request.user
+        sub._force_auth_token = self.request.auth
+
+        view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+        replica = (
+            self.replica_ok
+            and item['method'] in SAFE_METHODS
+            and getattr(view_class or match.func, 'use_read_replica', True)
+        )
+        token = routers.set_read_from_replica(replica)
+        try:
+            response = match.func(sub, *match.args, **match.kwargs)
+            return _render(item, response)
+        except Exception:
+            logger.exception("Batch item %s %s failed", item['method'], item['path'])
+            return _error(item, 500, 'Internal server error')
+        finally:
+            routers.reset_read_from_replica(token)
@@ -0,0 +1,67 @@
+# backend/checks.py
+"""Deployment checks for state kept in the `default` cache.
+
+The lookup tables (`backend.lookups`), membership sets, tag counts and
+user search results are invalidated by signals in the worker that made the
+change. With a process-local backend (LocMem, dummy) every other worker
+keeps serving its own copy until the TTL runs out, so any deployment with
+more than one worker process needs a shared cache (`CACHE_REDIS_URL`).
+The same goes for throttle buckets (`backend.throttling`): with a local
+cache each worker counts on its own, so the effective rate limit is the
+configured rate times the number of workers, and for `Idempotency-Key`
+claims (`backend.idempotency`): a retry routed to another worker would not
+see the first claim and would run the write again.
+`gunicorn.conf.py` refuses to start several workers without one, and
+`manage.py check --deploy` reports it.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from rest_framework.settings import api_settings
+
+from .throttling import TokenBucketThrottle
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    """True if every process talking to `alias` sees the same entries."""
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs=None, **kwargs):
+    if cache_is_shared():
+        return []
+    return [Warning(
+        'The default cache is local to each process: cached lookups, memberships and tag counts are only '
+        'invalidated in the worker that changed them.',
+        hint='Set CACHE_REDIS_URL, or run a single worker process.',
+        id='backend.W001',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_throttle_cache(app_configs=None, **kwargs):
+    throttled = any(issubclass(cls, TokenBucketThrottle) for cls in api_settings.DEFAULT_THROTTLE_CLASSES)
+    if not throttled or cache_is_shared():
+        return []
+    return [Warning(
+        'Throttle buckets are kept in a process-local cache, so each worker allows the full rate.',
+        hint='Set CACHE_REDIS_URL so every worker shares the same buckets.',
+        id='backend.W002',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_idempotency_cache(app_configs=None, **kwargs):
+    if cache_is_shared():
+        return []
+    return [Warning(
+        'Idempotency-Key claims are kept in a process-local cache, so a retry served by another worker '
+        'runs the request again.',
+        hint='Set CACHE_REDIS_URL so every worker sees the same keys.',
+        id='backend.W003',
+    )]
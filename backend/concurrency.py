@@ -0,0 +1,51 @@
+# backend/concurrency.py
+"""Optimistic concurrency helpers: versions, ETags and `If-Match`.
+
+Versioned models keep an integer `version` that every save increments with
+a conditional `UPDATE ... WHERE id = %s AND version = %s`; a save that
+matches no row raises `VersionConflict` instead of overwriting someone
+else's change. No row lock is held between reading and writing.
+
+Over HTTP the version is exposed as a strong ETag (`"<version>"`). Clients
+send it back in `If-Match`; a stale value yields `412 Precondition Failed`.
+"""
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class VersionConflict(Exception):
+    """A conditional save found the row at a different version."""
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource was modified by someone else; reload it and retry.'
+    default_code = 'precondition_failed'
+
+
+class EditConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The resource was modified concurrently; reload it and retry.'
+    default_code = 'conflict'
+
+
+def etag_for(version):
+    return f'"{version}"'
+
+
+def parse_if_match(header):
+    """Return the version required by an `If-Match` header.
+
+    `None` when there is no header or it is `*` (any version). Raises
+    `PreconditionFailed` for anything that is not one of our ETags; weak
+    ETags never match, as `If-Match` uses strong comparison.
+    """
+    if header is None:
+        return None
+    tags = [tag.strip() for tag in header.split(',') if tag.strip()]
+    if '*' in tags:
+        return None
+    for tag in tags:
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            return int(tag[1:-1])
+    raise PreconditionFailed()
@@ -0,0 +1,76 @@
+# backend/counting.py
+"""Row counts for paginated lists on big tables.
+
+`count_queryset()` returns `(count, exact)`:
+
+- Up to `COUNT_EXACT_THRESHOLD` rows the count is exact. It is computed
+  with a bounded `SELECT COUNT(*) FROM (... LIMIT threshold + 1)`, so it
+  never reads more than threshold + 1 index entries.
+- Above the threshold the count comes from the cache, keyed by scope and
+  kept for `COUNT_CACHE_TTL` seconds. On a cache miss it is filled with
+  a full count (`COUNT_STRATEGY = 'cached'`) or with the query planner's
+  row estimate (`COUNT_STRATEGY = 'estimate'`). Either way `exact` is
+  False because the value may be stale or approximate.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def _scope_key(qs, scope):
+    if scope is None:
+        scope = str(qs.query)
+    return 'count:' + hashlib.sha1(scope.encode()).hexdigest()
+
+
+def estimate_count(qs):
+    """Return the planner's row estimate for `qs`, or None if unavailable."""
+    qs = qs.select_related(None).order_by()
+    vendor = connections[qs.db].vendor
+    try:
+        if vendor == 'mysql':
+            plan = json.loads(qs.explain(format='json'))
+            block = plan.get('query_block', {})
+            steps = block.get('nested_loop') or [block]
+            table = steps[-1].get('table', {})
+            rows = table.get('rows_produced_per_join')
+            return int(rows) if rows is not None else None
+        if vendor == 'postgresql':
+            plan = json.loads(qs.explain(format='json'))
+            return int(plan[0]['Plan']['Plan Rows'])
+    except Exception:
+        logger.warning("Could not estimate row count", exc_info=True)
+    return None
+
+
+def count_queryset(qs, scope=None):
+    """Return `(count, exact)` for `qs` using the configured strategy.
+
+    `scope` identifies what is being counted (e.g. a user's visible
+    tasks); it defaults to the query's SQL.
+    """
+    threshold = getattr(settings, 'COUNT_EXACT_THRESHOLD', 10000)
+    bounded = qs.select_related(None).order_by()[:threshold + 1].count()
+    if bounded <= threshold:
+        return bounded, True
+
+    key = _scope_key(qs, scope)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, False
+
+    count = None
+    if getattr(settings, 'COUNT_STRATEGY', 'cached') == 'estimate':
+        count = estimate_count(qs)
+    if count is None:
+        count = qs.select_related(None).order_by().count()
+    # Never report fewer rows than we know exist.
+    count = max(count, bounded)
+    cache.set(key, count, getattr(settings, 'COUNT_CACHE_TTL', 60))
+    return count, False
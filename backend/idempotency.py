@@ -0,0 +1,137 @@
+# backend/idempotency.py
+"""`Idempotency-Key` support for non-idempotent endpoints.
+
+Decorate a view method with `@idempotent`. When the client sends an
+`Idempotency-Key` header, the first request for a (principal, key) pair
+claims the key with an atomic `cache.add`, runs normally, and its response
+is stored for `IDEMPOTENCY_TTL` seconds together with a hash of the
+request (method, path and body). A retry with the same key and body gets
+the stored response back (with `Idempotent-Replayed: true`) without
+running validation or writes again. Reusing a key for a different request
+is rejected with 422.
+
+A duplicate that arrives while the first request is still running waits
+up to `IDEMPOTENCY_WAIT_SECONDS` for its result, then gets 409 with
+`Retry-After`. Exceptions raised by the view (including validation
+errors) and 5xx responses release the key so the client can retry.
+
+Requests without the header are unaffected. The claim is only atomic
+within one cache, so deployments with more than one worker must use a
+shared cache (`CACHE_REDIS_URL`): gunicorn refuses to start several
+workers without one and `manage.py check --deploy` reports it
+(`backend.W003`).
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+PENDING = 'pending'
+DONE = 'done'
+# Response headers worth replaying.
+_REPLAY_HEADERS = ('Location', 'ETag')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, separators=(',', ':'), default=str)
+    raw = f'{request.method}\n{request.path}\n{body}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _cache_key(request, key):
+    user = getattr(request, 'user', None)
+    principal = user.pk if user is not None and user.is_authenticated else 'anon'
+    return f'idempotency:{principal}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _replay(entry):
+    response = Response(entry['data'], status=entry['status'])
+    for name, value in entry['headers'].items():
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _in_progress():
+    response = Response(
+        {'detail': 'A request with this Idempotency-Key is still in progress'},
+        status=status.HTTP_409_CONFLICT,
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+def _wait_for(cache_key):
+    deadline = time.monotonic() + _setting('IDEMPOTENCY_WAIT_SECONDS', 5)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(cache_key)
+        if entry is None or entry['state'] == DONE:
+            return entry
+    return cache.get(cache_key)
+
+
+def idempotent(view_method):
+    """Make a DRF view method honour the `Idempotency-Key` header."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = _cache_key(request, key)
+        fingerprint = request_fingerprint(request)
+        claim = {'state': PENDING, 'fingerprint': fingerprint}
+        if not cache.add(cache_key, claim, _setting('IDEMPOTENCY_LOCK_SECONDS', 30)):
+            entry = cache.get(cache_key)
+            if entry is not None and entry['fingerprint'] != fingerprint:
+                return Response(
+                    {'detail': 'Idempotency-Key was already used for a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if entry is not None and entry['state'] == PENDING:
+                entry = _wait_for(cache_key)
+            if entry is not None:
+                if entry['state'] == DONE:
+                    return _replay(entry)
+                return _in_progress()
+            # The claim expired or was released meanwhile: take it over.
+            if not cache.add(cache_key, claim, _setting('IDEMPOTENCY_LOCK_SECONDS', 30)):
+                return _in_progress()
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code >= 500:
+            cache.delete(cache_key)
+            return response
+        cache.set(cache_key, {
+            'state': DONE,
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'data': response.data,
+            'headers': {name: response[name] for name in _REPLAY_HEADERS if response.has_header(name)},
+        }, _setting('IDEMPOTENCY_TTL', 86400))
+        return response
+
+    return wrapper
@@ -0,0 +1,205 @@
+# backend/log.py
+"""Non-blocking, sampled, structured logging.
+
+Wired up through `settings.LOGGING`:
+
+- `QueueListenerHandler` is the only handler attached to loggers. It puts
+  records on a bounded in-memory queue and a background `QueueListener`
+  thread writes them out, so request threads never wait on log I/O. If
+  the queue is full the record is dropped and counted (`dropped`) rather
+  than blocking the caller.
+- `SamplingFilter` keeps a fraction of records per logger
+  (`settings.LOG_SAMPLING`, longest dotted-prefix match). Warnings and
+  errors are always kept.
+- `JsonFormatter` writes one JSON object per line, including any
+  `extra={...}` fields.
+- `lazy(func, *args)` defers an expensive log argument (e.g. a value that
+  needs a DB query) until the record has passed level and sampling
+  checks. It is evaluated on the calling thread, so it may safely use
+  the request's DB connection.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+# Attributes every LogRecord has; anything else came from `extra=`.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class Lazy:
+    """A log argument computed at most once, only if the record is emitted."""
+    __slots__ = ('func', 'args', 'kwargs', '_value', '_done')
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self._done = False
+        self._value = None
+
+    def resolve(self):
+        if not self._done:
+            try:
+                self._value = self.func(*self.args, **self.kwargs)
+            except Exception as exc:
+                self._value = f'<lazy error: {exc!r}>'
+            self._done = True
+        return self._value
+
+    def __str__(self):
+        return str(self.resolve())
+
+    def __repr__(self):
+        return repr(self.resolve())
+
+
+def lazy(func, *args, **kwargs):
+    return Lazy(func, *args, **kwargs)
+
+
+def _resolve(value):
+    return value.resolve() if isinstance(value, Lazy) else value
+
+
+class SamplingFilter(logging.Filter):
+    """Keep `rate` of a logger's records below WARNING.
+
+    `rates` maps logger names (or dotted prefixes) to a float in [0, 1];
+    loggers without a match use `rates.get('', 1.0)`.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        if rates is None:
+            rates = getattr(settings, 'LOG_SAMPLING', {})
+        self.rates = dict(rates)
+        self._cache = {}
+
+    def _rate_for(self, name):
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = self.rates.get('', 1.0)
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = _resolve(value)
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc_info'] = record.exc_text
+        if record.stack_info:
+            data['stack_info'] = record.stack_info
+        return json.dumps(data, default=str)
+
+
+class QueueListenerHandler(QueueHandler):
+    """Queue records and write them from a background listener thread.
+
+    By default records are written to stderr; pass `filename` (or a
+    `stream`) to write elsewhere. The formatter configured on this handler
+    is applied by the listener's target handler.
+    """
+    _instances = []
+
+    def __init__(self, filename=None, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        if filename:
+            self.target = logging.FileHandler(filename, encoding='utf-8')
+        else:
+            self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self.listener = None
+        self.start()
+        QueueListenerHandler._instances.append(self)
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def start(self):
+        """(Re)start the listener thread, e.g. in a freshly forked worker."""
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        # Render the message (and any lazy values) on the calling thread,
+        # after filtering, so only emitted records pay for them. The
+        # listener thread then only does formatting and I/O.
+        record = copy.copy(record)
+        if record.args:
+            if isinstance(record.args, dict):
+                record.args = {k: _resolve(v) for k, v in record.args.items()}
+            else:
+                record.args = tuple(_resolve(a) for a in record.args)
+        record.msg = record.getMessage()
+        record.args = None
+        for key, value in list(vars(record).items()):
+            if isinstance(value, Lazy):
+                setattr(record, key, value.resolve())
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+def restart_listeners():
+    """Restart listener threads for all queue handlers (after fork)."""
+    for handler in QueueListenerHandler._instances:
+        # The parent's listener thread doesn't exist in the child and its
+        # queue lock may have been held at fork time; start fresh.
+        handler.queue = queue.Queue(maxsize=handler.queue.maxsize)
+        handler.start()
+
+
+@atexit.register
+def _stop_listeners():
+    # Flush whatever is still queued on interpreter shutdown.
+    for handler in QueueListenerHandler._instances:
+        handler.stop()
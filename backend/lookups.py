@@ -0,0 +1,38 @@
+# backend/lookups.py
+"""Cached lookup tables (statuses, roles).
+
+Small reference tables are read on almost every request (status names,
+terminal statuses, role names). `get_lookup(Model)` returns `{id: name}`
+for the model's live rows from the Django cache, loading it on a miss.
+The apps' `ready()` hooks invalidate a table whenever one of its rows is
+saved or deleted, and `backend.warmup` primes every table before a worker
+accepts traffic. Invalidation only reaches other workers through a shared
+cache, which multi-worker deployments require (see `backend.checks`).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _key(model):
+    return f'lookup:{model._meta.label_lower}'
+
+
+def get_lookup(model):
+    """Return `{id: name}` for live rows of `model`."""
+    key = _key(model)
+    table = cache.get(key)
+    if table is None:
+        table = dict(model.objects.filter(deleted_at__isnull=True).values_list('id', 'name'))
+        cache.set(key, table, getattr(settings, 'LOOKUP_CACHE_TTL', 300))
+    return table
+
+
+def ids_by_name(model, names):
+    """Return the ids of live rows of `model` whose name is in `names`."""
+    wanted = {str(n).lower() for n in names}
+    return [pk for pk, name in get_lookup(model).items() if str(name).lower() in wanted]
+
+
+def invalidate(sender, **kwargs):
+    """Signal receiver: drop the cached table for `sender`."""
+    cache.delete(_key(sender))
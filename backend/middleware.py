@@ -0,0 +1,242 @@
+# backend/middleware.py
+import cProfile
+import io
+import json
+import logging
+import pstats
+import re
+import time
+import traceback
+import tracemalloc
+import warnings
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from backend import routers
+from backend.querylog import fingerprint, record_queries
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe-method reads to read replicas with read-your-writes.
+
+    A request is served from a replica when it uses a safe method, the
+    view has not opted out (`use_read_replica = False` on the view class
+    or `routers.primary_only` on a function view) and the client is not
+    pinned to the primary. Any successful write sets a short-lived pin
+    cookie so the principal's following reads see their own changes
+    until replication catches up (`DATABASE_REPLICA_PIN_SECONDS`).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie_name = getattr(settings, 'DATABASE_REPLICA_PIN_COOKIE', 'db_pin')
+        self.pin_seconds = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        # Start every request on the primary; `process_view` decides
+        # whether this one may read from a replica.
+        token = routers.set_read_from_replica(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.reset_read_from_replica(token)
+
+        # Views may override the decision (e.g. a read-only `/api/batch/`).
+        pin = getattr(request, 'db_pin', request.method not in SAFE_METHODS)
+        if pin and response.status_code < 400 and self.pin_seconds > 0:
+            response.set_cookie(self.cookie_name, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or request.COOKIES.get(self.cookie_name):
+            return None
+        # DRF views expose the class as `cls`, Django CBVs as `view_class`.
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if getattr(view_class or view_func, 'use_read_replica', True):
+            routers.set_read_from_replica(True)
+        return None
+
+
+class ProfilerMiddleware:
+    """Profile a single request on demand for admin principals.
+
+    Enabled with `PROFILER_ENABLED = True`; otherwise Django drops the
+    middleware at startup and it costs nothing. A request is profiled when
+    it carries `X-Profile: 1` (or `?_profile=1`) and authenticates as a
+    user with the admin role. Use `mem` instead of `1` to also trace
+    allocations with tracemalloc.
+
+    The report holds pstats output, every SQL statement with its timing
+    and, for `mem`, the top allocation sites. It is saved under
+    `PROFILER_OUTPUT_DIR` (a `.prof` file for snakeviz/pstats plus a
+    `.json` report) and the file stem is returned in `X-Profile-Report`.
+    With `X-Profile-Inline: 1` (or `?_profile_inline=1`) the JSON report
+    replaces the response body instead.
+    """
+    header = 'HTTP_X_PROFILE'
+    inline_header = 'HTTP_X_PROFILE_INLINE'
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.output_dir = Path(getattr(settings, 'PROFILER_OUTPUT_DIR', Path(settings.BASE_DIR) / 'profiles'))
+        self.top_n = getattr(settings, 'PROFILER_TOP_N', 40)
+
+    def __call__(self, request):
+        mode = request.META.get(self.header) or request.GET.get('_profile')
+        if not mode or not self._is_admin(request):
+            return self.get_response(request)
+        trace_memory = mode.lower() == 'mem'
+        inline = bool(request.META.get(self.inline_header) or request.GET.get('_profile_inline'))
+
+        profiler = cProfile.Profile()
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+        allocations = []
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            allocations = [
+                {'where': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:self.top_n]
+            ]
+
+        stats_out = io.StringIO()
+        pstats.Stats(profiler, stream=stats_out).sort_stats('cumulative').print_stats(self.top_n)
+        report = {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'sql_count': len(recorder.queries),
+            'sql_ms': round(sum(q['duration'] for q in recorder.queries) * 1000, 2),
+            'sql': [
+                {'alias': q['alias'], 'ms': round(q['duration'] * 1000, 3), 'sql': q['sql'], 'params': repr(q['params'])}
+                for q in recorder.queries
+            ],
+            'allocations': allocations,
+            'pstats': stats_out.getvalue(),
+        }
+
+        if inline:
+            return JsonResponse(report, json_dumps_params={'default': str})
+
+        stem = self._save(request, profiler, report)
+        if stem:
+            response['X-Profile-Report'] = stem
+        return response
+
+    def _is_admin(self, request):
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except Exception:
+            return False
+        if result is None:
+            return False
+        role = getattr(result[0], 'role', None)
+        return role is not None and role.deleted_at is None and str(role.name).lower() == 'admin'
+
+    def _save(self, request, profiler, report):
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method.lower()}-{slug}"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(self.output_dir / f'{stem}.prof'))
+            (self.output_dir / f'{stem}.json').write_text(json.dumps(report, indent=2, default=str))
+        except OSError:
+            logger.exception("Failed to write profile report %s", stem)
+            return None
+        return stem
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+class NPlusOneMiddleware:
+    """Flag SQL statements repeated many times within one request.
+
+    Every statement is fingerprinted (`backend.querylog.fingerprint`).
+    When a fingerprint runs more than `NPLUSONE_THRESHOLD` times, the
+    innermost project frame that issued it (e.g. a serializer's
+    `get_<field>`) is reported. What happens then depends on
+    `NPLUSONE_ACTION`:
+
+    - `'log'`: log a warning when the response is returned.
+    - `'warn'`: emit an `NPlusOneWarning`; tests can escalate it with
+      `warnings.simplefilter('error', NPlusOneWarning)`.
+    - `'raise'`: raise `NPlusOneError` from the offending query, so the
+      request fails with a traceback pointing at the culprit.
+
+    Enabled by `NPLUSONE_ENABLED` (defaults to DEBUG). Fingerprints that
+    match a regex in `NPLUSONE_IGNORE` are not reported.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'NPLUSONE_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'NPLUSONE_THRESHOLD', 5)
+        self.action = getattr(settings, 'NPLUSONE_ACTION', 'log')
+        self.ignore = [re.compile(p) for p in getattr(settings, 'NPLUSONE_IGNORE', [])]
+        self.base_dir = str(Path(settings.BASE_DIR).resolve())
+
+    def __call__(self, request):
+        counts = Counter()
+        offenders = {}
+
+        def on_query(entry):
+            key = fingerprint(entry['sql'])
+            counts[key] += 1
+            if counts[key] != self.threshold + 1 or any(p.search(key) for p in self.ignore):
+                return
+            offenders[key] = self._call_site()
+            if self.action == 'raise':
+                raise NPlusOneError(self._describe(request, key, counts[key], offenders[key]))
+
+        with record_queries(on_query):
+            response = self.get_response(request)
+
+        for key, site in offenders.items():
+            message = self._describe(request, key, counts[key], site)
+            if self.action == 'warn':
+                warnings.warn(message, NPlusOneWarning)
+            else:
+                logger.warning(message, extra={'nplusone_sql': key, 'nplusone_count': counts[key], 'nplusone_site': site})
+        return response
+
+    def _call_site(self):
+        """Return `file:line in func` of the innermost project frame."""
+        for frame in reversed(traceback.extract_stack()):
+            filename = frame.filename
+            if (
+                filename.startswith(self.base_dir)
+                and 'site-packages' not in filename
+                and not filename.endswith(('backend/middleware.py', 'backend/querylog.py'))
+            ):
+                return f'{filename[len(self.base_dir) + 1:]}:{frame.lineno} in {frame.name}'
+        return 'unknown'
+
+    def _describe(self, request, key, count, site):
+        return f'N+1 suspected on {request.method} {request.path}: {count}+ x "{key}" from {site}'
@@ -0,0 +1,61 @@
+# backend/pagination.py
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from backend.counting import count_queryset
+
+
+class CountingPaginator(Paginator):
+    """Django paginator whose `count` comes from `count_queryset`.
+
+    `count_exact` tells whether the count is exact or a cached/estimated
+    figure for a large result set.
+    """
+
+    @cached_property
+    def _count_result(self):
+        if hasattr(self.object_list, 'query'):
+            return count_queryset(self.object_list)
+        return len(self.object_list), True
+
+    @cached_property
+    def count(self):
+        return self._count_result[0]
+
+    @property
+    def count_exact(self):
+        return self._count_result[1]
+
+
+class CountedPageNumberPagination(PageNumberPagination):
+    """Opt-in page-number pagination with cheap counts.
+
+    Lists stay unpaginated unless the client sends `?page=` or
+    `?page_size=`, so existing clients keep receiving plain arrays.
+    Paginated responses add `count_exact` next to `count`.
+    """
+    django_paginator_class = CountingPaginator
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.page_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_exact': self.page.paginator.count_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_exact'] = {'type': 'boolean'}
+        return schema
@@ -0,0 +1,66 @@
+# backend/querylog.py
+"""Record the SQL a block of code runs, with timings.
+
+Uses `connection.execute_wrapper`, so it works with DEBUG off and costs
+nothing outside a `record_queries()` block.
+"""
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalize `sql` so repeats that differ only in values compare equal.
+
+    Literals and placeholders become `?` and `IN (...)` lists of any length
+    collapse to one form.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """`execute_wrapper` callable that appends each query to `queries`.
+
+    `on_query(entry)` is called after each query, if given.
+    """
+
+    def __init__(self, on_query=None):
+        self.queries = []
+        self.on_query = on_query
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            entry = {
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'duration': time.perf_counter() - start,
+            }
+            self.queries.append(entry)
+            if self.on_query is not None:
+                self.on_query(entry)
+
+
+@contextmanager
+def record_queries(on_query=None):
+    """Yield a `QueryRecorder` capturing queries on every DB alias."""
+    recorder = QueryRecorder(on_query)
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(recorder))
+        yield recorder
@@ -0,0 +1,58 @@
+# backend/routers.py
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Whether reads in the current request may be served by a replica. The
+# default is False so management commands, migrations and anything running
+# outside `ReplicaRoutingMiddleware` always read from the primary.
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def set_read_from_replica(enabled):
+    """Allow (or forbid) replica reads for the current context.
+
+    Returns a token that can be passed to `reset_read_from_replica` to
+    restore the previous value.
+    """
+    return _read_from_replica.set(bool(enabled))
+
+
+def reset_read_from_replica(token):
+    _read_from_replica.reset(token)
+
+
+def primary_only(view_func):
+    """Opt a function-based view out of replica reads.
+
+    Class-based views opt out by setting `use_read_replica = False`.
+    """
+    view_func.use_read_replica = False
+    return view_func
+
+
+class PrimaryReplicaRouter:
+    """Send writes to `default` and safe-method reads to a replica.
+
+    Replica aliases are listed in `settings.DATABASE_REPLICAS`. Reads only
+    go to a replica when `ReplicaRoutingMiddleware` has flagged the current
+    request as eligible (safe method, view not opted out, principal not
+    pinned to the primary after a recent write).
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', None) or []
+        if replicas and _read_from_replica.get():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # All aliases point at copies of the same schema.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -1,6 +1,7 @@
 import sys
 import os
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import config
 from datetime import timedelta
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -63,6 +64,9 @@ MIDDLEWARE = [
     # CSRF middleware removed to disable global CSRF protection
     # 'django.middleware.csrf.CsrfViewMiddleware',
     'apps.accounts.middleware.CookieToHeaderJWTMiddleware',
+    'backend.middleware.ReplicaRoutingMiddleware',
+    'backend.middleware.ProfilerMiddleware',
+    'backend.middleware.NPlusOneMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -103,6 +107,27 @@ DATABASES = {
     }
 }
 
+# Read replicas: each host in MYSQL_REPLICA_HOSTS becomes a `replica_<n>`
+# alias sharing the primary's credentials. Safe-method requests read from
+# a random replica (see `backend.routers`); writes always go to `default`.
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(config('MYSQL_REPLICA_HOSTS', default='', cast=lambda v: [h.strip() for h in v.split(',') if h.strip()]), start=1):
+    _alias = f'replica_{_index}'
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        # Tests run against the primary's test database only.
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ['backend.routers.PrimaryReplicaRouter']
+
+# After a write, keep the client's reads on the primary for this many
+# seconds so they see their own changes despite replication lag.
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=5, cast=int)
+DATABASE_REPLICA_PIN_COOKIE = 'db_pin'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -135,14 +160,63 @@ USE_TZ = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': ('rest_framework_simplejwt.authentication.JWTAuthentication',),
+    # Opt-in: lists are only paginated when the client sends ?page=/?page_size=.
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.CountedPageNumberPagination',
+    'PAGE_SIZE': 50,
+    # Token buckets (see `backend.throttling`): 'N/period' allows bursts of
+    # N and refills N per period, per user (or IP when anonymous).
+    'DEFAULT_THROTTLE_CLASSES': ('backend.throttling.TokenBucketThrottle',),
+    'DEFAULT_THROTTLE_RATES': {
+        'login': config('THROTTLE_RATE_LOGIN', default='10/min'),
+        'register': config('THROTTLE_RATE_REGISTER', default='5/min'),
+        'read': config('THROTTLE_RATE_READ', default='600/min'),
+        'write': config('THROTTLE_RATE_WRITE', default='120/min'),
+        'batch': config('THROTTLE_RATE_BATCH', default='60/min'),
+    },
 }
 
+# Shared cache (throttle buckets, counts, lookups, memberships). Without
+# CACHE_REDIS_URL every worker has its own LocMem cache.
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'tasker',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# List counts (see `backend.counting`): exact up to the threshold, then a
+# cached full count ('cached') or the planner's estimate ('estimate').
+COUNT_EXACT_THRESHOLD = config('COUNT_EXACT_THRESHOLD', default=10000, cast=int)
+COUNT_STRATEGY = config('COUNT_STRATEGY', default='cached')
+COUNT_CACHE_TTL = config('COUNT_CACHE_TTL', default=60, cast=int)
+
+# Idempotency-Key support on create endpoints (see `backend.idempotency`).
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=86400, cast=int)
+IDEMPOTENCY_LOCK_SECONDS = config('IDEMPOTENCY_LOCK_SECONDS', default=30, cast=int)
+IDEMPOTENCY_WAIT_SECONDS = config('IDEMPOTENCY_WAIT_SECONDS', default=5, cast=int)
+
+# /api/batch/ limits (see `backend.batch`).
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+BATCH_MAX_CONCURRENCY = config('BATCH_MAX_CONCURRENCY', default=4, cast=int)
+BATCH_TIME_BUDGET_SECONDS = config('BATCH_TIME_BUDGET_SECONDS', default=10, cast=int)
+
 # CORS settings: allow requests from the frontend running on localhost:3000
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
 ]
 # Allow cookies (JWT in HttpOnly cookies) to be sent cross-origin
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'if-match')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed', 'ETag']
 
 # Trust the frontend origin for CSRF (useful when sending cookies)
 CSRF_TRUSTED_ORIGINS = [
@@ -162,6 +236,104 @@ SIMPLE_JWT = {
 
 }
 
+# Task change events (SSE stream at /api/tasks/stream/, ASGI only).
+# Use 'apps.tasks.events.RedisBroker' with TASK_EVENTS_REDIS_URL to fan
+# events out across workers; the in-memory broker only reaches
+# subscribers connected to the same process.
+TASK_EVENTS_BROKER = config('TASK_EVENTS_BROKER', default='apps.tasks.events.InMemoryBroker')
+TASK_EVENTS_REDIS_URL = config('TASK_EVENTS_REDIS_URL', default='')
+TASK_EVENTS_BROKER_OPTIONS = {'queue_size': 100}
+TASK_EVENTS_KEEPALIVE_SECONDS = 15
+# Fallback reload of a stream's member projects if a membership event is missed.
+TASK_EVENTS_MEMBERSHIP_REFRESH_SECONDS = 300
+
+# Deadline reminders (`manage.py send_deadline_reminders [--loop]`).
+# Thresholds are minutes before a task's deadline.
+TASK_REMINDER_THRESHOLDS = config('TASK_REMINDER_THRESHOLDS', default='1440,60', cast=lambda v: [int(m) for m in v.split(',') if m.strip()])
+TASK_REMINDER_BATCH_SIZE = 500
+TASK_REMINDER_INTERVAL_SECONDS = 60
+
+# Board ranks: `manage.py rebalance_ranks` respreads columns whose rank keys
+# grew longer than this.
+TASK_RANK_MAX_LENGTH = config('TASK_RANK_MAX_LENGTH', default=16, cast=int)
+
+# Task activity log (`apps.tasks.activity`): rows are buffered per process
+# and written in batches of up to TASK_ACTIVITY_BATCH_SIZE, at least every
+# TASK_ACTIVITY_FLUSH_SECONDS.
+TASK_ACTIVITY_BATCH_SIZE = config('TASK_ACTIVITY_BATCH_SIZE', default=200, cast=int)
+TASK_ACTIVITY_FLUSH_SECONDS = config('TASK_ACTIVITY_FLUSH_SECONDS', default=2, cast=float)
+TASK_ACTIVITY_MAX_PENDING = 10000
+
+# Per-project tag counts (`/api/projects/<id>/tags/`) are cached this long.
+TAG_COUNTS_CACHE_TTL = config('TAG_COUNTS_CACHE_TTL', default=300, cast=int)
+
+# Delta sync (`/api/tasks/changes/`): a caught-up cursor is moved back this
+# far so writes that committed late are re-read, and "left your view"
+# removals are kept this long (`manage.py purge_sync_removals`).
+TASK_CHANGES_OVERLAP_SECONDS = config('TASK_CHANGES_OVERLAP_SECONDS', default=300, cast=int)
+TASK_SYNC_REMOVAL_RETENTION_DAYS = config('TASK_SYNC_REMOVAL_RETENTION_DAYS', default=30, cast=int)
+
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='tasker@localhost')
+
+# Logging: JSON lines written by a background thread (`backend.log`), so
+# request threads never block on log I/O. LOG_SAMPLING maps logger names
+# (or prefixes) to the fraction of DEBUG/INFO records kept.
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_SAMPLING = {
+    '': 1.0,
+    # Logged on every project list request.
+    'apps.projects.viewsets': 0.1,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {'()': 'backend.log.SamplingFilter'},
+    },
+    'formatters': {
+        'json': {'()': 'backend.log.JsonFormatter'},
+    },
+    'handlers': {
+        'queue': {
+            '()': 'backend.log.QueueListenerHandler',
+            'filename': config('LOG_FILE', default='') or None,
+            'filters': ['sampling'],
+            'formatter': 'json',
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# On-demand profiling of single requests by admins (`X-Profile: 1|mem`).
+# Off by default; when off the middleware is removed at startup.
+PROFILER_ENABLED = config('PROFILER_ENABLED', default=False, cast=bool)
+PROFILER_OUTPUT_DIR = config('PROFILER_OUTPUT_DIR', default=str(BASE_DIR / 'profiles'))
+
+# N+1 query detection for development/staging: report a statement that
+# repeats more than NPLUSONE_THRESHOLD times in one request. Action is
+# 'log', 'warn' or 'raise'.
+NPLUSONE_ENABLED = config('NPLUSONE_ENABLED', default=DEBUG, cast=bool)
+NPLUSONE_THRESHOLD = config('NPLUSONE_THRESHOLD', default=5, cast=int)
+NPLUSONE_ACTION = config('NPLUSONE_ACTION', default='log')
+NPLUSONE_IGNORE = []
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
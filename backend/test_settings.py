@@ -0,0 +1,14 @@
+# backend/test_settings.py
+"""Settings for the test suite.
+
+    DJANGO_SETTINGS_MODULE=backend.test_settings python manage.py test
+
+Adds a `replica_test` alias that mirrors the primary's test database, so
+routing tests can tell the two connections apart. It is not listed in
+DATABASE_REPLICAS; tests that route reads to it enable it with
+`override_settings`.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES['replica_test'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
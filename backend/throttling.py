@@ -0,0 +1,150 @@
+# backend/throttling.py
+"""Token-bucket throttling shared by all workers.
+
+`TokenBucketThrottle` gives every (scope, principal) pair a bucket of
+`num` tokens that refills at `num` per period, i.e. rates use DRF's
+`DEFAULT_THROTTLE_RATES` syntax (`'10/min'`) and the number doubles as the
+allowed burst. The scope is the view's `throttle_scope` (`login`,
+`register`, ...) or, failing that, `read` for safe methods and `write`
+otherwise. A scope whose rate is missing or `None` is not throttled.
+
+The principal is the authenticated user id, or the client IP (DRF's
+`get_ident`, honouring `NUM_PROXIES`) for anonymous requests.
+
+With Django's Redis cache backend the bucket is updated by a Lua script,
+so the check is one atomic round trip shared by every worker. Any other
+backend (LocMem by default) falls back to get/set under a process lock,
+which is exact within a process only: every worker then allows the full
+rate, which is why multi-worker deployments require a shared cache (see
+`backend.checks`).
+"""
+import functools
+import math
+import threading
+import time
+
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# KEYS[1] = bucket; ARGV = capacity, refill per second.
+# Returns {allowed (0/1), seconds to wait (string, keeps the fraction)}.
+_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(wait)}
+"""
+
+_lock = threading.Lock()
+# Registered once; Django's Redis cache builds a new client object per
+# call, so each call passes its own client.
+_script = None
+
+
+@functools.lru_cache(maxsize=64)
+def parse_rate(rate):
+    """`'10/min'` -> `(capacity, refill per second)`; `None` stays `None`."""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    num = int(num)
+    seconds = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return num, num / seconds
+
+
+def _redis_client(cache):
+    # Django's RedisCache exposes the redis-py client through its private
+    # `_cache` helper; anything else takes the local path.
+    helper = getattr(cache, '_cache', None)
+    get_client = getattr(helper, 'get_client', None)
+    if get_client is None or type(cache).__name__ != 'RedisCache':
+        return None
+    return get_client(write=True)
+
+
+def take_redis(client, key, capacity, refill):
+    global _script
+    if _script is None:
+        _script = client.register_script(_BUCKET_LUA)
+    allowed, wait = _script(keys=[key], args=[capacity, refill], client=client)
+    return bool(int(allowed)), float(wait)
+
+
+def take_local(cache, key, capacity, refill):
+    now = time.time()
+    with _lock:
+        state = cache.get(key)
+        tokens, ts = state if state is not None else (capacity, now)
+        tokens = min(capacity, tokens + max(0.0, now - ts) * refill)
+        if tokens >= 1:
+            allowed, wait = True, 0.0
+            tokens -= 1
+        else:
+            allowed, wait = False, (1 - tokens) / refill
+        cache.set(key, (tokens, now), math.ceil(capacity / refill) + 1)
+    return allowed, wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    cache_alias = 'default'
+    key_prefix = 'throttle'
+
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        return 'read' if request.method in SAFE_METHODS else 'write'
+
+    def get_principal(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and getattr(user, 'is_authenticated', False):
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        bucket = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if bucket is None:
+            return True
+        capacity, refill = bucket
+
+        key = f'{self.key_prefix}:{scope}:{self.get_principal(request)}'
+        cache = caches[self.cache_alias]
+        client = _redis_client(cache)
+        if client is not None:
+            allowed, wait = take_redis(client, cache.make_key(key), capacity, refill)
+        else:
+            allowed, wait = take_local(cache, key, capacity, refill)
+        self._wait = wait
+        return allowed
+
+    def wait(self):
+        # DRF formats Retry-After with '%d'; round up so clients never
+        # retry before a token is available.
+        if not self._wait:
+            return None
+        return math.ceil(self._wait)
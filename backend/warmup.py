@@ -0,0 +1,89 @@
+# backend/warmup.py
+"""Pay first-request costs before a worker accepts traffic.
+
+Called from `gunicorn.conf.py` (in the master when the app is preloaded,
+so forked workers inherit the warm state, otherwise in each worker):
+
+- populate the URL resolver's reverse/lookup tables;
+- build every routed view's serializer fields, which imports DRF field
+  machinery and fills the models' `_meta` caches;
+- load the cached lookup tables (`backend.lookups`).
+"""
+import logging
+import time
+
+from django.urls import get_resolver
+from django.urls.resolvers import URLResolver
+
+from backend import lookups
+
+logger = logging.getLogger(__name__)
+
+
+def _iter_callbacks(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_callbacks(pattern.url_patterns)
+        else:
+            yield pattern.callback
+
+
+def warm_urls():
+    resolver = get_resolver()
+    # Accessing reverse_dict populates the resolver (and its sub-resolvers).
+    resolver.reverse_dict
+    return resolver
+
+
+def warm_serializers(resolver):
+    seen = set()
+    for callback in _iter_callbacks(resolver.url_patterns):
+        view_class = getattr(callback, 'cls', None)
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if serializer_class is None or serializer_class in seen:
+            continue
+        seen.add(serializer_class)
+        try:
+            serializer_class().fields
+        except Exception:
+            logger.warning("Could not warm serializer %s", serializer_class.__name__, exc_info=True)
+    return len(seen)
+
+
+def warm_lookups():
+    from apps.accounts.models import Role
+    from apps.projects.models import ProjectStatus
+    from apps.tasks.models import TaskStatus
+
+    for model in (Role, ProjectStatus, TaskStatus):
+        lookups.get_lookup(model)
+
+
+def warmup(include_db=True):
+    """Warm URL resolvers, serializers and (optionally) lookup caches.
+
+    Returns the elapsed seconds per step.
+    """
+    timings = {}
+    start = time.perf_counter()
+    resolver = warm_urls()
+    timings['urls'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    count = warm_serializers(resolver)
+    timings['serializers'] = time.perf_counter() - start
+
+    if include_db:
+        start = time.perf_counter()
+        try:
+            warm_lookups()
+        except Exception:
+            # A database hiccup must not stop the server from starting.
+            logger.warning("Could not warm lookup caches", exc_info=True)
+        timings['lookups'] = time.perf_counter() - start
+
+    logger.info(
+        "Warmup done: %s serializers; %s",
+        count, ', '.join(f'{k}={v * 1000:.1f}ms' for k, v in timings.items()),
+    )
+    return timings
@@ -0,0 +1,86 @@
+"""Measure caller-side latency of a log call: synchronous vs queued handler.
+
+Simulates a slow log sink (disk or network) and times `logger.info(...)`
+on the calling thread, which is what a request waits for.
+
+    python benchmarks/bench_logging.py [--calls 20000] [--sink-latency-us 200]
+"""
+import argparse
+import io
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.log import JsonFormatter, QueueListenerHandler, SamplingFilter, lazy  # noqa: E402
+
+
+class SlowStream(io.StringIO):
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def write(self, s):
+        time.sleep(self.latency)
+        return len(s)
+
+
+def expensive():
+    # Stand-in for a log field that costs a DB round-trip.
+    time.sleep(0.0005)
+    return 42
+
+
+def run(name, handler, calls, make_args):
+    logger = logging.getLogger(f'bench.{name}')
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        logger.info("Project list requested by user id=%s count=%s", i, *make_args())
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(
+        f"{name:<28} mean={statistics.fmean(samples) * 1e6:8.1f}us "
+        f"p50={samples[len(samples) // 2] * 1e6:8.1f}us "
+        f"p99={samples[int(len(samples) * 0.99)] * 1e6:8.1f}us"
+    )
+    return handler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--sink-latency-us', type=float, default=200)
+    args = parser.parse_args()
+    latency = args.sink_latency_us / 1e6
+
+    sync = logging.StreamHandler(SlowStream(latency))
+    sync.setFormatter(JsonFormatter())
+    run('sync', sync, args.calls, lambda: (7,))
+
+    queued = QueueListenerHandler(stream=SlowStream(latency), queue_size=args.calls)
+    queued.setFormatter(JsonFormatter())
+    run('queued', queued, args.calls, lambda: (7,))
+    queued.stop()
+
+    sampled = QueueListenerHandler(stream=SlowStream(latency), queue_size=args.calls)
+    sampled.setFormatter(JsonFormatter())
+    sampled.addFilter(SamplingFilter({'': 0.1}))
+    run('queued+lazy, 10% sampled', sampled, args.calls // 10, lambda: (lazy(expensive),))
+    sampled.stop()
+
+    eager = QueueListenerHandler(stream=SlowStream(latency), queue_size=args.calls)
+    eager.setFormatter(JsonFormatter())
+    eager.addFilter(SamplingFilter({'': 0.1}))
+    run('queued+eager, 10% sampled', eager, args.calls // 10, lambda: (expensive(),))
+    eager.stop()
+
+
+if __name__ == '__main__':
+    main()
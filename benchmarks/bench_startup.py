@@ -0,0 +1,76 @@
+"""Measure worker startup and first-request latency, cold vs warmed.
+
+Each run happens in a fresh interpreter:
+
+- `setup`: import Django and the apps (`django.setup()`);
+- `warmup`: `backend.warmup.warmup()` (warm runs only);
+- `first request`: an unauthenticated GET through the full middleware and
+  DRF stack, plus building the task/project serializers' fields;
+- `second request`: the same again, for comparison.
+
+    python benchmarks/bench_startup.py [--runs 5] [--with-db]
+
+Uses DJANGO_SETTINGS_MODULE (default `backend.settings`); `--with-db` also
+warms the lookup tables, which needs a reachable database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+t0 = time.perf_counter()
+import django
+django.setup()
+t1 = time.perf_counter()
+if {warm!r}:
+    from backend.warmup import warmup
+    warmup(include_db={with_db!r})
+t2 = time.perf_counter()
+
+def request():
+    from django.test import Client
+    from apps.projects.serializers import ProjectSerializer
+    from apps.tasks.serializers import TaskSerializer
+    Client().get('/api/tasks/')
+    TaskSerializer().fields
+    ProjectSerializer().fields
+
+request()
+t3 = time.perf_counter()
+request()
+t4 = time.perf_counter()
+print(json.dumps({{'setup': t1 - t0, 'warmup': t2 - t1, 'first request': t3 - t2, 'second request': t4 - t3}}))
+'''
+
+
+def run(warm, with_db):
+    code = CHILD.format(root=ROOT, warm=warm, with_db=with_db)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--with-db', action='store_true')
+    args = parser.parse_args()
+
+    for label, warm in (('cold', False), ('warm', True)):
+        results = [run(warm, args.with_db) for _ in range(args.runs)]
+        summary = ', '.join(
+            f"{key}={statistics.median(r[key] for r in results) * 1000:.1f}ms"
+            for key in ('setup', 'warmup', 'first request', 'second request')
+        )
+        print(f'{label:<5} (median of {args.runs}): {summary}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Measure the per-request cost of `TokenBucketThrottle.allow_request`.
+
+Uses the cache configured by DJANGO_SETTINGS_MODULE (default
+`backend.settings`), so set CACHE_REDIS_URL to time the Redis/Lua path
+instead of the LocMem fallback. No database is needed.
+
+    python benchmarks/bench_throttle.py [--calls 20000] [--principals 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from backend.throttling import TokenBucketThrottle  # noqa: E402
+
+
+class View:
+    throttle_scope = 'bench'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--principals', type=int, default=100)
+    args = parser.parse_args()
+
+    from rest_framework.settings import api_settings
+
+    # A budget large enough that every call takes the "allowed" path.
+    api_settings.DEFAULT_THROTTLE_RATES['bench'] = f'{args.calls * 10}/s'
+    factory = APIRequestFactory()
+    requests = [
+        Request(factory.get('/api/tasks/', REMOTE_ADDR=f'10.0.{i // 250}.{i % 250}'))
+        for i in range(args.principals)
+    ]
+    throttle = TokenBucketThrottle()
+    view = View()
+
+    start = time.perf_counter()
+    for i in range(args.calls):
+        throttle.allow_request(requests[i % len(requests)], view)
+    elapsed = time.perf_counter() - start
+
+    backend = type(caches[throttle.cache_alias]).__name__
+    print(f'{backend}: {elapsed / args.calls * 1e6:.1f}us per allow_request ({args.calls} calls)')
+
+
+if __name__ == '__main__':
+    main()
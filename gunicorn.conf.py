@@ -0,0 +1,101 @@
+# gunicorn.conf.py
+"""Production gunicorn runtime profile for tasker-backend.
+
+Run from the project root (gunicorn picks this file up automatically):
+
+    gunicorn                       # WSGI, gthread workers
+    TASKER_SERVER=asgi gunicorn    # ASGI (needed for /api/tasks/stream/)
+
+Everything is tunable through environment variables, see below.
+
+With `preload_app` (the default) Django, DRF and all apps are imported
+once in the master, `backend.warmup` primes URL resolvers, serializers and
+lookup caches there, and workers are forked with that state already in
+(copy-on-write) memory. DB and cache connections are closed before
+forking so no socket is ever shared between processes, and each worker
+restarts the background logging thread that does not survive fork().
+
+More than one worker requires a shared cache (`CACHE_REDIS_URL`); the
+master refuses to start otherwise.
+"""
+import multiprocessing
+import os
+
+_server = os.environ.get('TASKER_SERVER', 'wsgi').lower()
+
+if _server == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    # One event loop per worker; idle SSE streams are coroutines, not threads.
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker')
+    workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+else:
+    wsgi_app = 'backend.wsgi:application'
+    # Threads overlap the time requests spend waiting on MySQL.
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Recycle workers periodically to bound memory growth; jitter avoids
+# every worker restarting at once.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Throttle buckets, idempotency keys and the cached lookups must be the
+    # same for every worker (see `backend.checks`).
+    if server.cfg.workers <= 1:
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    from backend.checks import cache_is_shared
+
+    if not cache_is_shared():
+        raise RuntimeError(
+            f'{server.cfg.workers} workers need a shared cache: set CACHE_REDIS_URL (or GUNICORN_WORKERS=1).'
+        )
+
+
+def _close_connections():
+    from django.core.cache import caches
+    from django.db import connections
+
+    connections.close_all()
+    caches.close_all()
+
+
+def when_ready(server):
+    # Master, after the app is preloaded and before workers are forked.
+    if not server.cfg.preload_app:
+        return
+    from backend.warmup import warmup
+
+    warmup()
+    _close_connections()
+
+
+def post_fork(server, worker):
+    # Without preloading Django is not set up yet and nothing is inherited.
+    if not server.cfg.preload_app:
+        return
+    from backend.log import restart_listeners
+
+    # Drop any connection objects inherited from the master; each worker
+    # opens its own on first use.
+    _close_connections()
+    restart_listeners()
+
+
+def post_worker_init(worker):
+    if worker.cfg.preload_app:
+        return
+    from backend.warmup import warmup
+
+    warmup()
+    _close_connections()